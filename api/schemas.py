@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 RegimeLabel = Literal["TRENDING", "MEAN_REVERTING", "LIQUIDATION_RISK", "CHAOTIC", "UNKNOWN"]
@@ -21,10 +21,32 @@ class Edge(BaseModel):
 class SignalEnvelope(BaseModel):
     timestamp_ms: int
     coin: str
+    # exchange timestamp of the newest trade / book data behind the signal, and its age at timestamp_ms
+    source_ts_ms: Optional[int] = None
+    age_ms: Optional[int] = None
+    horizon: Optional[str] = None  # None = count-based windows; else an event-time horizon such as "60s"
     regime: Regime
     signals: Signals
     edge: Edge
 
+class SignalBatch(BaseModel):
+    timestamp_ms: int
+    signals: List[SignalEnvelope]
+    missing: List[str] = Field(default_factory=list)
+
+class MarketAggregate(BaseModel):
+    timestamp_ms: int
+    horizon: Optional[str] = None
+    coins: int
+    regime_counts: Dict[str, int]
+    breadth: Dict[str, float]  # share of coins per regime label
+    trend_vs_liq: float  # TRENDING share minus LIQUIDATION_RISK share
+    pc1_share: Optional[float] = None  # first principal component's share of cross-coin return variance
+    ref: str = "BTC"
+    beta: Dict[str, float] = Field(default_factory=dict)  # per-coin beta to `ref` over the correlation window
+    bucket_ms: int
+    buckets: int  # return buckets currently in the correlation window
+
 class Health(BaseModel):
     ok: bool
     ws_connected: bool
@@ -34,5 +56,12 @@ class Health(BaseModel):
 class SystemState(BaseModel):
     timestamp_ms: int
     coins: List[str]
+    horizons: List[str] = Field(default_factory=list)
     last_trade_ms: dict
     last_book_ms: dict
+    cache: dict = Field(default_factory=dict)
+    streams: dict = Field(default_factory=dict)
+    ingest: dict = Field(default_factory=dict)
+    recorder: Optional[dict] = None
+    history: Optional[dict] = None
+    checkpoint: Optional[dict] = None
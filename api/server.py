@@ -1,114 +1,467 @@
-from __future__ import annotations
+# No `from __future__ import annotations` here: the endpoints are defined inside create_app() and FastAPI
+# resolves string annotations against module globals, where the lazily imported types are not.
 import argparse
 import asyncio
+import dataclasses
+import glob
+import json
+import logging
+import os
 import time
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
 
-from fastapi import FastAPI, HTTPException
-import uvicorn
+from config import ALL_STREAMS, HLConfig
 
-from config import HLConfig
-from ingestion.market_state import MarketState
-from ingestion.hyperliquid_ws import HyperliquidWS
-from features.compute import summarize_features
-from models.regime import classify_regime
-from scoring.edge_score import score_edge
-from api.schemas import SignalEnvelope, Signals, Health, SystemState
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from ingestion.checkpoint import Checkpointer
+    from ingestion.market_state import MarketState
+    from ingestion.pool import ConnectionPool
+    from ingestion.sharded import ShardedIngest
+    from history.writer import HistoryWriter
+    from tools.recorder import FrameRecorder
 
-from tools.replay import iter_ndjson
+# Importing this module is cheap: FastAPI / Pydantic, NumPy (through the feature code), websockets,
+# uvicorn and the capture / history / checkpoint tooling are imported by the code paths that use them.
+# That keeps `--help` and the spawned ingestion workers (which re-import the main module) fast.
+
+log = logging.getLogger(__name__)
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
-app = FastAPI(title="Hyperliquid Signal Layer", version="0.1.0")
-
-STATE = MarketState()
-CFG = HLConfig()
-WS_CLIENT: Optional[HyperliquidWS] = None
-COINS: List[str] = []
-REPLAY_PATH: Optional[str] = None
-_BG_TASK: Optional[asyncio.Task] = None
-
-@app.get("/health", response_model=Health)
-def health() -> Health:
-    return Health(ok=True, ws_connected=STATE.ws_connected, coins=COINS, uptime_sec=STATE.uptime_sec())
-
-@app.get("/v1/state", response_model=SystemState)
-def system_state() -> SystemState:
-    return SystemState(
-        timestamp_ms=_now_ms(),
-        coins=COINS,
-        last_trade_ms={c: STATE.coins.get(c).last_trade_ms if c in STATE.coins else 0 for c in COINS},
-        last_book_ms={c: STATE.coins.get(c).last_book_ms if c in STATE.coins else 0 for c in COINS},
-    )
-
-@app.get("/v1/signal/{coin}", response_model=SignalEnvelope)
-def get_signal(coin: str) -> SignalEnvelope:
-    coin = coin.upper()
-    cs = STATE.coins.get(coin)
-    if not cs:
-        raise HTTPException(status_code=404, detail=f"Unknown coin {coin}. Available: {COINS}")
-
-    feat = summarize_features(cs)
-    regime = classify_regime(
-        ret_std=feat["ret_std"],
-        spread_mean=feat["spread_mean"],
-        trade_imb_std=feat["trade_imb_std"],
-        mom_raw=feat["mom_raw"],
-    )
-    signals = Signals(momentum=feat["mom_01"], liquidity=feat["liq_01"], risk=feat["risk_01"])
-    edge = score_edge(regime, signals)
-
-    return SignalEnvelope(
-        timestamp_ms=_now_ms(),
-        coin=coin,
-        regime=regime,
-        signals=signals,
-        edge=edge,
-    )
-
-async def _run_ws(coins: List[str]) -> None:
-    global WS_CLIENT
-    WS_CLIENT = HyperliquidWS(state=STATE, cfg=CFG)
-    await WS_CLIENT.connect_and_run(coins)
-
-async def _run_replay(path: str) -> None:
-    # Feeds recorded ws messages back into the normal handlers by directly importing the client handler.
-    from ingestion.hyperliquid_ws import HyperliquidWS
-    client = HyperliquidWS(state=STATE, cfg=CFG)
-    for m in iter_ndjson(path):
-        await client._handle_msg(m)  # intentionally internal for interview prep
-        await asyncio.sleep(0)  # yield control
-
-@app.on_event("startup")
-async def startup_event():
-    global _BG_TASK
-    if REPLAY_PATH:
-        _BG_TASK = asyncio.create_task(_run_replay(REPLAY_PATH))
-    else:
-        _BG_TASK = asyncio.create_task(_run_ws(COINS))
+class Runtime:
+    # Everything one app serves from: market state, snapshot cache, stream hub and the optional parts
+    # (connection pool, sharded workers, recorder, history, checkpoints). main() builds one from the
+    # command line; tests and benchmarks build their own and pass it to create_app().
+    def __init__(self, coins: Sequence[str] = (), cfg: Optional[HLConfig] = None, state: Optional["MarketState"] = None,
+                 snapshot_policy: str = "lazy", replay_path: Optional[str] = None):
+        from features.cross import CrossCoinCovariance
+        from ingestion.latency import LatencyTracker
+        from ingestion.market_state import MarketState
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    global WS_CLIENT, _BG_TASK
-    if WS_CLIENT:
-        await WS_CLIENT.stop()
-    if _BG_TASK:
-        _BG_TASK.cancel()
+        self.coins = list(coins)
+        self.cfg = cfg or HLConfig()
+        self.state = state if state is not None else MarketState()
+        self.replay_path = replay_path
+        self.latency = LatencyTracker()  # pipeline stage histograms for /metrics and /v1/latency
+        self.cross = CrossCoinCovariance()  # cross-coin return covariance for /v1/market (in-process ingestion only)
+        self.state.add_listener(self.cross.on_update)
+        self.pc1: Optional[object] = None  # last principal eigenvector, warm-starts the next /v1/market
+        self.ws_client: Optional[ConnectionPool] = None
+        self.shards: Optional[ShardedIngest] = None  # set when ingestion runs in worker processes
+        self.recorder: Optional[FrameRecorder] = None  # records the raw WS feed while serving (--record)
+        self.history: Optional[HistoryWriter] = None  # signal history on disk for /v1/history (--history)
+        self.checkpoint: Optional[Checkpointer] = None  # warm-start checkpoints of the state (--checkpoint)
+        self.bg_task: Optional[asyncio.Task] = None
+        self.ckpt_task: Optional[asyncio.Task] = None
+        self.serve_from(self.state, snapshot_policy)
 
-def main():
-    global COINS, REPLAY_PATH
+    def serve_from(self, source, policy: str) -> None:
+        # (re)build the snapshot cache and stream hub over a MarketState or a feature source
+        from api.snapshot import SnapshotCache
+        from api.stream import SignalHub
+
+        self.cache = SnapshotCache(source, policy=policy)
+        self.cache.latency = self.latency
+        self.hub = SignalHub(self.cache)
+
+    async def run_ws(self) -> None:
+        from ingestion.pool import ConnectionPool
+
+        self.ws_client = ConnectionPool(self.state, self.cfg)
+        self.ws_client.latency = self.latency
+        if self.recorder is not None:
+            self.ws_client.tap = self.recorder.submit
+        await self.ws_client.connect_and_run(self.coins)
+
+    async def run_replay(self, path: str) -> None:
+        # Feeds recorded ws messages back into the normal handlers by directly importing the client handler.
+        from ingestion.hyperliquid_ws import HyperliquidWS
+        from tools.capture import CaptureReader, is_capture
+        from tools.replay import iter_ndjson
+
+        client = HyperliquidWS(state=self.state, cfg=self.cfg)
+        if self.checkpoint is not None and self.checkpoint.restored is not None:
+            # resuming from a checkpoint: only what the capture holds past it
+            from ingestion.checkpoint import GapFilter
+            from tools.replay import iter_records
+
+            gap = GapFilter(self.state)
+            for i, (ch, records) in enumerate(iter_records(path, gap.start_ms)):
+                records = gap.admit(ch, records)
+                if records is not None:
+                    client.on_records(ch, records)
+                if i % 256 == 0:
+                    await asyncio.sleep(0)
+            return
+        if is_capture(path):
+            # binary capture: trades / l2Book arrive as typed records, no JSON parsing
+            with CaptureReader(path) as reader:
+                for i, (ch, payload) in enumerate(reader.iter_records()):
+                    if isinstance(payload, bytes):
+                        client.on_frame(payload)
+                    else:
+                        client.on_records(ch, payload)
+                    if i % 256 == 0:
+                        await asyncio.sleep(0)  # yield control
+            return
+        for m in iter_ndjson(path):
+            await client._handle_msg(m)  # intentionally internal for interview prep
+            await asyncio.sleep(0)  # yield control
+
+    async def start(self) -> None:
+        if self.checkpoint is not None:
+            self.ckpt_task = asyncio.create_task(self.checkpoint.run())
+        if self.history is not None:
+            self.history.attach().start()
+        if self.shards is not None:
+            self.shards.start()
+            self.bg_task = asyncio.create_task(self.shards.source.watch())
+        elif self.replay_path:
+            self.bg_task = asyncio.create_task(self.run_replay(self.replay_path))
+        else:
+            if self.recorder is not None:
+                self.recorder.start()
+            self.bg_task = asyncio.create_task(self.run_ws())
+
+    async def stop(self) -> None:
+        if self.ws_client:
+            await self.ws_client.stop()
+        if self.bg_task:
+            self.bg_task.cancel()
+        if self.shards is not None:
+            self.shards.stop()
+        if self.checkpoint is not None:
+            if self.ckpt_task:
+                self.ckpt_task.cancel()
+            await self.checkpoint.save()  # ingestion has stopped: the state as of shutdown
+        if self.recorder is not None:
+            await asyncio.to_thread(self.recorder.close)  # drains the queue; keep the loop free meanwhile
+        if self.history is not None:
+            await asyncio.to_thread(self.history.close)
+
+def _parse_coins(coins: str) -> Optional[List[str]]:
+    if coins.strip().lower() == "all":
+        return None
+    return [c.strip().upper() for c in coins.split(",") if c.strip()]
+
+def create_app(rt: Optional[Runtime] = None) -> "FastAPI":
+    from fastapi import FastAPI, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+    from fastapi.responses import PlainTextResponse, StreamingResponse
+
+    from api.schemas import Health, MarketAggregate, SignalBatch, SignalEnvelope, SystemState
+    from api.stream import StreamFilter
+    from features.cross import market_aggregate
+    from ingestion.market_state import parse_horizon
+    from scoring.edge_score import EXPLAIN_FLAGS
+
+    rt = rt if rt is not None else Runtime()
+    app = FastAPI(title="Hyperliquid Signal Layer", version="0.1.0")
+    app.state.runtime = rt
+
+    @app.get("/health", response_model=Health)
+    def health() -> Health:
+        return Health(ok=True, ws_connected=rt.cache.source.connected, coins=rt.coins, uptime_sec=rt.state.uptime_sec())
+
+    @app.get("/v1/state", response_model=SystemState)
+    def system_state() -> SystemState:
+        source = rt.cache.source
+        times = {c: source.times(c) for c in rt.coins}
+        return SystemState(
+            timestamp_ms=_now_ms(),
+            coins=rt.coins,
+            horizons=list(source.horizons),
+            last_trade_ms={c: t[0] for c, t in times.items()},
+            last_book_ms={c: t[1] for c, t in times.items()},
+            cache=rt.cache.stats(),
+            streams=rt.hub.stats(),
+            ingest=dict(source.stats(), connections=rt.ws_client.stats()) if rt.ws_client is not None else source.stats(),
+            recorder=rt.recorder.stats() if rt.recorder is not None else None,
+            history=rt.history.stats() if rt.history is not None else None,
+            checkpoint=rt.checkpoint.stats() if rt.checkpoint is not None else None,
+        )
+
+    # async so they run on the event loop: summary/prometheus flush the tracker's pending batch, which
+    # on_frame appends to and flushes on the loop too; from the threadpool the two would race
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics(per_coin: bool = Query(False, description="Label histograms by coin as well (one series per coin)")) -> str:
+        return rt.latency.prometheus(per_coin)
+
+    @app.get("/v1/latency")
+    async def latency(coin: Optional[str] = Query(None, description="Restrict to one coin")) -> dict:
+        # percentiles per pipeline stage, microseconds
+        return {"timestamp_ms": _now_ms(), "unit": "us", "stages": rt.latency.summary(coin.upper() if coin else None)}
+
+    def _check_horizon(horizon: Optional[str]) -> None:
+        if horizon is not None and horizon not in rt.cache.source.horizons:
+            raise HTTPException(status_code=400, detail=f"Unknown horizon {horizon}. Available: {list(rt.cache.source.horizons)}")
+
+    @app.get("/v1/signal/{coin}", response_model=SignalEnvelope)
+    def get_signal(
+        coin: str,
+        horizon: Optional[str] = Query(None, description="Event-time horizon (e.g. 60s); omit for the count-based windows"),
+    ) -> SignalEnvelope:
+        coin = coin.upper()
+        _check_horizon(horizon)
+        env = rt.cache.get(coin, horizon)
+        if env is None:
+            raise HTTPException(status_code=404, detail=f"Unknown coin {coin}. Available: {rt.coins}")
+        return env
+
+    @app.get("/v1/market", response_model=MarketAggregate)
+    def get_market(
+        horizon: Optional[str] = Query(None, description="Event-time horizon for the regime breadth; omit for the count-based windows"),
+        ref: str = Query("BTC", description="Coin the per-coin betas are measured against"),
+    ) -> MarketAggregate:
+        if rt.shards is not None:
+            raise HTTPException(status_code=503, detail="Market aggregate needs in-process ingestion (not available with --workers)")
+        _check_horizon(horizon)
+        agg, rt.pc1 = market_aggregate(rt.state, rt.cross, horizon, ref.upper(), rt.pc1)
+        return MarketAggregate(timestamp_ms=_now_ms(), **agg)
+
+    @app.get("/v1/history/{coin}")
+    def get_history(
+        coin: str,
+        from_ms: Optional[int] = Query(None, alias="from", description="Start, epoch ms (default: an hour before `to`)"),
+        to_ms: Optional[int] = Query(None, alias="to", description="End, epoch ms, inclusive (default: newest stored)"),
+        step: str = Query("0", description="Downsample to the last row per step (ms, or e.g. 10s / 5m / 1h); 0 = every row"),
+        limit: int = Query(10_000, ge=1, le=1_000_000, description="Most rows returned (the newest are kept)"),
+    ) -> Response:
+        # Columnar signal history from the on-disk store; one row per coin per resolution step of event time.
+        if rt.history is None:
+            raise HTTPException(status_code=503, detail="History is not recorded (start the server with --history DIR)")
+        from history.store import rows_to_json
+
+        coin = coin.upper()
+        store = rt.history.store
+        try:
+            step_ms = int(step) if step.isdigit() else parse_horizon(step)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        to_ms = to_ms if to_ms is not None else (store.latest_ms or _now_ms())
+        from_ms = from_ms if from_ms is not None else to_ms - 3_600_000
+        if from_ms > to_ms:
+            raise HTTPException(status_code=400, detail="from must not be after to")
+        if coin not in rt.coins and not store.partitions(coin):
+            raise HTTPException(status_code=404, detail=f"No history for {coin}")
+        rows = store.query(coin, from_ms, to_ms, step_ms)
+        n = len(rows["ts"])
+        if n > limit:
+            rows = {k: v[n - limit:] for k, v in rows.items()}
+        payload = {
+            "coin": coin,
+            "from_ms": from_ms,
+            "to_ms": to_ms,
+            "step_ms": step_ms,
+            "resolution_ms": store.resolution_ms,
+            "rows": min(n, limit),
+            "truncated": n > limit,
+            "explain_flags": list(EXPLAIN_FLAGS),  # explain[i] bit k = explain_flags[k]
+        }
+        payload.update(rows_to_json(rows))
+        return Response(content=json.dumps(payload, separators=(",", ":")), media_type="application/json")
+
+    @app.get("/v1/signals", response_model=SignalBatch)
+    def get_signals(
+        coins: str = Query("all", description="Comma-separated coins, or 'all'"),
+        horizon: Optional[str] = Query(None, description="Event-time horizon (e.g. 60s); omit for the count-based windows"),
+    ) -> Response:
+        # Stitched together from the cache's pre-serialized envelopes and returned as raw bytes,
+        # so there is no per-envelope model validation or re-serialization on this path.
+        _check_horizon(horizon)
+        wanted = _parse_coins(coins)
+        if wanted is None:
+            wanted = rt.cache.source.coins()
+        now = _now_ms()
+        parts: List[bytes] = []
+        missing: List[str] = []
+        for c in wanted:
+            body = rt.cache.get_json(c, horizon, now)
+            if body is None:
+                missing.append(c)
+            else:
+                parts.append(body)
+        payload = b"".join((
+            b'{"timestamp_ms":', str(now).encode(),
+            b',"signals":[', b",".join(parts),
+            b'],"missing":', json.dumps(missing).encode(), b"}",
+        ))
+        return Response(content=payload, media_type="application/json")
+
+    @app.websocket("/v1/stream")
+    async def stream_ws(
+        websocket: WebSocket,
+        coins: str = "all",
+        on_regime_change: bool = False,
+        min_edge_delta: float = 0.0,
+        max_rate_hz: float = 0.0,
+        horizon: Optional[str] = None,
+    ):
+        # One text frame per SignalEnvelope, pushed as soon as a subscribed coin changes.
+        if horizon is not None and horizon not in rt.cache.source.horizons:
+            await websocket.close(code=1008, reason=f"Unknown horizon {horizon}")
+            return
+        await websocket.accept()
+        flt = StreamFilter(on_regime_change=on_regime_change, min_edge_delta=min_edge_delta, max_rate_hz=max_rate_hz)
+        sub = rt.hub.subscribe(_parse_coins(coins), flt, horizon)
+        try:
+            while True:
+                for body in await sub.next_batch(rt.cache):
+                    await websocket.send_text(body.decode())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            rt.hub.unsubscribe(sub)
+
+    @app.get("/v1/stream/sse")
+    async def stream_sse(
+        coins: str = "all",
+        on_regime_change: bool = False,
+        min_edge_delta: float = 0.0,
+        max_rate_hz: float = 0.0,
+        horizon: Optional[str] = None,
+    ) -> StreamingResponse:
+        # Server-Sent Events variant of /v1/stream: one `data:` event per SignalEnvelope.
+        _check_horizon(horizon)
+        flt = StreamFilter(on_regime_change=on_regime_change, min_edge_delta=min_edge_delta, max_rate_hz=max_rate_hz)
+        sub = rt.hub.subscribe(_parse_coins(coins), flt, horizon)
+
+        async def events():
+            try:
+                while True:
+                    batch = await sub.next_batch(rt.cache)
+                    yield b"".join(b"data: " + body + b"\n\n" for body in batch)
+            finally:
+                rt.hub.unsubscribe(sub)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.on_event("startup")
+    async def startup_event():
+        await rt.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await rt.stop()
+
+    return app
+
+def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser()
     ap.add_argument("--coins", default="BTC,ETH,SOL", help="Comma-separated coin symbols")
-    ap.add_argument("--replay", default=None, help="Path to NDJSON capture for deterministic replay")
+    ap.add_argument("--replay", default=None, help="Path to an NDJSON or .hlcap capture for deterministic replay")
+    ap.add_argument("--snapshot-policy", default="lazy", choices=("lazy", "eager"),
+                    help="lazy: recompute signals on read when data changed; eager: recompute on every ingest")
+    ap.add_argument("--workers", type=int, default=0,
+                    help="Shard coins across N ingestion processes, each with its own WS connection (0 = in-process)")
+    ap.add_argument("--connections", type=int, default=HLConfig.ws_connections,
+                    help="In-process ingestion: shard coins across N WS connections that reconnect independently")
+    ap.add_argument("--ws-url", default=HLConfig.ws_url, help="WS endpoint (e.g. a local tools.fake_ws server)")
+    ap.add_argument("--streams", default="all",
+                    help="Channels to subscribe to: all, features (only what the features read) or a comma-separated list")
+    ap.add_argument("--record", default=None,
+                    help="Also record the raw WS feed to this NDJSON / .hlcap path (written off the event loop)")
+    ap.add_argument("--record-rotate-sec", type=float, default=0.0, help="Start a new recording file every N seconds")
+    ap.add_argument("--record-rotate-mb", type=float, default=0.0, help="Start a new recording file at N MB")
+    ap.add_argument("--history", default=None, help="Record signal history under this directory and serve /v1/history")
+    ap.add_argument("--history-resolution-ms", type=int, default=1_000, help="At most one history row per coin per N ms")
+    ap.add_argument("--history-retention-hours", type=float, default=168.0, help="Delete history older than this")
+    ap.add_argument("--history-compact-hours", type=float, default=24.0,
+                    help="Downsample history older than this to one row per minute")
+    ap.add_argument("--checkpoint", default=None,
+                    help="Warm start: restore the market state from this file if it exists, and checkpoint to it periodically")
+    ap.add_argument("--checkpoint-every-sec", type=float, default=30.0, help="Seconds between checkpoints")
+    ap.add_argument("--catchup", default=None,
+                    help="After restoring --checkpoint, replay the gap from these recordings (comma-separated paths / globs, "
+                         "NDJSON or .hlcap, e.g. the --record output)")
     ap.add_argument("--host", default="127.0.0.1")
     ap.add_argument("--port", type=int, default=8000)
-    args = ap.parse_args()
+    return ap
+
+def runtime_from_args(args: argparse.Namespace, ap: Optional[argparse.ArgumentParser] = None) -> Runtime:
+    ap = ap or build_parser()
+    coins = [c.strip().upper() for c in args.coins.split(",") if c.strip()]
+    if args.streams == "all":
+        streams = ALL_STREAMS
+    elif args.streams == "features":
+        from features.compute import streams_for
+        streams = streams_for()
+    else:
+        streams = tuple(s.strip() for s in args.streams.split(",") if s.strip())
+        unknown = set(streams) - set(ALL_STREAMS)
+        if unknown:
+            ap.error(f"unknown streams: {', '.join(sorted(unknown))}; choose from {', '.join(ALL_STREAMS)}")
+    if args.workers > 0 and args.replay:
+        ap.error("--workers cannot be combined with --replay")
+    if args.record and (args.replay or args.workers > 0):
+        ap.error("--record needs in-process live ingestion (no --replay / --workers)")
+    if args.checkpoint and args.workers > 0:
+        ap.error("--checkpoint needs in-process ingestion (no --workers)")
+    if args.catchup and (not args.checkpoint or args.replay):
+        ap.error("--catchup replays the gap after a --checkpoint restore, for live ingestion (no --replay)")
 
-    COINS = [c.strip().upper() for c in args.coins.split(",") if c.strip()]
-    REPLAY_PATH = args.replay
+    cfg = dataclasses.replace(HLConfig(), ws_url=args.ws_url, streams=streams, ws_connections=max(1, args.connections))
+    state, restored = _warm_start(args, cfg) if args.checkpoint else (None, None)
+    rt = Runtime(coins, cfg, state=state, snapshot_policy=args.snapshot_policy, replay_path=args.replay)
+    if args.workers > 0:
+        from ingestion.sharded import ShardedIngest
+        rt.shards = ShardedIngest(coins, args.workers, cfg, rt.state.horizons)
+        rt.serve_from(rt.shards.source, args.snapshot_policy)
+    if args.record:
+        from tools.recorder import FrameRecorder
+        rt.recorder = FrameRecorder(args.record, rotate_sec=args.record_rotate_sec, rotate_mb=args.record_rotate_mb)
+    if args.history:
+        from history.store import HistoryStore
+        from history.writer import HistoryWriter
+        store = HistoryStore(args.history, resolution_ms=args.history_resolution_ms,
+                             retention_ms=int(args.history_retention_hours * 3_600_000),
+                             compact_after_ms=int(args.history_compact_hours * 3_600_000))
+        rt.history = HistoryWriter(store, rt.cache)
+    if args.checkpoint:
+        from ingestion.checkpoint import Checkpointer
+        rt.checkpoint = Checkpointer(rt.state, args.checkpoint, args.checkpoint_every_sec)
+        rt.checkpoint.restored = restored
+    return rt
+
+def _warm_start(args: argparse.Namespace, cfg: HLConfig) -> Tuple[Optional["MarketState"], Optional[dict]]:
+    # The checkpoint restored into a fresh state (plus the recorded gap, with --catchup), and its meta;
+    # (None, None) for a cold start. The server only ever adopts a state that was restored completely.
+    from ingestion.checkpoint import load_checkpoint
+
+    if not os.path.exists(args.checkpoint):
+        return None, None
+    t0 = time.perf_counter()
+    try:
+        state, meta = load_checkpoint(args.checkpoint)
+    except Exception as e:
+        # an unreadable or incompatible checkpoint means a cold start, not no start
+        log.warning("checkpoint %s not restored, starting cold: %s", args.checkpoint, e, exc_info=True)
+        return None, None
+    log.info("restored %d coins from %s (event time %d) in %.0f ms",
+             len(meta["coins"]), args.checkpoint, meta["event_ms"], (time.perf_counter() - t0) * 1e3)
+    if args.catchup:
+        from tools.replay import catch_up
+        paths = [p for pattern in args.catchup.split(",") if pattern.strip() for p in sorted(glob.glob(pattern.strip()))]
+        t0 = time.perf_counter()
+        try:
+            got = catch_up(state, paths, cfg)
+        except Exception as e:
+            # the state is part-way through the gap: start again from the checkpoint alone
+            log.warning("catch-up from %s failed, continuing from the checkpoint alone: %s", args.catchup, e, exc_info=True)
+            return load_checkpoint(args.checkpoint)
+        log.info("caught up %d records from %d file(s) in %.0f ms", got["applied"], len(paths), (time.perf_counter() - t0) * 1e3)
+    return state, meta
+
+def main():
+    ap = build_parser()
+    args = ap.parse_args()
+    # uvicorn configures only its own loggers; this one carries the runtime's (warm start, writers, WS)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s: %(message)s")
+    app = create_app(runtime_from_args(args, ap))
 
-    uvicorn.run("api.server:app", host=args.host, port=args.port, reload=False, log_level="info")
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, reload=False, log_level="info")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import time
+from time import perf_counter_ns
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from ingestion.latency import LatencyTracker
+from ingestion.market_state import CoinState, MarketState
+from features.compute import summarize_features
+from models.regime import classify_regime
+from scoring.edge_score import score_edge
+from api.schemas import SignalEnvelope, Signals
+
+SNAPSHOT_POLICIES = ("lazy", "eager")
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+def build_envelope(cs: CoinState, horizon: Optional[str] = None) -> SignalEnvelope:
+    return envelope_from_features(cs.coin, summarize_features(cs, horizon), horizon, max(cs.last_trade_ms, cs.last_book_ms))
+
+def envelope_from_features(coin: str, feat: Dict[str, float], horizon: Optional[str] = None,
+                           source_ts_ms: int = 0) -> SignalEnvelope:
+    regime = classify_regime(
+        ret_std=feat["ret_std"],
+        spread_mean=feat["spread_mean"],
+        trade_imb_std=feat["trade_imb_std"],
+        mom_raw=feat["mom_raw"],
+        horizon=horizon,
+    )
+    signals = Signals(momentum=feat["mom_01"], liquidity=feat["liq_01"], risk=feat["risk_01"])
+    edge = score_edge(regime, signals)
+
+    now = _now_ms()
+    return SignalEnvelope(
+        timestamp_ms=now,
+        coin=coin,
+        source_ts_ms=source_ts_ms or None,
+        age_ms=now - source_ts_ms if source_ts_ms else None,
+        horizon=horizon,
+        regime=regime,
+        signals=signals,
+        edge=edge,
+    )
+
+class StateSource:
+    # Features computed in-process from live CoinState objects (single-process ingestion).
+    # ingestion.shm.SharedFeatureSource offers the same interface over worker-published rows.
+    def __init__(self, state: MarketState):
+        self.state = state
+        self.horizons = state.horizons
+
+    def add_listener(self, fn: Callable[[str], None]) -> None:
+        self.state.add_listener(lambda cs: fn(cs.coin))
+
+    def coins(self) -> List[str]:
+        return list(self.state.coins)
+
+    def version(self, coin: str) -> Optional[int]:
+        cs = self.state.coins.get(coin)
+        return cs.version if cs is not None else None
+
+    def read(self, coin: str, horizon: Optional[str] = None) -> Optional[Tuple[int, Dict[str, float]]]:
+        cs = self.state.coins.get(coin)
+        if cs is None:
+            return None
+        # read the version first: an update racing with the computation leaves the snapshot stale, never ahead
+        version = cs.version
+        return version, summarize_features(cs, horizon)
+
+    def times(self, coin: str) -> Tuple[int, int]:
+        cs = self.state.coins.get(coin)
+        return (cs.last_trade_ms, cs.last_book_ms) if cs is not None else (0, 0)
+
+    @property
+    def connected(self) -> bool:
+        return self.state.ws_connected
+
+    def stats(self) -> dict:
+        return {"mode": "local"}
+
+_TS_KEY = b'{"timestamp_ms":'
+_AGE_KEY = b',"age_ms":'
+
+@dataclass
+class Snapshot:
+    # Only the version-dependent part is cached. timestamp_ms and age_ms are wall-clock, so they are
+    # stamped per response, into a copy of the envelope or between the pre-serialized JSON pieces.
+    version: int
+    envelope: SignalEnvelope  # as of computed_ms
+    mid: bytes  # envelope JSON from after the timestamp_ms value through the age_ms key
+    tail: bytes  # envelope JSON after the age_ms value
+    computed_ms: int
+
+    @classmethod
+    def build(cls, version: int, env: SignalEnvelope, computed_ms: int) -> Snapshot:
+        body = env.model_dump_json().encode()
+        # timestamp_ms is the first field and each value ends at the next comma; a quote inside a
+        # string is escaped, so the age_ms key cannot be matched within the coin name
+        ts_end = body.index(b",", len(_TS_KEY))
+        age = body.index(_AGE_KEY, ts_end) + len(_AGE_KEY)
+        age_end = body.index(b",", age)
+        return cls(version=version, envelope=env, mid=body[ts_end:age], tail=body[age_end:], computed_ms=computed_ms)
+
+    def _age_ms(self, now_ms: int) -> Optional[int]:
+        source = self.envelope.source_ts_ms
+        return now_ms - source if source else None
+
+    def envelope_at(self, now_ms: int) -> SignalEnvelope:
+        return self.envelope.model_copy(update={"timestamp_ms": now_ms, "age_ms": self._age_ms(now_ms)})
+
+    def body_at(self, now_ms: int) -> bytes:
+        age = self._age_ms(now_ms)
+        return b"".join((_TS_KEY, str(now_ms).encode(), self.mid, b"null" if age is None else str(age).encode(), self.tail))
+
+class SnapshotCache:
+    # Per-(coin, horizon) envelope cache keyed by the coin's update version, over a feature source
+    # (a MarketState is wrapped in a StateSource).
+    # - lazy: recompute on read when the coin changed since the cached snapshot
+    # - eager: recompute on ingest (via source listeners); reads only fall back to computing
+    #   if nothing has been cached yet. Eager refresh covers the default horizon plus any horizon
+    #   that has been read at least once.
+    def __init__(self, source: Union[MarketState, StateSource], policy: str = "lazy"):
+        if policy not in SNAPSHOT_POLICIES:
+            raise ValueError(f"Unknown snapshot policy {policy!r}; expected one of {SNAPSHOT_POLICIES}")
+        self.source = StateSource(source) if isinstance(source, MarketState) else source
+        self.policy = policy
+        self._snaps: Dict[Tuple[str, Optional[str]], Snapshot] = {}
+        # replaced, never mutated: reads in the threadpool register horizons while the ingest
+        # loop iterates them in _on_update
+        self._horizons: Tuple[Optional[str], ...] = (None,)
+        self.hits = 0
+        self.misses = 0
+        self.recomputes = 0
+        # optional timing of each recompute (features -> envelope, envelope -> JSON)
+        self.latency: Optional[LatencyTracker] = None
+        self.source.add_listener(self._on_update)
+
+    def get(self, coin: str, horizon: Optional[str] = None, now_ms: Optional[int] = None) -> Optional[SignalEnvelope]:
+        snap = self.lookup(coin, horizon)
+        return snap.envelope_at(now_ms or _now_ms()) if snap else None
+
+    def get_json(self, coin: str, horizon: Optional[str] = None, now_ms: Optional[int] = None) -> Optional[bytes]:
+        snap = self.lookup(coin, horizon)
+        return snap.body_at(now_ms or _now_ms()) if snap else None
+
+    def lookup(self, coin: str, horizon: Optional[str] = None) -> Optional[Snapshot]:
+        version = self.source.version(coin)
+        if version is None:
+            return None
+        snap = self._snaps.get((coin, horizon))
+        if snap is not None and (snap.version == version or self.policy == "eager"):
+            self.hits += 1
+            return snap
+        self.misses += 1
+        if horizon not in self._horizons:
+            if horizon not in self.source.horizons:
+                raise KeyError(f"Unknown horizon {horizon!r}; available: {list(self.source.horizons)}")
+            self._horizons = self._horizons + (horizon,)
+        return self._refresh(coin, horizon)
+
+    def _on_update(self, coin: str) -> None:
+        if self.policy == "eager":
+            for horizon in self._horizons:
+                self._refresh(coin, horizon)
+
+    def _refresh(self, coin: str, horizon: Optional[str] = None) -> Optional[Snapshot]:
+        t0 = perf_counter_ns()
+        got = self.source.read(coin, horizon)
+        if got is None:
+            return None
+        version, feat = got
+        env = envelope_from_features(coin, feat, horizon, max(self.source.times(coin)))
+        t1 = perf_counter_ns()
+        snap = Snapshot.build(version, env, env.timestamp_ms)
+        if self.latency is not None:
+            self.latency.snapshot(coin, horizon, t0, t1, perf_counter_ns())
+        self._snaps[(coin, horizon)] = snap
+        self.recomputes += 1
+        return snap
+
+    def stats(self) -> dict:
+        now = _now_ms()
+        coins = {}
+        for coin in self.source.coins():
+            version = self.source.version(coin) or 0
+            snap = self._snaps.get((coin, None))
+            coins[coin] = {
+                "version": version,
+                "cached_version": snap.version if snap else None,
+                "versions_behind": version - snap.version if snap else None,
+                "age_ms": now - snap.computed_ms if snap else None,
+            }
+        return {
+            "policy": self.policy,
+            "horizons": sorted(h or "count" for h in self._horizons),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recomputes": self.recomputes,
+            "coins": coins,
+        }
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from api.snapshot import SnapshotCache
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+@dataclass(frozen=True)
+class StreamFilter:
+    # With no filter set every change is forwarded. With both change filters set, an update
+    # is forwarded when either one triggers.
+    on_regime_change: bool = False
+    min_edge_delta: float = 0.0
+    max_rate_hz: float = 0.0  # per coin; 0 = unlimited
+
+    def passes(self, label: str, score: float, last_label: Optional[str], last_score: Optional[float]) -> bool:
+        if last_label is None:
+            return True  # first envelope for a coin is always sent
+        if not self.on_regime_change and self.min_edge_delta <= 0.0:
+            return True
+        if self.on_regime_change and label != last_label:
+            return True
+        if self.min_edge_delta > 0.0 and abs(score - last_score) >= self.min_edge_delta:
+            return True
+        return False
+
+class Subscriber:
+    # Per-client state. Ingestion only marks coins dirty (a set, so the backlog is bounded by the
+    # number of subscribed coins and bursts coalesce into the latest state); the client's own sender
+    # task pulls the current snapshot when it is ready to write, so a slow consumer never blocks ingest.
+    def __init__(
+        self,
+        coins: Optional[Iterable[str]],
+        flt: StreamFilter,
+        horizon: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.coins: Optional[Set[str]] = set(coins) if coins is not None else None
+        self.filter = flt
+        self.horizon = horizon
+        self._loop = loop or asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._woken = False
+        self._dirty: Set[str] = set()
+        self._last_label: Dict[str, str] = {}
+        self._last_score: Dict[str, float] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._min_interval = 1.0 / flt.max_rate_hz if flt.max_rate_hz > 0 else 0.0
+        self.sent = 0
+        self.coalesced = 0
+        self.filtered = 0
+
+    def wants(self, coin: str) -> bool:
+        return self.coins is None or coin in self.coins
+
+    def offer(self, coin: str) -> None:
+        # safe to call from any thread; wakes the sender at most once per batch
+        if coin in self._dirty:
+            self.coalesced += 1
+            return
+        self._dirty.add(coin)
+        if not self._woken:
+            self._woken = True
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def next_batch(self, cache: SnapshotCache) -> List[bytes]:
+        while True:
+            now = time.monotonic()
+            out: List[bytes] = []
+            wait: Optional[float] = None
+            for coin in list(self._dirty):
+                if self._min_interval:
+                    due = self._last_sent.get(coin, float("-inf")) + self._min_interval
+                    if due > now:
+                        wait = due - now if wait is None else min(wait, due - now)
+                        continue
+                self._dirty.discard(coin)
+                snap = cache.lookup(coin, self.horizon)
+                if snap is None:
+                    continue
+                env = snap.envelope
+                label, score = env.regime.label, env.edge.score
+                if not self.filter.passes(label, score, self._last_label.get(coin), self._last_score.get(coin)):
+                    self.filtered += 1
+                    continue
+                self._last_label[coin] = label
+                self._last_score[coin] = score
+                self._last_sent[coin] = now
+                out.append(snap.body_at(_now_ms()))
+            if out:
+                self.sent += len(out)
+                return out
+            self._woken = False
+            self._event.clear()
+            if self._dirty and wait is None:
+                continue
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "coins": sorted(self.coins) if self.coins is not None else "all",
+            "horizon": self.horizon,
+            "pending": len(self._dirty),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "filtered": self.filtered,
+        }
+
+class SignalHub:
+    # Fans coin updates out to streaming subscribers. Envelopes come from the shared SnapshotCache,
+    # so each coin version is computed and serialized once no matter how many clients receive it.
+    def __init__(self, cache: SnapshotCache):
+        self.cache = cache
+        self.subscribers: Set[Subscriber] = set()
+        cache.source.add_listener(self._on_update)
+
+    def subscribe(self, coins: Optional[Iterable[str]], flt: StreamFilter, horizon: Optional[str] = None) -> Subscriber:
+        sub = Subscriber(coins, flt, horizon)
+        self.subscribers.add(sub)
+        # prime with current state so a client does not wait for the next tick
+        live = set(self.cache.source.coins())
+        for coin in (sub.coins if sub.coins is not None else live):
+            if coin in live:
+                sub.offer(coin)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+
+    def _on_update(self, coin: str) -> None:
+        for sub in self.subscribers:
+            if sub.wants(coin):
+                sub.offer(coin)
+
+    def stats(self) -> dict:
+        return {"subscribers": [s.stats() for s in list(self.subscribers)]}
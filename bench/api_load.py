@@ -0,0 +1,84 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import List
+
+import aiohttp
+import uvicorn
+
+from api.server import Runtime, create_app
+from tools.synth import synth_coins, write_ndjson
+
+# Load test: replay a synthetic capture into an in-process server, then compare coin-reads/sec of
+# N x GET /v1/signal/{coin} against GET /v1/signals?coins=all.
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_replay_server(capture: str, coins: List[str]) -> tuple:
+    rt = Runtime(coins, replay_path=capture)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(rt), host="127.0.0.1", port=port, log_level="warning"))
+    t = threading.Thread(target=server.run, daemon=True)
+    t.start()
+    while not server.started:
+        time.sleep(0.05)
+    # wait for the replay task to drain the capture
+    while rt.bg_task is None or not rt.bg_task.done():
+        time.sleep(0.05)
+    return server, t, f"http://127.0.0.1:{port}"
+
+async def _hammer(urls: List[str], coins_per_req: int, seconds: float, concurrency: int) -> float:
+    reads = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i: int, session: aiohttp.ClientSession) -> None:
+        nonlocal reads
+        j = i
+        while time.perf_counter() < deadline:
+            async with session.get(urls[j % len(urls)]) as r:
+                await r.read()
+                assert r.status == 200
+            reads += coins_per_req
+            j += concurrency
+
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(worker(i, session) for i in range(concurrency)))
+    return reads / (time.perf_counter() - t0)
+
+def run(n_coins: int = 150, messages: int = 50_000, seconds: float = 5.0, concurrency: int = 16) -> dict:
+    coins = synth_coins(n_coins)
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = write_ndjson(os.path.join(tmp, "capture.ndjson"), coins, messages)
+        server, thread, base = start_replay_server(capture, coins)
+        try:
+            per_coin = asyncio.run(_hammer([f"{base}/v1/signal/{c}" for c in coins], 1, seconds, concurrency))
+            batch = asyncio.run(_hammer([f"{base}/v1/signals?coins=all"], n_coins, seconds, concurrency))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+    return {"coins": n_coins, "per_coin_reads_per_sec": per_coin, "batch_reads_per_sec": batch, "speedup": batch / per_coin}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=150)
+    ap.add_argument("--messages", type=int, default=50_000)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+    r = run(args.coins, args.messages, args.seconds, args.concurrency)
+    print(f"{r['coins']} coins")
+    print(f"  /v1/signal/{{coin}}       : {r['per_coin_reads_per_sec']:10.0f} coin-reads/s")
+    print(f"  /v1/signals?coins=all    : {r['batch_reads_per_sec']:10.0f} coin-reads/s")
+    print(f"  speedup                  : {r['speedup']:10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+
+from config import HLConfig
+from ingestion.decode import get_loads, peek_channel
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from ingestion.messages import make_frame_decoders
+from tools.capture import CODECS, CaptureReader, convert_ndjson, zstandard
+from tools.replay import iter_ndjson
+from tools.synth import synth_coins, write_ndjson
+
+# NDJSON vs .hlcap captures: file size, decode-only throughput, full replay into MarketState, and
+# a seek (one coin, 10% of the time range).
+
+def _ndjson_decode(path: str) -> int:
+    loads = get_loads("auto")
+    decoders = make_frame_decoders(loads, lambda: 0)
+    n = 0
+    with open(path, "rb") as f:
+        for line in f:
+            ch = peek_channel(line)
+            if ch in decoders:
+                decoders[ch](line)
+            else:
+                loads(line)
+            n += 1
+    return n
+
+def _ndjson_replay(path: str) -> int:
+    client = HyperliquidWS(state=MarketState(), cfg=HLConfig())
+    n = 0
+    with open(path, "rb") as f:
+        for line in f:
+            client.on_frame(line)
+            n += 1
+    return n
+
+def _ndjson_seek(path: str, coin: str, lo: int, hi: int) -> int:
+    # no index: every line is decoded to find the matching ones
+    n = 0
+    for m in iter_ndjson(path):
+        d = m.get("data")
+        if m.get("channel") == "trades" and d and d[0].get("coin") == coin and lo <= d[0].get("time", 0) <= hi:
+            n += 1
+        elif m.get("channel") == "l2Book" and d.get("coin") == coin and lo <= d.get("time", 0) <= hi:
+            n += 1
+    return n
+
+def _capture_decode(path: str) -> int:
+    with CaptureReader(path) as r:
+        return sum(1 for _ in r.iter_records())
+
+def _capture_replay(path: str) -> int:
+    client = HyperliquidWS(state=MarketState(), cfg=HLConfig())
+    n = 0
+    with CaptureReader(path) as r:
+        for ch, payload in r.iter_records():
+            if isinstance(payload, bytes):
+                client.on_frame(payload)
+            else:
+                client.on_records(ch, payload)
+            n += 1
+    return n
+
+def _capture_seek(path: str, coin: str, lo: int, hi: int) -> int:
+    with CaptureReader(path) as r:
+        return sum(1 for _ in r.iter_records(coins=[coin], channels=["trades", "l2Book"], start_ms=lo, end_ms=hi))
+
+def _rate(fn, *args) -> float:
+    t0 = time.perf_counter()
+    n = fn(*args)
+    return n / (time.perf_counter() - t0)
+
+def _elapsed_ms(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1e3
+
+def run(n_coins: int = 20, messages: int = 100_000) -> dict:
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        src = write_ndjson(os.path.join(tmp, "cap.ndjson"), synth_coins(n_coins), messages)
+        out["ndjson"] = {"mb": os.path.getsize(src) / 1e6}
+        codecs = [c for c in CODECS if c != "zstd" or zstandard is not None]
+        for codec in codecs:
+            dest = os.path.join(tmp, f"cap.{codec}.hlcap")
+            convert_ndjson(src, dest, codec)
+            out[f"hlcap_{codec}"] = {"mb": os.path.getsize(dest) / 1e6}
+        with CaptureReader(dest) as r:
+            t0, t1 = r.time_range()
+        lo = t0 + (t1 - t0) // 2
+        hi = lo + (t1 - t0) // 10
+        coin = "BTC"
+
+        out["ndjson"]["decode_per_sec"] = _rate(_ndjson_decode, src)
+        out["ndjson"]["replay_per_sec"] = _rate(_ndjson_replay, src)
+        out["ndjson"]["seek_ms"] = _elapsed_ms(_ndjson_seek, src, coin, lo, hi)
+        for codec in codecs:
+            path = os.path.join(tmp, f"cap.{codec}.hlcap")
+            m = out[f"hlcap_{codec}"]
+            m["decode_per_sec"] = _rate(_capture_decode, path)
+            m["replay_per_sec"] = _rate(_capture_replay, path)
+            m["seek_ms"] = _elapsed_ms(_capture_seek, path, coin, lo, hi)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=20)
+    ap.add_argument("--messages", type=int, default=100_000)
+    args = ap.parse_args()
+    for name, m in run(args.coins, args.messages).items():
+        print(f"{name:>12}: {m['mb']:7.1f} MB   decode {m['decode_per_sec']:9.0f} msg/s   "
+              f"replay {m['replay_per_sec']:7.0f} msg/s   seek {m['seek_ms']:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
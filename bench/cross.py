@@ -0,0 +1,68 @@
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+
+from features.cross import CrossCoinCovariance, market_aggregate, top_eigen_share
+from ingestion.market_state import MarketState
+from tools.synth import synth_coins
+
+# Cost of the cross-coin covariance: per tick, per bucket close (the rolling cross-product update),
+# and per /v1/market read (correlation, PC1 share by warm-started power iteration vs eigvalsh,
+# betas, regime breadth), against recomputing the covariance from the window on every read.
+
+def run(n_coins: int = 150, window: int = 300, ticks: int = 200_000) -> dict:
+    coins = synth_coins(n_coins)
+    rng = np.random.default_rng(0)
+    cross = CrossCoinCovariance(bucket_ms=1_000, window=window)
+    state = MarketState()
+    for c in coins:
+        state.ensure_coin(c).update_book_top(99.99, 1.0, 100.01, 1.0, 0)
+    who = rng.integers(0, n_coins, ticks)
+    mids = 100.0 * np.exp(np.cumsum(rng.normal(0, 1e-4, ticks)))
+    per_bucket = 4 * n_coins  # ~4 ticks per coin per bucket
+    t0 = time.perf_counter()
+    for k in range(ticks):
+        cross.update(coins[who[k]], k * 1_000 // per_bucket, float(mids[k]))
+    per_tick_ns = (time.perf_counter() - t0) / ticks * 1e9
+
+    t0 = time.perf_counter()
+    for _ in range(200):
+        cross._close_bucket()
+    close_us = (time.perf_counter() - t0) / 200 * 1e6
+
+    def best(fn, repeat=20):
+        out = float("inf")
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            out = min(out, time.perf_counter() - t)
+        return out * 1e3
+
+    corr = cross.correlation()
+    _, v = top_eigen_share(corr)
+    ring = cross._ring[:, :n_coins]
+    return {
+        "coins": n_coins,
+        "buckets": cross.buckets,
+        "tick_ns": per_tick_ns,
+        "bucket_close_us": close_us,
+        "market_read_ms": best(lambda: market_aggregate(state, cross, v0=v)),
+        "pc1_power_warm_ms": best(lambda: top_eigen_share(corr, v)),
+        "pc1_eigvalsh_ms": best(lambda: np.linalg.eigvalsh(corr)),
+        "recompute_cov_ms": best(lambda: np.cov(ring.T, ddof=0)),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=150)
+    ap.add_argument("--window", type=int, default=300, help="Buckets (seconds) in the correlation window")
+    args = ap.parse_args()
+    r = run(args.coins, args.window)
+    print(f"coins: {r['coins']}   buckets: {r['buckets']}   tick {r['tick_ns']:.0f} ns   bucket close {r['bucket_close_us']:.0f} us")
+    print(f"/v1/market read {r['market_read_ms']:.2f} ms   (pc1: power iteration {r['pc1_power_warm_ms']:.3f} ms, "
+          f"eigvalsh {r['pc1_eigvalsh_ms']:.2f} ms; covariance recomputed from the window {r['recompute_cov_ms']:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
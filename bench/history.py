@@ -0,0 +1,80 @@
+from __future__ import annotations
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from history.store import COLUMNS, HistoryStore
+
+# Signal history store: append throughput, range / downsampled query latency, and disk use before
+# and after retention compaction. One row per coin per second of event time, appended in batches
+# as the writer thread does. Queries run against the page cache (files just written).
+
+def _batch(ts: np.ndarray, rng: np.random.Generator) -> dict:
+    rows = {name: rng.random(len(ts)).astype(dtype) for name, dtype in COLUMNS if dtype == "<f4"}
+    rows["ts"] = ts
+    rows["regime"] = rng.integers(0, 5, len(ts)).astype(np.uint8)
+    rows["explain"] = rng.integers(0, 256, len(ts)).astype(np.uint8)
+    return rows
+
+def _query_us(store: HistoryStore, coins, from_ms: int, to_ms: int, step_ms: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for c in coins:
+            store.query(c, from_ms, to_ms, step_ms)
+        best = min(best, (time.perf_counter() - t0) / len(coins))
+    return best * 1e6
+
+def run(coins: int = 10, hours: int = 48, batch: int = 600, repeat: int = 5) -> dict:
+    root = tempfile.mkdtemp(prefix="hl-history-")
+    try:
+        hour = 3_600_000
+        store = HistoryStore(root, retention_ms=36 * hour, compact_after_ms=12 * hour)
+        names = [f"C{i:03d}" for i in range(coins)]
+        rng = np.random.default_rng(0)
+        start = 1_710_000_000_000 // hour * hour
+        end = start + hours * hour
+        rows = 0
+        t0 = time.perf_counter()
+        for lo in range(start, end, batch * 1_000):
+            ts = np.arange(lo, min(lo + batch * 1_000, end), 1_000, dtype=np.int64)
+            for c in names:
+                rows += store.append(c, _batch(ts, rng))
+        store.flush()
+        write_s = time.perf_counter() - t0
+        last = end - 1_000
+        out = {
+            "coins": coins, "hours": hours, "rows": rows, "append_rows_per_s": rows / write_s,
+            "disk_mb": store.disk_bytes() / 1e6,
+            "query_1h_raw_us": _query_us(store, names, last - hour, last, 0, repeat),
+            "query_24h_1m_us": _query_us(store, names, last - 24 * hour, last, 60_000, repeat),
+            "query_10s_raw_us": _query_us(store, names, last - 10_000, last, 0, repeat),
+        }
+        t0 = time.perf_counter()
+        out["compact"] = store.compact()
+        out["compact_s"] = time.perf_counter() - t0
+        out["disk_mb_after_compact"] = store.disk_bytes() / 1e6
+        out["query_24h_1m_after_compact_us"] = _query_us(store, names, last - 24 * hour, last, 60_000, repeat)
+        return out
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=10)
+    ap.add_argument("--hours", type=int, default=48, help="Hours of 1s history per coin")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    r = run(args.coins, args.hours, repeat=args.repeat)
+    print(f"{r['rows']} rows ({r['coins']} coins x {r['hours']}h @ 1s): {r['append_rows_per_s']:.0f} rows/s appended, "
+          f"{r['disk_mb']:.1f} MB")
+    print(f"query per coin: 10s raw {r['query_10s_raw_us']:.0f} us, 1h raw {r['query_1h_raw_us']:.0f} us, "
+          f"24h @ 1m {r['query_24h_1m_us']:.0f} us")
+    print(f"compact (keep 36h, 1m rows past 12h): {r['compact']} in {r['compact_s']:.2f}s -> "
+          f"{r['disk_mb_after_compact']:.1f} MB; 24h @ 1m query {r['query_24h_1m_after_compact_us']:.0f} us")
+
+if __name__ == "__main__":
+    main()
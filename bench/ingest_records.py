@@ -0,0 +1,87 @@
+from __future__ import annotations
+import argparse
+import json
+import time
+from typing import List
+
+from ingestion.decode import get_loads, resolve_decoder
+from ingestion.market_state import CoinState
+from ingestion.messages import make_frame_decoders, msgspec
+from tools.synth import iter_synthetic
+
+# Per-message cost from raw trades / l2Book frame to state update: the previous path (decode to dicts,
+# then .get / float / str.lower per field) vs typed records (ingestion.messages).
+
+def _legacy_trades(cs: CoinState, loads, raw: str) -> None:
+    d = loads(raw)["data"]
+    buy = 0.0
+    sell = 0.0
+    for t in d:
+        sz = float(t.get("sz", 0.0))
+        side = str(t.get("side", "")).lower()
+        if side == "b" or side == "buy":
+            buy += sz
+        elif side == "s" or side == "sell" or side == "a":
+            sell += sz
+    denom = buy + sell
+    cs.last_trade_ms = int(d[0].get("time", 0))
+    cs.trade_imbalance.push((buy - sell) / denom if denom > 0 else 0.0)
+
+def _legacy_book(cs: CoinState, loads, raw: str) -> None:
+    d = loads(raw)["data"]
+    levels = d.get("levels", [[], []])
+    bids = levels[0] if len(levels) > 0 else []
+    asks = levels[1] if len(levels) > 1 else []
+    if bids and asks:
+        bid = bids[0]
+        ask = asks[0]
+        bid_px, bid_sz = float(bid.get("px", 0.0)), float(bid.get("sz", 0.0))
+        ask_px, ask_sz = float(ask.get("px", 0.0)), float(ask.get("sz", 0.0))
+        cs.update_book_top(bid_px, bid_sz, ask_px, ask_sz, int(d.get("time", 0)))
+
+def _typed_trades(cs: CoinState, decode, raw: str) -> None:
+    trades = decode(raw)
+    cs.update_trades(trades, trades[0].time)
+
+def _typed_book(cs: CoinState, decode, raw: str) -> None:
+    u = decode(raw)
+    bid, ask = u.bids[0], u.asks[0]
+    cs.update_book_top(bid.px, bid.sz, ask.px, ask.sz, u.time)
+
+def _ns_per_op(fn, arg, frames: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        cs = CoinState(coin="X")
+        t0 = time.perf_counter_ns()
+        for raw in frames:
+            fn(cs, arg, raw)
+        best = min(best, (time.perf_counter_ns() - t0) / len(frames))
+    return best
+
+def run(messages: int = 100_000, repeat: int = 5, decoder: str = "auto") -> dict:
+    frames = [json.dumps(m, separators=(",", ":")) for m in iter_synthetic(["BTC", "ETH"], messages)]
+    trades = [f for f in frames if f.startswith('{"channel":"trades"')]
+    books = [f for f in frames if f.startswith('{"channel":"l2Book"')]
+    loads = get_loads(decoder)
+    decoders = make_frame_decoders(loads, lambda: 0)
+    return {
+        "decoder": resolve_decoder(decoder),
+        "typed": "msgspec" if msgspec is not None else "hand-rolled",
+        "trades_legacy_ns": _ns_per_op(_legacy_trades, loads, trades, repeat),
+        "trades_typed_ns": _ns_per_op(_typed_trades, decoders["trades"], trades, repeat),
+        "book_legacy_ns": _ns_per_op(_legacy_book, loads, books, repeat),
+        "book_typed_ns": _ns_per_op(_typed_book, decoders["l2Book"], books, repeat),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=100_000)
+    ap.add_argument("--decoder", default="auto", help="JSON decoder used by the dict path")
+    args = ap.parse_args()
+    r = run(args.messages, decoder=args.decoder)
+    print(f"dict path decoder: {r['decoder']}   typed records: {r['typed']}")
+    print(f"trades : dicts {r['trades_legacy_ns']:7.0f} ns/msg   typed {r['trades_typed_ns']:7.0f} ns/msg")
+    print(f"l2Book : dicts {r['book_legacy_ns']:7.0f} ns/msg   typed {r['book_typed_ns']:7.0f} ns/msg")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from features.compute import summarize_features
+from ingestion.market_state import CoinState
+from ingestion.messages import Level
+
+# Cost of maintaining full-depth book features on ingest (per l2Book update) and of reading them
+# (summarize_features, i.e. the per-request path) across a universe of coins.
+
+def _snapshots(n: int, levels: int, price_move_prob: float, size_changes: int, seed: int = 0):
+    # Each snapshot resizes `size_changes` random levels per side; with probability price_move_prob
+    # the whole book shifts by one tick (which rebuilds both sides).
+    rnd = random.Random(seed)
+    mid = 100.0
+    bid_sz = [rnd.uniform(0.1, 10.0) for _ in range(levels)]
+    ask_sz = [rnd.uniform(0.1, 10.0) for _ in range(levels)]
+    out = []
+    for _ in range(n):
+        if rnd.random() < price_move_prob:
+            mid += rnd.choice((-0.01, 0.01))
+        for _ in range(size_changes):
+            bid_sz[rnd.randrange(levels)] = rnd.uniform(0.1, 10.0)
+            ask_sz[rnd.randrange(levels)] = rnd.uniform(0.1, 10.0)
+        bids = [Level(px=round(mid - 0.01 * (k + 1), 2), sz=bid_sz[k]) for k in range(levels)]
+        asks = [Level(px=round(mid + 0.01 * (k + 1), 2), sz=ask_sz[k]) for k in range(levels)]
+        out.append((bids, asks))
+    return out
+
+def run(coins: int = 100, levels: int = 20, updates: int = 20_000) -> dict:
+    out = {}
+    scenarios = (
+        ("2_sizes_change", 0.0, 2),
+        ("all_sizes_change", 0.0, levels),
+        ("price_moves_20pct", 0.2, 2),
+        ("price_moves_always", 1.0, 2),
+    )
+    for label, move, changes in scenarios:
+        snaps = _snapshots(updates, levels, move, changes)
+        cs = CoinState(coin="X")
+        t0 = time.perf_counter_ns()
+        for bids, asks in snaps:
+            cs.book.apply(bids, asks)
+        out[f"book_apply_{label}_ns"] = (time.perf_counter_ns() - t0) / updates
+
+    states = [CoinState(coin=f"C{i}") for i in range(coins)]
+    for cs, (bids, asks) in zip(states, _snapshots(coins, levels, 0.5, 2)):
+        cs.book.apply(bids, asks)
+    t0 = time.perf_counter_ns()
+    for _ in range(100):
+        for cs in states:
+            summarize_features(cs)
+    out["summarize_features_ns"] = (time.perf_counter_ns() - t0) / (100 * coins)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=100)
+    ap.add_argument("--levels", type=int, default=20)
+    ap.add_argument("--updates", type=int, default=20_000)
+    args = ap.parse_args()
+    for k, v in run(args.coins, args.levels, args.updates).items():
+        print(f"{k:>36}: {v:8.0f} ns")
+
+if __name__ == "__main__":
+    main()
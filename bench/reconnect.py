@@ -0,0 +1,69 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import threading
+import time
+from typing import Callable, List
+
+from config import HLConfig
+from ingestion.market_state import MarketState
+from ingestion.pool import ConnectionPool
+from tools.fake_ws import start_in_thread
+
+# Recovery after every connection drops at once (tools.fake_ws.drop_all, an abort without a close
+# handshake): time until all connections have resubscribed, and until every coin has taken a fresh
+# update. The stand-in server runs in this process, so it competes with the client for the GIL;
+# on a real network add one round trip per connection.
+
+def _wait(cond: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and not cond():
+        time.sleep(0.005)
+    return cond()
+
+def measure(coins: List[str], connections: int, rate: float, drops: int) -> dict:
+    url, fake, stop = start_in_thread(rate=rate, levels=5)
+    state = MarketState()
+    pool = ConnectionPool(state, HLConfig(ws_url=url), connections=connections)
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_until_complete, args=(pool.connect_and_run(coins),), daemon=True)
+    t.start()
+    resub, fresh = [], []
+    try:
+        if not _wait(lambda: state.ws_connected and len(state.coins) == len(coins), 60.0):
+            raise RuntimeError("pool did not come up")
+        for k in range(2, drops + 2):
+            time.sleep(0.5)
+            t0 = time.perf_counter()
+            fake.drop_all()
+            _wait(lambda: all(c.connects == k for c in pool.clients) and state.ws_connected, 60.0)
+            resub.append(time.perf_counter() - t0)
+            versions = {c: cs.version for c, cs in state.coins.items()}
+            _wait(lambda: all(state.coins[c].version > v for c, v in versions.items()), 60.0)
+            fresh.append(time.perf_counter() - t0)
+    finally:
+        asyncio.run_coroutine_threadsafe(pool.stop(), loop)
+        t.join(10)
+        stop()
+    return {"connections": connections, "resubscribed_sec": min(resub), "all_fresh_sec": min(fresh),
+            "all_fresh_max_sec": max(fresh)}
+
+def run(coins: int = 200, connections=(1, 4), rate: float = 2000.0, drops: int = 3) -> List[dict]:
+    names = [f"C{i:03d}" for i in range(coins)]
+    return [measure(names, n, rate, drops) for n in connections]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=200)
+    ap.add_argument("--connections", default="1,4", help="Comma-separated pool sizes to compare")
+    ap.add_argument("--rate", type=float, default=2000.0, help="Stand-in server messages/s per connection")
+    ap.add_argument("--drops", type=int, default=3)
+    args = ap.parse_args()
+    sizes = tuple(int(x) for x in args.connections.split(","))
+    print(f"{args.coins} coins, {args.rate:g} msg/s per connection, best of {args.drops} drops")
+    for r in run(args.coins, sizes, args.rate, args.drops):
+        print(f"connections={r['connections']:<3d} resubscribed {r['resubscribed_sec'] * 1e3:7.0f} ms   "
+              f"all coins fresh {r['all_fresh_sec'] * 1e3:7.0f} ms (worst {r['all_fresh_max_sec'] * 1e3:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from api.snapshot import SnapshotCache
+from config import HLConfig
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from ingestion.sharded import ShardedIngest
+from tools.synth import synth_coins
+
+# Ingest throughput and API-side read latency while ingesting, against unthrottled local fake WS
+# servers (tools.fake_ws, run as separate processes): in-process ingestion (a WS client thread
+# competing with the reader for the GIL) vs N worker processes publishing into shared memory.
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_fake(rate: float) -> tuple:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tools.fake_ws", "--port", str(port), "--rate", str(rate)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return proc, f"ws://127.0.0.1:{port}"
+
+def _read_latency(cache: SnapshotCache, coins: List[str], seconds: float) -> np.ndarray:
+    # lazy cache over a constantly changing coin: most reads recompute, like a poller hitting live data
+    lat = []
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter_ns()
+        cache.get(coins[i % len(coins)])
+        lat.append(time.perf_counter_ns() - t0)
+        i += 1
+        time.sleep(0.001)
+    return np.array(lat, dtype=np.float64)
+
+def _summary(updates: int, seconds: float, lat: np.ndarray) -> dict:
+    return {
+        "updates_per_sec": updates / seconds,
+        "read_p50_us": float(np.percentile(lat, 50)) / 1e3 if len(lat) else 0.0,
+        "read_p99_us": float(np.percentile(lat, 99)) / 1e3 if len(lat) else 0.0,
+    }
+
+def run_inprocess(coins: List[str], url: str, seconds: float) -> dict:
+    state = MarketState()
+    cache = SnapshotCache(state)
+    updates = [0]
+    state.add_listener(lambda cs: updates.__setitem__(0, updates[0] + 1))
+    client = HyperliquidWS(state=state, cfg=HLConfig(ws_url=url))
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_until_complete, args=(client.connect_and_run(coins),), daemon=True)
+    t.start()
+    while len(state.coins) < len(coins):
+        time.sleep(0.05)
+    u0 = updates[0]
+    lat = _read_latency(cache, coins, seconds)
+    out = _summary(updates[0] - u0, seconds, lat)
+    # don't wait for a close handshake behind a flooding server: set the stop flag and drop the socket
+    loop.call_soon_threadsafe(client._stop.set)
+    loop.call_soon_threadsafe(lambda: client._ws.transport.abort())
+    t.join(10)
+    return out
+
+def run_sharded(coins: List[str], url: str, workers: int, seconds: float) -> dict:
+    ingest = ShardedIngest(coins, workers, HLConfig(ws_url=url))
+    cache = SnapshotCache(ingest.source)
+    try:
+        ingest.start()
+        while len(ingest.source.coins()) < len(coins):
+            time.sleep(0.05)
+        u0 = sum(w["updates"] for w in ingest.table.workers())
+        lat = _read_latency(cache, coins, seconds)
+        time.sleep(0.6)  # workers report their counters every 0.5 s
+        return _summary(sum(w["updates"] for w in ingest.table.workers()) - u0, seconds + 0.6, lat)
+    finally:
+        ingest.stop()
+
+def run(n_coins: int = 120, workers: List[int] = (1, 2, 4), seconds: float = 5.0) -> dict:
+    coins = synth_coins(n_coins)
+    fake, url = _start_fake(rate=0)
+    try:
+        out = {"cpus": os.cpu_count(), "in_process": run_inprocess(coins, url, seconds)}
+        for n in workers:
+            out[f"workers_{n}"] = run_sharded(coins, url, n, seconds)
+        return out
+    finally:
+        fake.terminate()
+        fake.wait()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=120)
+    ap.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to try")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+    r = run(args.coins, [int(w) for w in args.workers.split(",")], args.seconds)
+    print(f"cpus: {r.pop('cpus')}")
+    for mode, m in r.items():
+        print(f"{mode:>12}: {m['updates_per_sec']:9.0f} updates/s   read p50 {m['read_p50_us']:7.1f} us   p99 {m['read_p99_us']:8.1f} us")
+
+if __name__ == "__main__":
+    main()
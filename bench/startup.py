@@ -0,0 +1,132 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Startup cost of the entry points, each in a fresh interpreter (best of --repeat runs):
+#   startup.import.<module>   cumulative import time of the module, from `python -X importtime`, us
+#   startup.create_app        importing api.server and building the app (FastAPI, schemas, state), ms
+#   startup.cli_help.<module> wall time of `python -m <module> --help`, interpreter start included, ms
+#   startup.interpreter       wall time of `python -c pass`, the floor under the CLI numbers, ms
+# Results use the bench.suite JSON layout, so --out / --compare gate them the same way. --top N
+# prints the heaviest imports under each module (by cumulative time) to see what to make lazy.
+
+IMPORTS = ("api.server", "tools.replay", "tools.recorder", "tools.capture", "tools.synth",
+           "ingestion.sharded", "ingestion.hyperliquid_ws")
+CLIS = ("api.server", "tools.recorder", "tools.synth", "tools.capture")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    # (module, depth, self us, cumulative us) per `-X importtime` line, in the order printed
+    # (a module's line follows the lines of everything it imported)
+    out = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            out.append((m.group(4), len(m.group(3)) // 2, int(m.group(1)), int(m.group(2))))
+    return out
+
+def _python(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable] + args, cwd=_ROOT, env=env, capture_output=True, text=True, check=True)
+
+def import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    return parse_importtime(_python(["-X", "importtime", "-c", f"import {module}"]).stderr)
+
+def import_us(module: str, repeat: int) -> Tuple[int, List[Tuple[str, int, int, int]]]:
+    # best cumulative time of the module's own line, and the profile of that run
+    best, best_rows = None, []
+    for _ in range(repeat):
+        rows = import_profile(module)
+        us = next(cum for name, depth, _, cum in rows if name == module and depth == 0)
+        if best is None or us < best:
+            best, best_rows = us, rows
+    return best, best_rows
+
+def heaviest(rows: List[Tuple[str, int, int, int]], module: str, n: int) -> List[Tuple[str, int]]:
+    # the direct imports under `module` (depth 1 lines between the previous top-level line and its own)
+    end = next(i for i, r in enumerate(rows) if r[0] == module and r[1] == 0)
+    start = max((i for i in range(end) if rows[i][1] == 0), default=-1) + 1
+    children = [(name, cum) for name, depth, _, cum in rows[start:end] if depth == 1]
+    return sorted(children, key=lambda r: -r[1])[:n]
+
+def _wall_ms(args: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _python(args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+def create_app_ms(repeat: int) -> float:
+    code = ("import time; t0 = time.perf_counter(); from api.server import create_app; create_app(); "
+            "print(time.perf_counter() - t0)")
+    return min(float(_python(["-c", code]).stdout) for _ in range(repeat)) * 1e3
+
+def run(repeat: int = 5, top: int = 0) -> dict:
+    from bench.suite import _metric
+
+    metrics: Dict[str, dict] = {}
+    report: Dict[str, List[Tuple[str, int]]] = {}
+    for module in IMPORTS:
+        us, rows = import_us(module, repeat)
+        metrics[f"startup.import.{module}"] = _metric(us, "us", "lower")
+        if top:
+            report[module] = heaviest(rows, module, top)
+    metrics["startup.create_app"] = _metric(create_app_ms(repeat), "ms", "lower")
+    for module in CLIS:
+        metrics[f"startup.cli_help.{module}"] = _metric(_wall_ms(["-m", module, "--help"], repeat), "ms", "lower")
+    metrics["startup.interpreter"] = _metric(_wall_ms(["-c", "pass"], repeat), "ms", "lower")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "metrics": metrics,
+        "heaviest": report,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Import / startup time of the API and tools, with regression gating")
+    ap.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (best is kept)")
+    ap.add_argument("--top", type=int, default=0, help="Also list the N heaviest direct imports of each module")
+    ap.add_argument("--out", default=None, help="Write results as JSON")
+    ap.add_argument("--compare", default=None, help="Previous results JSON; exit 1 if any metric regressed")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default 0.25)")
+    args = ap.parse_args()
+
+    result = run(args.repeat, args.top)
+    for name, m in sorted(result["metrics"].items()):
+        print(f"{name:40s} {m['value']:12.1f} {m['unit']}")
+    for module, rows in result["heaviest"].items():
+        print(f"\n{module}: " + ", ".join(f"{name} {us / 1e3:.1f} ms" for name, us in rows))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.compare:
+        from bench.suite import compare
+
+        with open(args.compare) as f:
+            base = json.load(f)
+        rows, regressions = compare(base, result, args.threshold)
+        print(f"\nvs {args.compare} (threshold {args.threshold:.0%}):")
+        for r in rows:
+            flag = "  REGRESSED" if r["regressed"] else ""
+            print(f"{r['metric']:40s} {r['base']:12.1f} -> {r['new']:12.1f} {r['unit']:4s} {r['change']:+7.1%}{flag}")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed past {args.threshold:.0%}")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.snapshot import SnapshotCache
+from config import HLConfig
+from features.compute import summarize_features
+from features.universe import universe_features, universe_scores
+from ingestion.decode import get_loads, peek_channel
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import CoinState, MarketState
+from ingestion.messages import Side, Trade
+from tools.synth import synth_coins, write_ndjson
+
+# Hot-path benchmark suite with machine-readable results and regression gating:
+#   ingest.on_frame.<channel>   raw frame -> state (live path), msg/s per channel
+#   ingest.dispatch.<channel>   decoded message -> state (HyperliquidWS._handle_msg / NDJSON replay), msg/s
+#   state.update_book_top / state.update_trades   ns/op
+#   features.summarize@<N>      summarize_features for one coin of an N-coin universe, ns/op
+#   signal.recompute@<N> / signal.cached@<N>       the /v1/signal path (SnapshotCache) after a change / unchanged, ns/op
+#   universe.pass@<N>           features + regime + edge for all N coins in one vectorized pass, us
+#   http.signal / http.signals_all                 coin-reads/s against an in-process replay-fed server
+# Every timing is the best of several passes. --out writes JSON; --compare gates against a previous run.
+
+Metric = Dict[str, object]
+
+def _metric(value: float, unit: str, better: str) -> Metric:
+    return {"value": float(value), "unit": unit, "better": better}
+
+def _best(fn: Callable[[], float], repeat: int) -> float:
+    return min(fn() for _ in range(repeat))
+
+def load_frames(path: str) -> List[bytes]:
+    with open(path, "rb") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _by_channel(frames: List[bytes]) -> Dict[str, List[bytes]]:
+    loads = get_loads("auto")
+    out: Dict[str, List[bytes]] = defaultdict(list)
+    for raw in frames:
+        ch = peek_channel(raw)
+        out[ch if ch is not None else loads(raw).get("channel")].append(raw)
+    return out
+
+def bench_ingest(frames: List[bytes], repeat: int) -> Dict[str, Metric]:
+    # per channel, in capture order through a fresh client each pass (book state builds as it would live)
+    out: Dict[str, Metric] = {}
+    loads = get_loads("auto")
+    for ch, group in sorted(_by_channel(frames).items()):
+        if ch not in ("trades", "l2Book", "candle", "activeAssetCtx"):
+            continue
+        decoded = [loads(raw) for raw in group]
+
+        def on_frame() -> float:
+            client = HyperliquidWS(MarketState(), HLConfig())
+            t0 = time.perf_counter()
+            for raw in group:
+                client.on_frame(raw)
+            return time.perf_counter() - t0
+
+        def dispatch() -> float:
+            client = HyperliquidWS(MarketState(), HLConfig())
+            t0 = time.perf_counter()
+            for m in decoded:
+                client._dispatch(m)
+            return time.perf_counter() - t0
+
+        out[f"ingest.on_frame.{ch}"] = _metric(len(group) / _best(on_frame, repeat), "msg/s", "higher")
+        out[f"ingest.dispatch.{ch}"] = _metric(len(decoded) / _best(dispatch, repeat), "msg/s", "higher")
+    return out
+
+def bench_state(repeat: int, ops: int = 100_000) -> Dict[str, Metric]:
+    rng = np.random.default_rng(0)
+    mids = (100.0 + np.cumsum(rng.normal(0, 0.01, ops))).tolist()
+    sizes = rng.uniform(0.1, 5.0, (ops, 2)).tolist()
+    trades = [[Trade(px=100.0, sz=s, side=Side.BUY if i % 2 else Side.SELL, time=i, coin="X")
+               for i, s in enumerate(rng.uniform(0.1, 2.0, 3).tolist())] for _ in range(1024)]
+
+    def book() -> float:
+        cs = CoinState(coin="X")
+        t0 = time.perf_counter_ns()
+        for i, (mid, (bs, az)) in enumerate(zip(mids, sizes)):
+            cs.update_book_top(mid - 0.01, bs, mid + 0.01, az, i)
+        return (time.perf_counter_ns() - t0) / ops
+
+    def trade() -> float:
+        cs = CoinState(coin="X")
+        t0 = time.perf_counter_ns()
+        for i in range(ops):
+            cs.update_trades(trades[i & 1023], i)
+        return (time.perf_counter_ns() - t0) / ops
+
+    return {
+        "state.update_book_top": _metric(_best(book, repeat), "ns/op", "lower"),
+        "state.update_trades": _metric(_best(trade, repeat), "ns/op", "lower"),
+    }
+
+def _fed_state(n_coins: int, messages: int, tmp: str) -> MarketState:
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    for raw in load_frames(write_ndjson(os.path.join(tmp, f"u{n_coins}.ndjson"), synth_coins(n_coins), messages, seed=n_coins)):
+        client.on_frame(raw)
+    return state
+
+def bench_universe(sizes: Tuple[int, ...], repeat: int, tmp: str) -> Dict[str, Metric]:
+    out: Dict[str, Metric] = {}
+    for n in sizes:
+        state = _fed_state(n, max(2_000, 60 * n), tmp)
+        css = list(state.coins.values())
+        reps = max(1, 20_000 // len(css))
+
+        def summarize() -> float:
+            t0 = time.perf_counter_ns()
+            for _ in range(reps):
+                for cs in css:
+                    summarize_features(cs)
+            return (time.perf_counter_ns() - t0) / (reps * len(css))
+
+        cache = SnapshotCache(state)
+
+        def recompute() -> float:
+            # bump every coin's version so each read recomputes, as after fresh data
+            for cs in css:
+                cs.version += 1
+            t0 = time.perf_counter_ns()
+            for cs in css:
+                cache.get(cs.coin)
+            return (time.perf_counter_ns() - t0) / len(css)
+
+        def cached() -> float:
+            t0 = time.perf_counter_ns()
+            for _ in range(reps):
+                for cs in css:
+                    cache.get(cs.coin)
+            return (time.perf_counter_ns() - t0) / (reps * len(css))
+
+        def universe() -> float:
+            t0 = time.perf_counter_ns()
+            universe_scores(universe_features(state))
+            return (time.perf_counter_ns() - t0) / 1e3
+
+        out[f"features.summarize@{n}"] = _metric(_best(summarize, repeat), "ns/op", "lower")
+        out[f"signal.recompute@{n}"] = _metric(_best(recompute, repeat), "ns/op", "lower")
+        out[f"signal.cached@{n}"] = _metric(_best(cached, repeat), "ns/op", "lower")
+        out[f"universe.pass@{n}"] = _metric(_best(universe, repeat), "us", "lower")
+    return out
+
+def bench_http(n_coins: int, messages: int, seconds: float, tmp: str) -> Dict[str, Metric]:
+    # an in-process server replaying a synthetic capture (api.server.create_app)
+    from bench.api_load import _hammer, start_replay_server
+
+    coins = synth_coins(n_coins)
+    capture = write_ndjson(os.path.join(tmp, "http.ndjson"), coins, messages)
+    server, thread, base = start_replay_server(capture, coins)
+    try:
+        per_coin = asyncio.run(_hammer([f"{base}/v1/signal/{c}" for c in coins], 1, seconds, 16))
+        batch = asyncio.run(_hammer([f"{base}/v1/signals?coins=all"], n_coins, seconds, 16))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+    return {
+        "http.signal": _metric(per_coin, "coin-reads/s", "higher"),
+        "http.signals_all": _metric(batch, "coin-reads/s", "higher"),
+    }
+
+def run(capture: Optional[str] = None, quick: bool = False, http: bool = True, only: Optional[str] = None) -> dict:
+    repeat = 3 if quick else 5
+    sizes = (1, 50) if quick else (1, 50, 500)
+    metrics: Dict[str, Metric] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if capture is None:
+            path = write_ndjson(os.path.join(tmp, "suite.ndjson"), synth_coins(20), 20_000 if quick else 100_000)
+        else:
+            path = capture
+        groups = {
+            "ingest": lambda: bench_ingest(load_frames(path), repeat),
+            "state": lambda: bench_state(repeat, 20_000 if quick else 100_000),
+            "features": lambda: bench_universe(sizes, repeat, tmp),
+            "http": lambda: bench_http(20 if quick else 150, 10_000 if quick else 50_000, 1.0 if quick else 3.0, tmp),
+        }
+        for name, fn in groups.items():
+            if (name == "http" and not http) or (only and not name.startswith(only)):
+                continue
+            metrics.update(fn())
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "capture": capture or "synthetic",
+            "quick": quick,
+        },
+        "metrics": metrics,
+    }
+
+def compare(base: dict, new: dict, threshold: float = 0.10) -> Tuple[List[dict], List[dict]]:
+    # (rows for every metric in both runs, the rows that regressed by more than threshold)
+    rows, regressions = [], []
+    for name, m in sorted(new["metrics"].items()):
+        b = base["metrics"].get(name)
+        if b is None or not b["value"]:
+            continue
+        change = m["value"] / b["value"] - 1.0
+        worse = -change if m["better"] == "higher" else change  # > 0: worse
+        row = {"metric": name, "base": b["value"], "new": m["value"], "unit": m["unit"], "change": change,
+               "regressed": worse > threshold}
+        rows.append(row)
+        if row["regressed"]:
+            regressions.append(row)
+    return rows, regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Hot-path benchmark suite with JSON output and regression gating")
+    ap.add_argument("--capture", default=None, help="NDJSON capture for the ingest benchmarks (default: synthetic)")
+    ap.add_argument("--out", default=None, help="Write results as JSON")
+    ap.add_argument("--compare", default=None, help="Previous results JSON; exit 1 if any metric regressed")
+    ap.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression (default 0.10)")
+    ap.add_argument("--quick", action="store_true", help="Smaller inputs and fewer passes")
+    ap.add_argument("--no-http", action="store_true", help="Skip the HTTP throughput benchmark")
+    ap.add_argument("--only", default=None, choices=("ingest", "state", "features", "http"))
+    args = ap.parse_args()
+
+    result = run(args.capture, args.quick, not args.no_http, args.only)
+    for name, m in sorted(result["metrics"].items()):
+        print(f"{name:32s} {m['value']:14.1f} {m['unit']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        rows, regressions = compare(base, result, args.threshold)
+        print(f"\nvs {args.compare} (threshold {args.threshold:.0%}):")
+        for r in rows:
+            flag = "  REGRESSED" if r["regressed"] else ""
+            print(f"{r['metric']:32s} {r['base']:14.1f} -> {r['new']:14.1f} {r['unit']:12s} {r['change']:+7.1%}{flag}")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed past {args.threshold:.0%}")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
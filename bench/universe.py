@@ -0,0 +1,73 @@
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+
+from api.schemas import Signals
+from config import HLConfig
+from features.compute import summarize_features
+from features.universe import universe_features, universe_scores
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from models.regime import classify_regime
+from scoring.edge_score import score_edge
+from tools.synth import synth_coins, write_ndjson
+
+# Recomputing features + regime + edge score for every coin: one summarize_features /
+# classify_regime / score_edge call per coin vs one vectorized universe pass.
+
+def _state(n_coins: int, messages: int) -> MarketState:
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_ndjson(os.path.join(tmp, "u.ndjson"), synth_coins(n_coins), messages)
+        with open(path, "rb") as f:
+            for line in f:
+                client.on_frame(line)
+    return state
+
+def _per_coin(state: MarketState, horizon) -> None:
+    for cs in state.coins.values():
+        f = summarize_features(cs, horizon)
+        regime = classify_regime(f["ret_std"], f["spread_mean"], f["trade_imb_std"], f["mom_raw"], horizon)
+        score_edge(regime, Signals(momentum=f["mom_01"], liquidity=f["liq_01"], risk=f["risk_01"]))
+
+def _universe(state: MarketState, horizon) -> None:
+    universe_scores(universe_features(state, horizon))
+
+def _us(fn, *args, repeat: int = 200) -> float:
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(*args)
+        best = min(best, (time.perf_counter() - t0) / repeat)
+    return best * 1e6
+
+def run(n_coins: int = 200, messages: int = 100_000) -> dict:
+    state = _state(n_coins, messages)
+    out = {"coins": len(state.coins)}
+    for horizon in (None, "60s"):
+        label = horizon or "count"
+        per_coin = _us(_per_coin, state, horizon, repeat=20)
+        out[label] = {
+            "per_coin_us": per_coin,
+            "universe_us": _us(_universe, state, horizon),
+            "one_coin_us": per_coin / len(state.coins),
+        }
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", type=int, default=200)
+    ap.add_argument("--messages", type=int, default=100_000)
+    args = ap.parse_args()
+    r = run(args.coins, args.messages)
+    print(f"coins: {r.pop('coins')}")
+    for label, m in r.items():
+        print(f"{label:>6}: per-coin loop {m['per_coin_us']:8.0f} us   universe pass {m['universe_us']:6.0f} us   "
+              f"(= {m['universe_us'] / m['one_coin_us']:.0f} per-coin calls)")
+
+if __name__ == "__main__":
+    main()
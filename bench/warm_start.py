@@ -0,0 +1,121 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from config import HLConfig
+from features.compute import summarize_features
+from ingestion.checkpoint import load_checkpoint, snapshot_state, write_checkpoint
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import TIMED_SERIES, WINDOW_LEN, CoinState, MarketState
+from tools.replay import catch_up
+from tools.synth import iter_synthetic, synth_coins
+
+# Time to valid signals after a restart, cold vs warm. A coin's signal counts as valid once its
+# count-based windows are full (WINDOW_LEN samples each), i.e. summarize_features reads a full window.
+# The feed is synthetic with Zipf-like activity across coins (a few liquid, a long illiquid tail), fed
+# as fast as possible; the cold start is reported in event time, which is how long a live feed at
+# this rate takes. The warm start restores a checkpoint taken once every coin was valid, replays the
+# gap (a recording of the feed since the checkpoint) and checks the result matches the state that
+# never restarted, exactly.
+
+def _valid(cs: CoinState) -> bool:
+    return all(len(getattr(cs, name)) >= WINDOW_LEN for name in TIMED_SERIES)
+
+def _signature(state: MarketState) -> str:
+    return repr({c: (summarize_features(cs), cs.book.features, cs.ctx_features, cs._prev_mid)
+                 for c, cs in sorted(state.coins.items())})
+
+def _feed_coins(coins: List[str], liquid: int) -> List[str]:
+    # activity weights by repetition: coin i appears ~liquid / (i + 1) times (at least once)
+    return [c for i, c in enumerate(coins) for _ in range(max(1, round(liquid / (i + 1))))]
+
+def run(n_coins: int = 200, liquid: int = 20, gap_msgs: int = 5_000, step_ms: int = 50, seed: int = 0) -> dict:
+    coins = synth_coins(n_coins)
+    frames = (json.dumps(m, separators=(",", ":")) for m in
+              iter_synthetic(_feed_coins(coins, liquid), 10_000_000, seed=seed, step_ms=step_ms, levels=20))
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    pending = set(coins)
+    first_ms = 0
+    valid_ms: List[int] = []
+
+    def on_update(cs: CoinState) -> None:
+        if cs.coin in pending and _valid(cs):
+            pending.discard(cs.coin)
+            valid_ms.append(max(cs.last_trade_ms, cs.last_book_ms) - first_ms)
+
+    state.add_listener(on_update)
+    msgs = 0
+    t0 = time.perf_counter()
+    for raw in frames:
+        client.on_frame(raw)
+        msgs += 1
+        if not first_ms and state.coins:
+            first_ms = min(max(cs.last_trade_ms, cs.last_book_ms) for cs in state.coins.values())
+        if not pending:
+            break
+    cold_wall = time.perf_counter() - t0
+    state.listeners.remove(on_update)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.ckpt")
+        t0 = time.perf_counter()
+        arrays = snapshot_state(state)
+        copy_s = time.perf_counter() - t0
+        size = write_checkpoint(arrays, path)
+        write_s = time.perf_counter() - t0 - copy_s
+
+        # the process goes down; the recorder (another instance, or the previous run's --record) keeps
+        # the feed, so the recording overlaps the checkpoint a little
+        gap = [next(frames) for _ in range(gap_msgs)]
+        recording = os.path.join(tmp, "gap.ndjson")
+        with open(recording, "w") as f:
+            f.write("\n".join(gap) + "\n")
+        for raw in gap:
+            client.on_frame(raw)
+
+        t0 = time.perf_counter()
+        restored, _ = load_checkpoint(path)
+        load_s = time.perf_counter() - t0
+        got = catch_up(restored, [recording])
+        warm_s = time.perf_counter() - t0
+        return {
+            "coins": n_coins,
+            "cold_msgs": msgs,
+            "cold_first_valid_s": valid_ms[0] / 1e3,
+            "cold_median_valid_s": sorted(valid_ms)[len(valid_ms) // 2] / 1e3,
+            "cold_all_valid_s": valid_ms[-1] / 1e3,
+            "cold_replay_wall_s": cold_wall,
+            "checkpoint_mb": size / 1e6,
+            "checkpoint_copy_ms": copy_s * 1e3,
+            "checkpoint_write_ms": write_s * 1e3,
+            "warm_load_ms": load_s * 1e3,
+            "warm_catchup_records": got["applied"],
+            "warm_total_ms": warm_s * 1e3,
+            "warm_valid_coins": sum(_valid(cs) for cs in restored.coins.values()),
+            "warm_matches_uninterrupted": _signature(restored) == _signature(state),
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="Time to valid signals after a restart: cold start vs checkpoint + catch-up")
+    ap.add_argument("--coins", type=int, default=200)
+    ap.add_argument("--liquid", type=int, default=20, help="Activity of the most active coin relative to the tail")
+    ap.add_argument("--gap", type=int, default=5_000, help="Messages recorded while the process was down")
+    ap.add_argument("--step-ms", type=int, default=50, help="Max event-time step between synthetic messages")
+    args = ap.parse_args()
+    r = run(args.coins, args.liquid, args.gap, args.step_ms)
+    print(f"cold start, {r['coins']} coins: first coin valid after {r['cold_first_valid_s']:.0f}s, median "
+          f"{r['cold_median_valid_s']:.0f}s, all after {r['cold_all_valid_s']:.0f}s of feed "
+          f"({r['cold_msgs']} msgs; {r['cold_replay_wall_s']:.1f}s to replay them flat out)")
+    print(f"checkpoint: {r['checkpoint_mb']:.1f} MB, {r['checkpoint_copy_ms']:.1f} ms copy on the loop + "
+          f"{r['checkpoint_write_ms']:.1f} ms write off it")
+    print(f"warm start: load {r['warm_load_ms']:.0f} ms + catch-up of {r['warm_catchup_records']} records = "
+          f"{r['warm_total_ms']:.0f} ms; {r['warm_valid_coins']}/{r['coins']} coins valid, "
+          f"matches uninterrupted state: {r['warm_matches_uninterrupted']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+import time
+from dataclasses import replace
+from typing import List
+
+from config import HLConfig
+from ingestion.decode import DECODER_NAMES, resolve_decoder
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from tools.synth import synth_coins, write_ndjson
+
+# Frame decode + dispatch throughput over an NDJSON capture (raw frames exactly as the socket delivers them).
+# "baseline" is the previous ingest path: stdlib json.loads on every frame, then dispatch.
+
+def load_frames(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _baseline(frames: List[str]) -> float:
+    client = HyperliquidWS(MarketState(), replace(HLConfig(), decoder="json"))
+    t0 = time.perf_counter()
+    for raw in frames:
+        client._dispatch(json.loads(raw))
+    return len(frames) / (time.perf_counter() - t0)
+
+def _fast(frames: List[str], decoder: str) -> float:
+    client = HyperliquidWS(MarketState(), replace(HLConfig(), decoder=decoder))
+    t0 = time.perf_counter()
+    for raw in frames:
+        client.on_frame(raw)
+    return len(frames) / (time.perf_counter() - t0)
+
+def run(frames: List[str], repeat: int = 3) -> dict:
+    out = {"messages": len(frames), "baseline": max(_baseline(frames) for _ in range(repeat))}
+    for name in DECODER_NAMES:
+        try:
+            resolved = resolve_decoder(name)
+        except ImportError:
+            continue
+        out[f"{name}({resolved})" if name == "auto" else name] = max(_fast(frames, name) for _ in range(repeat))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--capture", default=None, help="NDJSON capture; a synthetic one is generated if omitted")
+    ap.add_argument("--coins", type=int, default=50)
+    ap.add_argument("--messages", type=int, default=100_000)
+    args = ap.parse_args()
+    if args.capture:
+        frames = load_frames(args.capture)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            frames = load_frames(write_ndjson(os.path.join(tmp, "c.ndjson"), synth_coins(args.coins), args.messages))
+    r = run(frames)
+    base = r["baseline"]
+    print(f"{r.pop('messages')} frames")
+    for name, rate in r.items():
+        print(f"  {name:>16}: {rate:10.0f} msg/s  ({rate / base:4.2f}x)")
+
+if __name__ == "__main__":
+    main()
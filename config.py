@@ -1,4 +1,8 @@
 from dataclasses import dataclass
+from typing import Tuple
+
+# every channel HyperliquidWS can subscribe to; allMids is market-wide, the rest are per coin
+ALL_STREAMS = ("allMids", "trades", "l2Book", "candle", "activeAssetCtx")
 
 @dataclass(frozen=True)
 class HLConfig:
@@ -8,3 +12,14 @@ class HLConfig:
     heartbeat_sec: int = 20
     reconnect_backoff_sec: float = 1.5
     max_backoff_sec: float = 30.0
+    # a connection that was up retries after at most this much (random) delay; failed attempts back off
+    reconnect_jitter_sec: float = 0.25
+    # a session counts as "was up" (and resets the backoff) once it delivered market data or lasted this long
+    stable_session_sec: float = 10.0
+    # in-process WS connections, coins sharded across them (ingestion.pool.ConnectionPool)
+    ws_connections: int = 1
+    # WS frame JSON decoder: "auto" picks orjson, then msgspec, then stdlib json
+    decoder: str = "auto"
+    # channels to subscribe to (e.g. features.compute.streams_for() for just what the features read)
+    streams: Tuple[str, ...] = ALL_STREAMS
+    candle_interval: str = "1m"
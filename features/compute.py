@@ -1,32 +1,91 @@
 from __future__ import annotations
-from typing import Dict, Tuple, List
+from typing import Callable, Dict, Tuple, List, Optional, Sequence
+import math
+
 import numpy as np
-from ingestion.market_state import CoinState
+
+from ingestion.market_state import CTX_KEYS, CoinState
+from ingestion.orderbook import DEFAULT_BANDS_BPS
+
+# Fixed order of the summarize_features outputs, for places that store features as flat float rows
+# (the shared-memory table used by sharded ingestion). Book keys assume the default OrderBook bands.
+WINDOW_KEYS = (
+    "ret_mean", "ret_std", "ob_imb_mean", "ob_imb_std", "spread_mean", "trade_imb_mean", "trade_imb_std",
+    "mom_raw", "mom_01", "liq_raw", "liq_01", "risk_raw", "risk_01",
+)
+BOOK_KEYS = tuple(f"depth_{band:g}bps" for band in DEFAULT_BANDS_BPS) + ("depth_imb", "microprice", "micro_dev_bps", "book_slope")
+FEATURE_KEYS = WINDOW_KEYS + BOOK_KEYS + CTX_KEYS
+
+# WS channels each feature is computed from, so ingestion can subscribe to just what a feature set reads
+_BOOK, _TRADES, _CTX = ("l2Book",), ("trades",), ("activeAssetCtx",)
+FEATURE_STREAMS: Dict[str, Tuple[str, ...]] = {
+    **dict.fromkeys(("ret_mean", "ret_std", "ob_imb_mean", "ob_imb_std", "spread_mean", "mom_raw", "mom_01",
+                     "liq_raw", "liq_01"), _BOOK),
+    **dict.fromkeys(("trade_imb_mean", "trade_imb_std"), _TRADES),
+    "risk_raw": _BOOK + _TRADES, "risk_01": _BOOK + _TRADES,
+    **dict.fromkeys(BOOK_KEYS, _BOOK),
+    **dict.fromkeys(CTX_KEYS, _CTX),
+}
+
+def streams_for(keys: Sequence[str] = FEATURE_KEYS) -> Tuple[str, ...]:
+    # channels needed to compute `keys`, in first-use order
+    return tuple(dict.fromkeys(ch for k in keys for ch in FEATURE_STREAMS[k]))
 
 def _sigmoid01(x: float) -> float:
     # stable squashing into [0,1]
-    return float(1.0 / (1.0 + np.exp(-x)))
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+def sigmoid01_array(x: np.ndarray) -> np.ndarray:
+    # _sigmoid01 elementwise, same branches
+    z = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1.0 / (1.0 + z), z / (1.0 + z))
 
-def summarize_features(cs: CoinState) -> Dict[str, float]:
-    # Simple, explainable feature summaries over rolling windows
-    mids = cs.mid_returns.as_list()
-    volimb = cs.vol_imbalance.as_list()
-    spr = cs.spread_norm.as_list()
-    trimb = cs.trade_imbalance.as_list()
+def sigmoid01_exact(x: np.ndarray) -> np.ndarray:
+    # _sigmoid01 itself over each element: np.exp and math.exp can differ in the last bit, so this is
+    # the form to use when results must be bit-identical to summarize_features
+    return np.fromiter(map(_sigmoid01, x.tolist()), dtype=np.float64, count=len(x))
 
-    def mean(xs): 
-        return float(np.mean(xs)) if xs else 0.0
-    def std(xs): 
-        return float(np.std(xs)) if xs else 0.0
+def derived_features_array(f: Dict[str, np.ndarray], sigmoid: Callable[[np.ndarray], np.ndarray] = sigmoid01_array) -> None:
+    # the mom / liq / risk scalars of summarize_features, filled into f for whole columns at once
+    # (one value per coin in features.universe, per update row in tools.backfill)
+    f["mom_raw"] = f["ret_mean"] / (f["ret_std"] + 1e-9)
+    f["mom_01"] = sigmoid(2.0 * f["mom_raw"])
+    f["liq_raw"] = -10.0 * f["spread_mean"] - 2.0 * f["ob_imb_std"]
+    f["liq_01"] = sigmoid(f["liq_raw"])
+    f["risk_raw"] = 8.0 * f["ret_std"] + 1.5 * f["trade_imb_std"] + 1.5 * f["ob_imb_std"]
+    f["risk_01"] = sigmoid(2.0 * (f["risk_raw"] - 0.01))
 
+def summarize_features(cs: CoinState, horizon: Optional[str] = None) -> Dict[str, float]:
+    # Simple, explainable feature summaries over rolling windows.
+    # horizon=None uses the count-based windows (last 120 updates); a horizon label (e.g. "60s")
+    # uses the event-time windows. Both maintain running mean/std incrementally, so this is O(1).
     feat = {}
-    feat["ret_mean"] = mean(mids)
-    feat["ret_std"] = std(mids)
-    feat["ob_imb_mean"] = mean(volimb)
-    feat["ob_imb_std"] = std(volimb)
-    feat["spread_mean"] = mean(spr)
-    feat["trade_imb_mean"] = mean(trimb)
-    feat["trade_imb_std"] = std(trimb)
+    if horizon is None:
+        mids = cs.mid_returns
+        volimb = cs.vol_imbalance
+        spr = cs.spread_norm
+        trimb = cs.trade_imbalance
+        feat["ret_mean"] = mids.mean()
+        feat["ret_std"] = mids.std()
+        feat["ob_imb_mean"] = volimb.mean()
+        feat["ob_imb_std"] = volimb.std()
+        feat["spread_mean"] = spr.mean()
+        feat["trade_imb_mean"] = trimb.mean()
+        feat["trade_imb_std"] = trimb.std()
+    else:
+        if horizon not in cs.horizons:
+            raise KeyError(f"Unknown horizon {horizon!r}; available: {list(cs.horizons)}")
+        t = cs.timed
+        feat["ret_mean"] = t["mid_returns"].mean(horizon)
+        feat["ret_std"] = t["mid_returns"].std(horizon)
+        feat["ob_imb_mean"] = t["vol_imbalance"].mean(horizon)
+        feat["ob_imb_std"] = t["vol_imbalance"].std(horizon)
+        feat["spread_mean"] = t["spread_norm"].mean(horizon)
+        feat["trade_imb_mean"] = t["trade_imbalance"].mean(horizon)
+        feat["trade_imb_std"] = t["trade_imbalance"].std(horizon)
 
     # Derived “signal-like” normalized scalars (still features)
     # momentum proxy: mean return scaled by volatility
@@ -44,4 +103,11 @@ def summarize_features(cs: CoinState) -> Dict[str, float]:
     feat["risk_raw"] = risk_raw
     feat["risk_01"] = _sigmoid01(2.0 * (risk_raw - 0.01))  # shift baseline
 
+    # Full-depth book features (depth within N bps, depth-weighted imbalance, microprice, slope),
+    # maintained incrementally by the order book on each l2Book update.
+    feat.update(cs.book.features)
+
+    # Open interest change and funding z-score from the activeAssetCtx series (0 until it arrives).
+    feat.update(cs.ctx_features)
+
     return feat
@@ -0,0 +1,168 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features.universe import universe_features, universe_scores
+from ingestion.market_state import CoinState, MarketState
+from models.regime import REGIME_LABELS
+
+class CrossCoinCovariance:
+    # Rolling covariance of log mid returns across coins. Coins tick asynchronously, so returns are
+    # sampled on a common event-time grid: each coin's latest mid is noted per tick (O(1)), and when
+    # a bucket closes every coin's return over it enters the window as one row. The window keeps
+    # running sums and cross-products, updated with the new row's and the evicted row's outer
+    # products (O(n^2) once per bucket, not per tick), so reads never rescan the window. Event time
+    # (not wall clock) keeps replay deterministic. Coins without a price yet contribute 0 returns.
+    def __init__(self, bucket_ms: int = 1_000, window: int = 300, capacity: int = 64):
+        self.bucket_ms = bucket_ms
+        self.window = window
+        self.capacity = capacity
+        self.coins: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._px = np.full(capacity, np.nan)  # latest mid in the open bucket
+        self._close = np.full(capacity, np.nan)  # mid at the last bucket close
+        self._ring = np.zeros((window, capacity))  # per-bucket returns, oldest at _head once full
+        self._head = 0
+        self._sum = np.zeros(capacity)
+        self._cross = np.zeros((capacity, capacity))
+        self._bucket_end: Optional[int] = None
+        self._since_resync = 0
+        self.buckets = 0  # closed buckets, ever
+
+    def on_update(self, cs: CoinState) -> None:
+        # MarketState listener
+        mid = cs.book_top.mid
+        if mid > 0:
+            self.update(cs.coin, cs.last_book_ms, mid)
+
+    def update(self, coin: str, ts_ms: int, mid: float) -> None:
+        i = self._index.get(coin)
+        if i is None:
+            i = self._add(coin)
+        end = self._bucket_end
+        if end is None:
+            self._bucket_end = (ts_ms // self.bucket_ms + 1) * self.bucket_ms
+        elif ts_ms >= end:
+            skipped = (ts_ms - end) // self.bucket_ms + 1
+            # after the first, closed buckets are flat (0 returns); past a full window they change nothing
+            for _ in range(min(skipped, self.window)):
+                self._close_bucket()
+            self._bucket_end = end + skipped * self.bucket_ms
+        self._px[i] = mid
+
+    def _add(self, coin: str) -> int:
+        i = len(self.coins)
+        if i == self.capacity:
+            cap = self.capacity * 2
+            self._px = np.concatenate((self._px, np.full(self.capacity, np.nan)))
+            self._close = np.concatenate((self._close, np.full(self.capacity, np.nan)))
+            ring = np.zeros((self.window, cap))
+            ring[:, :self.capacity] = self._ring
+            self._ring = ring
+            self._sum = np.concatenate((self._sum, np.zeros(self.capacity)))
+            cross = np.zeros((cap, cap))
+            cross[:self.capacity, :self.capacity] = self._cross
+            self._cross = cross
+            self.capacity = cap
+        self.coins.append(coin)
+        self._index[coin] = i
+        return i
+
+    def _close_bucket(self) -> None:
+        n = len(self.coins)
+        px, close = self._px[:n], self._close[:n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = np.log(px / close)
+        r[~np.isfinite(r)] = 0.0
+        np.copyto(close, px, where=~np.isnan(px))
+        old = self._ring[self._head, :n].copy()
+        self._ring[self._head, :n] = r
+        self._head = (self._head + 1) % self.window
+        self.buckets += 1
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            # periodic exact recomputation bounds drift from the running updates
+            self._since_resync = 0
+            ring = self._ring[:, :n]
+            self._sum[:n] = ring.sum(axis=0)
+            self._cross[:n, :n] = ring.T @ ring
+            return
+        self._sum[:n] += r - old
+        self._cross[:n, :n] += np.outer(r, r) - np.outer(old, old)
+
+    def __len__(self) -> int:
+        # buckets currently in the window
+        return min(self.buckets, self.window)
+
+    def covariance(self) -> np.ndarray:
+        # (coins x coins) population covariance of bucket returns over the window
+        n, k = len(self.coins), len(self)
+        if not k:
+            return np.zeros((n, n))
+        mean = self._sum[:n] / k
+        return self._cross[:n, :n] / k - np.outer(mean, mean)
+
+    def correlation(self) -> np.ndarray:
+        # coins with no variance in the window get 0 correlation with everything (and a 0 diagonal)
+        cov = self.covariance()
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            inv = np.where(std > 0, 1.0 / std, 0.0)
+        return np.clip(cov * np.outer(inv, inv), -1.0, 1.0)
+
+    def beta(self, ref: str = "BTC") -> Optional[np.ndarray]:
+        # cov(coin, ref) / var(ref) per coin; None until ref has a price and some variance
+        j = self._index.get(ref)
+        if j is None:
+            return None
+        cov = self.covariance()
+        var = cov[j, j]
+        return cov[:, j] / var if var > 0 else None
+
+def top_eigen_share(corr: np.ndarray, v0: Optional[np.ndarray] = None, iters: int = 100, tol: float = 1e-10) -> Tuple[float, np.ndarray]:
+    # Largest eigenvalue of a correlation matrix as a share of its trace (the first principal
+    # component's share of variance), by power iteration: O(n^2) per step instead of a full
+    # O(n^3) eigendecomposition. Pass the previous vector back as v0 to warm-start.
+    trace = float(np.trace(corr))
+    n = len(corr)
+    if trace <= 0:
+        return 0.0, np.ones(n) / np.sqrt(max(n, 1))
+    v = v0 if v0 is not None and len(v0) == n and np.any(v0) else np.ones(n) / np.sqrt(n)
+    lam = 0.0
+    for _ in range(iters):
+        w = corr @ v
+        norm = float(np.linalg.norm(w))
+        if norm == 0.0:
+            break
+        v = w / norm
+        if abs(norm - lam) <= tol * norm:
+            lam = norm
+            break
+        lam = norm
+    return lam / trace, v
+
+def market_aggregate(state: MarketState, cross: CrossCoinCovariance, horizon: Optional[str] = None,
+                     ref: str = "BTC", v0: Optional[np.ndarray] = None) -> Tuple[dict, np.ndarray]:
+    # Market-wide view: regime breadth from one vectorized universe pass, the first principal
+    # component's share of cross-coin return variance, and each coin's beta to `ref`.
+    # Returns the aggregate and the principal eigenvector (pass it back as v0 next time).
+    uf = universe_features(state, horizon)
+    codes = universe_scores(uf)["regime"]
+    counts = np.bincount(codes, minlength=len(REGIME_LABELS))
+    total = max(len(codes), 1)
+    share, v = top_eigen_share(cross.correlation(), v0)
+    beta = cross.beta(ref)
+    return {
+        "horizon": horizon,
+        "coins": len(uf.coins),
+        "regime_counts": {label: int(c) for label, c in zip(REGIME_LABELS, counts)},
+        "breadth": {label: float(c) / total for label, c in zip(REGIME_LABELS, counts)},
+        # > 0: more coins trending than at liquidation risk
+        "trend_vs_liq": float(counts[REGIME_LABELS.index("TRENDING")] - counts[REGIME_LABELS.index("LIQUIDATION_RISK")]) / total,
+        "pc1_share": share if len(cross) > 1 else None,
+        "ref": ref,
+        "beta": {c: float(b) for c, b in zip(cross.coins, beta)} if beta is not None else {},
+        "bucket_ms": cross.bucket_ms,
+        "buckets": len(cross),
+    }, v
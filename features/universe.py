@@ -0,0 +1,98 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import itertools
+import operator
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features.compute import BOOK_KEYS, CTX_KEYS, FEATURE_KEYS, derived_features_array
+from ingestion.market_state import MarketState, WindowTable
+from models.regime import REGIME_LABELS, classify_regime_array
+from scoring.edge_score import score_edge_array
+
+# Features, regime and edge score for every coin in one vectorized pass, instead of one
+# summarize_features / classify_regime / score_edge call per coin. Same formulas as
+# features.compute.summarize_features; the count-based window stats are recomputed from the
+# MarketState's WindowTable rather than read from each window's running (Welford) stats, so
+# values agree with the per-coin path to floating-point rounding.
+
+# window series -> (mean key, std key)
+_STATS = {
+    "mid_returns": ("ret_mean", "ret_std"),
+    "vol_imbalance": ("ob_imb_mean", "ob_imb_std"),
+    "spread_norm": ("spread_mean", None),
+    "trade_imbalance": ("trade_imb_mean", "trade_imb_std"),
+}
+_book_row = operator.itemgetter(*BOOK_KEYS)
+_ctx_row = operator.itemgetter(*CTX_KEYS)
+_version = operator.attrgetter("version")
+_book_features = operator.attrgetter("book.features")
+_ctx_features = operator.attrgetter("ctx_features")
+
+def window_stats(table: WindowTable) -> Tuple[np.ndarray, np.ndarray]:
+    # population mean / std of every window, (series x coins): one pass of sums and sums of squares
+    # over the samples (unfilled slots are zero, so windows still filling up need no mask).
+    # var = E[x^2] - mean^2 avoids materializing the centered window; for these series (returns,
+    # imbalances, normalized spreads) the cancellation error is far below the feature tolerances.
+    x = table.samples()
+    nf = np.maximum(table.counts(), 1).astype(np.float64)
+    mean = (x @ np.ones(table.maxlen)) / nf  # matmul: a faster row sum than x.sum(axis=2) here
+    var = np.einsum("sij,sij->si", x, x) / nf - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+@dataclass
+class UniverseFeatures:
+    coins: List[str]
+    versions: np.ndarray  # CoinState.version of each coin, read before computing
+    horizon: Optional[str]
+    columns: Dict[str, np.ndarray]  # FEATURE_KEYS -> one value per coin
+
+    def row(self, i: int) -> Dict[str, float]:
+        # coin i as a summarize_features-style dict
+        return {k: float(v[i]) for k, v in self.columns.items()}
+
+def universe_features(state: MarketState, horizon: Optional[str] = None) -> UniverseFeatures:
+    table = state.windows
+    coins = list(table.coins)
+    css = list(table.states)
+    versions = np.fromiter(map(_version, css), dtype=np.int64, count=len(css))
+    cols: Dict[str, np.ndarray] = {}
+    if horizon is None:
+        mean, std = window_stats(table)
+        for s, series in enumerate(table.series):
+            mean_key, std_key = _STATS[series]
+            cols[mean_key] = mean[s]
+            if std_key:
+                cols[std_key] = std[s]
+    else:
+        if horizon not in state.horizons:
+            raise KeyError(f"Unknown horizon {horizon!r}; available: {list(state.horizons)}")
+        # event-time windows differ in length per coin; their running stats are gathered as is
+        for series, (mean_key, std_key) in _STATS.items():
+            tws = [cs.timed[series] for cs in css]
+            cols[mean_key] = np.fromiter((w.mean(horizon) for w in tws), dtype=np.float64, count=len(tws))
+            if std_key:
+                cols[std_key] = np.fromiter((w.std(horizon) for w in tws), dtype=np.float64, count=len(tws))
+
+    derived_features_array(cols)
+
+    for keys, row, feats in ((BOOK_KEYS, _book_row, _book_features), (CTX_KEYS, _ctx_row, _ctx_features)):
+        block = np.fromiter(
+            itertools.chain.from_iterable(map(row, map(feats, css))),
+            dtype=np.float64, count=len(css) * len(keys),
+        ).reshape(-1, len(keys))
+        for j, k in enumerate(keys):
+            cols[k] = block[:, j]
+    return UniverseFeatures(coins, versions, horizon, {k: cols[k] for k in FEATURE_KEYS})
+
+def universe_scores(uf: UniverseFeatures) -> Dict[str, np.ndarray]:
+    # regime code (REGIME_LABELS index) / confidence and edge score / actionable / explain bitmask
+    # (scoring.edge_score.EXPLAIN_FLAGS) for every coin
+    f = uf.columns
+    code, conf = classify_regime_array(f["ret_std"], f["spread_mean"], f["trade_imb_std"], f["mom_raw"], uf.horizon)
+    score, actionable, explain = score_edge_array(code, f["mom_01"], f["liq_01"], f["risk_01"])
+    return {"regime": code, "confidence": conf, "edge_score": score, "actionable": actionable, "explain": explain}
+
+def regime_labels(code: np.ndarray) -> List[str]:
+    return [REGIME_LABELS[c] for c in code.tolist()]
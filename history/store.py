@@ -0,0 +1,316 @@
+from __future__ import annotations
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.regime import REGIME_LABELS
+from scoring.edge_score import EXPLAIN_FLAGS
+
+# Append-only signal history: one directory per coin, one segment file per time partition.
+#
+#   <root>/<coin>/<partition start ms>.seg
+#   header  64 bytes   b"HLSEG001", capacity, n (rows written), start_ms, end_ms, step_ms (0 = as recorded)
+#   columns COLUMNS in order, each `capacity` values back to back (fixed offsets, so a column is one
+#           contiguous memmapped array; widest dtypes first keeps every column aligned)
+#
+# Segments are created at full partition capacity as sparse files, so untouched rows take no disk.
+# Rows are appended in event-time order and n is bumped only after their columns are written, so
+# readers never see a partial row. The ts column is the index: a range read memory-maps the
+# partitions it overlaps and binary-searches ts, touching only the pages it returns.
+# Retention: compact() rewrites partitions older than compact_after_ms at compact_step_ms (last row
+# per step, tight file) and deletes partitions older than retention_ms.
+
+MAGIC = b"HLSEG001"
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"), ("capacity", "<i8"), ("n", "<i8"), ("start_ms", "<i8"), ("end_ms", "<i8"), ("step_ms", "<i8"),
+    ("_pad", "S16"),
+])
+COLUMNS = (
+    ("ts", "<i8"),  # event time of the data behind the signal
+    ("confidence", "<f4"), ("momentum", "<f4"), ("liquidity", "<f4"), ("risk", "<f4"), ("edge_score", "<f4"),
+    ("regime", "u1"),  # REGIME_LABELS index
+    ("explain", "u1"),  # scoring.edge_score.EXPLAIN_FLAGS bitmask (includes actionable)
+)
+_ROW_BYTES = sum(np.dtype(d).itemsize for _, d in COLUMNS)
+_SEG_NAME = re.compile(r"^(-?\d+)\.seg$")
+
+class Segment:
+    # One partition's column file, memory-mapped read-only or for appending.
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r+" if writable else "r")
+        self.header = self._mm[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        if self.header["magic"][0] != MAGIC:
+            raise ValueError(f"{path}: not a history segment")
+        self.capacity = int(self.header["capacity"][0])
+        self.start_ms = int(self.header["start_ms"][0])
+        self.end_ms = int(self.header["end_ms"][0])
+        self.step_ms = int(self.header["step_ms"][0])
+        self.cols: Dict[str, np.ndarray] = {}
+        off = HEADER_DTYPE.itemsize
+        for name, dtype in COLUMNS:
+            dt = np.dtype(dtype)
+            self.cols[name] = self._mm[off:off + self.capacity * dt.itemsize].view(dt)
+            off += self.capacity * dt.itemsize
+
+    @classmethod
+    def create(cls, path: str, start_ms: int, end_ms: int, capacity: int, step_ms: int = 0) -> Segment:
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (MAGIC, capacity, 0, start_ms, end_ms, step_ms, b"")
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.truncate(HEADER_DTYPE.itemsize + capacity * _ROW_BYTES)
+        return cls(path, writable=True)
+
+    @property
+    def n(self) -> int:
+        return int(self.header["n"][0])
+
+    def append(self, rows: Dict[str, np.ndarray]) -> int:
+        # rows: equal-length column arrays, ts ascending and after every row already here
+        n = self.n
+        k = min(len(rows["ts"]), self.capacity - n)
+        for name, col in self.cols.items():
+            col[n:n + k] = rows[name][:k]
+        self.header["n"] = n + k
+        return k
+
+    def bounds(self, from_ms: int, to_ms: int) -> Tuple[int, int]:
+        # row range with from_ms <= ts <= to_ms
+        ts = self.cols["ts"][:self.n]
+        return int(np.searchsorted(ts, from_ms, "left")), int(np.searchsorted(ts, to_ms, "right"))
+
+    def read(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        return {name: np.array(col[lo:hi]) for name, col in self.cols.items()}
+
+    def flush(self) -> None:
+        self._mm.flush()
+
+def last_in_step(ts: np.ndarray, step_ms: int) -> np.ndarray:
+    # index of the last row in each step_ms bucket of an ascending ts column
+    b = ts // step_ms
+    return np.flatnonzero(np.append(b[1:] != b[:-1], True))
+
+def last_per_step(rows: Dict[str, np.ndarray], step_ms: int) -> Dict[str, np.ndarray]:
+    # downsample to the last row of each step_ms bucket, plus the number of rows it stands for
+    ts = rows["ts"]
+    if not len(ts) or step_ms <= 0:
+        return dict(rows, count=np.ones(len(ts), dtype=np.int64))
+    last = last_in_step(ts, step_ms)
+    out = {name: col[last] for name, col in rows.items()}
+    out["count"] = np.diff(np.append(-1, last))
+    return out
+
+def empty_rows() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+class HistoryStore:
+    # Appends go through one writer (HistoryWriter's thread); queries may run on any thread.
+    def __init__(
+        self,
+        root: str,
+        partition_ms: int = 3_600_000,
+        resolution_ms: int = 1_000,
+        retention_ms: int = 7 * 86_400_000,
+        compact_after_ms: int = 86_400_000,
+        compact_step_ms: int = 60_000,
+    ):
+        self.root = root
+        self.partition_ms = partition_ms
+        self.resolution_ms = resolution_ms
+        self.retention_ms = retention_ms
+        self.compact_after_ms = compact_after_ms
+        self.compact_step_ms = compact_step_ms
+        # at most one row per coin per resolution step
+        self.capacity = partition_ms // max(resolution_ms, 1) + 1
+        self._writing: Dict[str, Segment] = {}  # coin -> open partition
+        self._last_ts: Dict[str, int] = {}  # coin -> newest stored ts (writer side)
+        # read-only mappings reused across queries, keyed by path and checked against the inode, so
+        # a compacted (replaced) or deleted partition is never read through a stale mapping
+        self._readers: OrderedDict = OrderedDict()
+        self._readers_lock = threading.Lock()  # queries may run on several threads
+        self.max_readers = 1024
+        self.latest_ms = 0  # newest ts appended; "now" for retention, so replays age data as live runs do
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, coin: str) -> str:
+        return os.path.join(self.root, coin)
+
+    def coins(self) -> List[str]:
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def partitions(self, coin: str) -> List[int]:
+        try:
+            names = os.listdir(self._dir(coin))
+        except FileNotFoundError:
+            return []
+        return sorted(int(m.group(1)) for m in map(_SEG_NAME.match, names) if m)
+
+    def _path(self, coin: str, start_ms: int) -> str:
+        return os.path.join(self._dir(coin), f"{start_ms}.seg")
+
+    def _segment_for(self, coin: str, ts: int) -> Segment:
+        start = ts - ts % self.partition_ms
+        seg = self._writing.get(coin)
+        if seg is not None and seg.start_ms == start:
+            return seg
+        if seg is not None:
+            seg.flush()
+        path = self._path(coin, start)
+        if os.path.exists(path):
+            seg = Segment(path, writable=True)
+        else:
+            os.makedirs(self._dir(coin), exist_ok=True)
+            seg = Segment.create(path, start, start + self.partition_ms, self.capacity)
+        self._writing[coin] = seg
+        return seg
+
+    def append(self, coin: str, rows: Dict[str, np.ndarray]) -> int:
+        # rows: COLUMNS arrays for one coin, ts ascending; rows at or before the coin's last stored
+        # ts are dropped (appends are idempotent across restarts)
+        ts = rows["ts"]
+        if not len(ts):
+            return 0
+        last = self._last_ts.get(coin)
+        if last is None:
+            last = self._last_ts[coin] = self._stored_last_ts(coin)
+        if ts[0] <= last:
+            keep = ts > last
+            rows = {k: v[keep] for k, v in rows.items()}
+            ts = rows["ts"]
+            if not len(ts):
+                return 0
+        written = 0
+        # split at partition boundaries
+        part = ts // self.partition_ms
+        cuts = np.flatnonzero(part[1:] != part[:-1]) + 1
+        for lo, hi in zip(np.append(0, cuts), np.append(cuts, len(ts))):
+            seg = self._segment_for(coin, int(ts[lo]))
+            written += seg.append({k: v[lo:hi] for k, v in rows.items()})
+        self._last_ts[coin] = int(ts[-1])
+        self.latest_ms = max(self.latest_ms, int(ts[-1]))
+        return written
+
+    def _stored_last_ts(self, coin: str) -> int:
+        for start in reversed(self.partitions(coin)):
+            seg = Segment(self._path(coin, start))
+            if seg.n:
+                return int(seg.cols["ts"][seg.n - 1])
+        return -(1 << 62)
+
+    def flush(self) -> None:
+        for seg in self._writing.values():
+            seg.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._writing.clear()
+
+    def _reader(self, path: str) -> Optional[Segment]:
+        try:
+            ino = os.stat(path).st_ino
+            with self._readers_lock:
+                cached = self._readers.get(path)
+                if cached is not None and cached[0] == ino:
+                    self._readers.move_to_end(path)
+                    return cached[1]
+            seg = Segment(path)
+        except (FileNotFoundError, ValueError):
+            return None  # removed by retention, or replaced mid-open
+        with self._readers_lock:
+            self._readers[path] = (ino, seg)
+            if len(self._readers) > self.max_readers:
+                self._readers.popitem(last=False)
+        return seg
+
+    def query(self, coin: str, from_ms: int, to_ms: int, step_ms: int = 0) -> Dict[str, np.ndarray]:
+        # rows with from_ms <= ts <= to_ms (all COLUMNS plus "count"), downsampled to the last row
+        # per step_ms bucket when step_ms > 0. Only the ts column of the range is read in full;
+        # other columns are gathered at the selected rows.
+        spans = []
+        for start in self.partitions(coin):
+            if start > to_ms or start + self.partition_ms <= from_ms:
+                continue
+            seg = self._reader(self._path(coin, start))
+            if seg is not None:
+                lo, hi = seg.bounds(from_ms, to_ms)
+                if hi > lo:
+                    spans.append((seg, lo, hi))
+        if not spans:
+            return dict(empty_rows(), count=np.empty(0, dtype=np.int64))
+        ts = np.concatenate([seg.cols["ts"][lo:hi] for seg, lo, hi in spans])
+        if step_ms <= 0:
+            rows = {name: np.concatenate([seg.cols[name][lo:hi] for seg, lo, hi in spans]) for name, _ in COLUMNS}
+            rows["count"] = np.ones(len(ts), dtype=np.int64)
+            return rows
+        last = last_in_step(ts, step_ms)
+        # split the selected rows back into per-segment positions
+        ends = np.cumsum([hi - lo for _, lo, hi in spans])
+        cuts = np.searchsorted(last, ends[:-1])
+        picks = [(seg, lo + idx - off) for (seg, lo, _), idx, off in
+                 zip(spans, np.split(last, cuts), np.append(0, ends[:-1]))]
+        rows = {name: np.concatenate([seg.cols[name][i] for seg, i in picks]) for name, _ in COLUMNS if name != "ts"}
+        rows["ts"] = ts[last]
+        rows["count"] = np.diff(np.append(-1, last))
+        return rows
+
+    def compact(self, now_ms: Optional[int] = None) -> dict:
+        # Called from the writer thread. Partitions entirely older than retention_ms are deleted;
+        # closed partitions older than compact_after_ms are rewritten at compact_step_ms, tight.
+        now = self.latest_ms if now_ms is None else now_ms
+        deleted = compacted = 0
+        for coin in self.coins():
+            current = self._writing.get(coin)
+            for start in self.partitions(coin):
+                end = start + self.partition_ms
+                path = self._path(coin, start)
+                if end <= now - self.retention_ms:
+                    if current is not None and current.start_ms == start:
+                        del self._writing[coin]
+                    os.remove(path)
+                    deleted += 1
+                elif end <= now - self.compact_after_ms and (current is None or current.start_ms != start):
+                    seg = Segment(path)
+                    if seg.step_ms:
+                        continue
+                    rows = last_per_step(seg.read(0, seg.n), self.compact_step_ms)
+                    tmp = path + ".tmp"
+                    out = Segment.create(tmp, start, end, max(len(rows["ts"]), 1), self.compact_step_ms)
+                    out.append(rows)
+                    out.flush()
+                    del out, seg
+                    os.replace(tmp, path)
+                    compacted += 1
+        return {"deleted": deleted, "compacted": compacted}
+
+    def disk_bytes(self) -> int:
+        # allocated bytes (segments are sparse until written)
+        total = 0
+        for coin in self.coins():
+            for start in self.partitions(coin):
+                try:
+                    total += os.stat(self._path(coin, start)).st_blocks * 512
+                except FileNotFoundError:
+                    pass
+        return total
+
+def rows_to_json(rows: Dict[str, np.ndarray]) -> dict:
+    # columnar JSON-ready view: regime labels, edge flags decoded from the explain bitmask
+    explain = rows["explain"]
+    actionable = (explain & (1 << EXPLAIN_FLAGS.index("actionable"))) != 0
+    return {
+        "ts": rows["ts"].tolist(),
+        "regime": [REGIME_LABELS[c] for c in rows["regime"].tolist()],
+        "confidence": rows["confidence"].astype(np.float64).round(6).tolist(),
+        "momentum": rows["momentum"].astype(np.float64).round(6).tolist(),
+        "liquidity": rows["liquidity"].astype(np.float64).round(6).tolist(),
+        "risk": rows["risk"].astype(np.float64).round(6).tolist(),
+        "edge_score": rows["edge_score"].astype(np.float64).round(6).tolist(),
+        "actionable": actionable.tolist(),
+        "explain": explain.tolist(),
+        "count": rows["count"].tolist(),
+    }
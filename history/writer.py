@@ -0,0 +1,158 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from api.schemas import SignalEnvelope
+from api.snapshot import SnapshotCache
+from history.store import HistoryStore
+from models.regime import REGIME_LABELS
+from scoring.edge_score import EXPLAIN_FLAGS
+
+log = logging.getLogger(__name__)
+
+_CODES = {label: i for i, label in enumerate(REGIME_LABELS)}
+_BITS = {flag: 1 << i for i, flag in enumerate(EXPLAIN_FLAGS)}
+
+class HistoryWriter:
+    # Feeds a HistoryStore from a SnapshotCache. On each coin update (a source listener, so on the
+    # ingest path) at most one row per coin per store.resolution_ms of event time is taken: the
+    # coin's cached snapshot, recomputed first if stale, is queued. A writer thread appends the queue
+    # in per-coin batches and runs retention compaction every compact_every_sec. A full queue drops
+    # rows (counted) rather than holding up ingestion; a failed append or compaction is logged and
+    # counted, and the thread carries on.
+    def __init__(self, store: HistoryStore, cache: SnapshotCache, horizon: Optional[str] = None,
+                 batch: int = 4096, max_queue: int = 100_000, compact_every_sec: float = 60.0):
+        self.store = store
+        self.cache = cache
+        self.horizon = horizon
+        self.batch = batch
+        self.max_queue = max_queue
+        self.compact_every_sec = compact_every_sec
+        self._resolution = max(store.resolution_ms, 1)
+        self._last_step: Dict[str, int] = {}
+        self._q: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.queued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.compactions = 0
+        self.errors = 0
+        self.lost = 0  # rows in batches that failed to append
+        self.last_error: Optional[str] = None
+
+    def attach(self) -> HistoryWriter:
+        self.cache.source.add_listener(self.on_update)
+        return self
+
+    def on_update(self, coin: str) -> None:
+        ts = max(self.cache.source.times(coin))
+        step = ts // self._resolution
+        if step <= self._last_step.get(coin, -1):
+            return
+        self._last_step[coin] = step
+        if len(self._q) >= self.max_queue:
+            self.dropped += 1
+            return
+        snap = self.cache.lookup(coin, self.horizon)
+        if snap is None:
+            return
+        self._q.append((coin, ts, snap.envelope))
+        self.queued += 1
+        if len(self._q) == self.batch:
+            self._wake.set()
+
+    def start(self) -> HistoryWriter:
+        self._thread = threading.Thread(target=self._run, daemon=True, name="history-writer")
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        # drains the queue, then flushes the open segments
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.store.close()
+
+    def _run(self) -> None:
+        q = self._q
+        next_compact = time.monotonic() + self.compact_every_sec
+        while True:
+            stopping = self._stop.is_set()
+            if len(q) < self.batch and not stopping:
+                self._wake.wait(0.25)
+                self._wake.clear()
+            # compaction is checked between batches: under sustained load the queue never drains
+            while True:
+                if time.monotonic() >= next_compact and not stopping:
+                    try:
+                        self.store.compact()
+                        self.compactions += 1
+                    except Exception as e:
+                        self._failed("compaction", e, 0)
+                    next_compact = time.monotonic() + self.compact_every_sec
+                if not q:
+                    break
+                items = [q.popleft() for _ in range(min(len(q), self.batch))]
+                written = self.written
+                try:
+                    self.write(items)
+                except Exception as e:
+                    self._failed("append", e, len(items) - (self.written - written))  # coins before it went in
+                    break
+            if stopping:
+                return
+
+    def _failed(self, what: str, e: Exception, rows: int) -> None:
+        self.errors += 1
+        self.lost += rows
+        err = f"{type(e).__name__}: {e}"
+        if err != self.last_error:  # once per distinct error, not once per batch
+            log.error("history writer: %s in %s failed, %d row(s) lost: %s", what, self.store.root, rows, err)
+        self.last_error = err
+
+    def write(self, items: List[tuple]) -> None:
+        # items: (coin, ts, SignalEnvelope), per coin in ts order
+        by_coin: Dict[str, List[tuple]] = defaultdict(list)
+        for item in items:
+            by_coin[item[0]].append(item)
+        for coin, rows in by_coin.items():
+            self.written += self.store.append(coin, envelope_rows([ts for _, ts, _ in rows], [e for _, _, e in rows]))
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "root": self.store.root,
+            "queue_depth": len(self._q),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "compactions": self.compactions,
+            "errors": self.errors,
+            "lost": self.lost,
+            "last_error": self.last_error,
+            "latest_ms": self.store.latest_ms,
+        }
+
+def envelope_rows(ts: List[int], envs: List[SignalEnvelope]) -> Dict[str, np.ndarray]:
+    # SignalEnvelopes -> HistoryStore columns
+    return {
+        "ts": np.array(ts, dtype=np.int64),
+        "confidence": np.array([e.regime.confidence for e in envs], dtype=np.float32),
+        "momentum": np.array([e.signals.momentum for e in envs], dtype=np.float32),
+        "liquidity": np.array([e.signals.liquidity for e in envs], dtype=np.float32),
+        "risk": np.array([e.signals.risk for e in envs], dtype=np.float32),
+        "edge_score": np.array([e.edge.score for e in envs], dtype=np.float32),
+        "regime": np.array([_CODES[e.regime.label] for e in envs], dtype=np.uint8),
+        "explain": np.array([sum(_BITS[f] for f in e.edge.explain) for e in envs], dtype=np.uint8),
+    }
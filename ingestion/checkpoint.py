@@ -0,0 +1,276 @@
+from __future__ import annotations
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ingestion.market_state import (
+    CANDLE_FIELDS, CTX_BUCKET_MS, CTX_FIELDS, SERIES_ROWS, TIMED_SERIES, BookTop, MarketState, SeriesRing, ctx_features,
+)
+
+# Warm-start checkpoints of a MarketState. Everything the features read is saved: each coin's count-based
+# and event-time windows (samples, ring positions and running stats, so a restored window continues
+# exactly where it stopped), book top and full-depth levels, _prev_mid, and the candle / asset context
+# series. One uncompressed .npz of arrays stacked over coins, variable-length parts concatenated with
+# offsets. It is written to a temp file, fsynced and renamed over the previous one, so a crash mid-write
+# leaves the last good checkpoint in place.
+#
+# snapshot_state() copies on the caller's thread (the event loop, so the copy is consistent; a few ms
+# for hundreds of coins); write_checkpoint() does the disk I/O and runs in a worker thread.
+
+FORMAT = 1
+WINDOWS = TIMED_SERIES + ("vol_z",)  # count-based windows of a CoinState
+_SERIES = (("candles", CANDLE_FIELDS, 0), ("ctx", CTX_FIELDS, CTX_BUCKET_MS))
+
+def _concat(parts: List[np.ndarray], dtype, width: int = 0) -> np.ndarray:
+    if parts:
+        return np.concatenate(parts)
+    return np.zeros((0, width) if width else 0, dtype=dtype)
+
+def _offsets(parts: List[np.ndarray]) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum([len(p) for p in parts], dtype=np.int64))).astype(np.int64)
+
+def snapshot_state(state: MarketState) -> Dict[str, np.ndarray]:
+    # name -> array copies of the whole state, ready for write_checkpoint
+    css = list(state.coins.values())
+    c = len(css)
+    first = css[0] if css else None
+    meta = {
+        "format": FORMAT,
+        "coins": [cs.coin for cs in css],
+        "horizons": dict(state.horizons),
+        "window_len": state.windows.maxlen,
+        "timed_capacity": first.timed[TIMED_SERIES[0]].capacity if first else 0,
+        "saved_ms": int(time.time() * 1000),
+        "event_ms": max((max(cs.last_trade_ms, cs.last_book_ms) for cs in css), default=0),
+    }
+    out = {"meta": np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)}
+
+    out["coin_int"] = np.array([(cs.last_trade_ms, cs.last_book_ms, cs.version, cs.book.updates) for cs in css],
+                               dtype=np.int64).reshape(c, 4)
+    top = [cs.book_top for cs in css]
+    out["book_top"] = np.array([(b.bid_px, b.bid_sz, b.ask_px, b.ask_sz, b.spread, b.mid) for b in top]).reshape(c, 6)
+    out["prev_mid"] = np.array([math.nan if cs._prev_mid is None else cs._prev_mid for cs in css], dtype=np.float64)
+
+    # count-based windows: (window x coin x ...)
+    maxlen = state.windows.maxlen
+    dumps = [[getattr(cs, name).dump() for cs in css] for name in WINDOWS]
+    out["w_buf"] = np.array([[d[0] for d in ds] for ds in dumps]).reshape(len(WINDOWS), c, 2 * maxlen)
+    out["w_int"] = np.array([[d[1:4] for d in ds] for ds in dumps], dtype=np.int64).reshape(len(WINDOWS), c, 3)
+    out["w_stats"] = np.array([[d[4:] for d in ds] for ds in dumps]).reshape(len(WINDOWS), c, 2)
+
+    # event-time windows: per (coin, series) scalars and per-horizon stats; live samples concatenated
+    s, h = len(TIMED_SERIES), len(state.horizons)
+    t_int = np.zeros((c, s, 3), dtype=np.int64)
+    t_hint = np.zeros((c, s, h, 2), dtype=np.int64)
+    t_stats = np.zeros((c, s, h, 2))
+    ts_parts, val_parts = [], []
+    for i, cs in enumerate(css):
+        for j, name in enumerate(TIMED_SERIES):
+            d = cs.timed[name].dump()
+            t_int[i, j] = (d["seq"], d["last_ts"], d["since_resync"])
+            t_hint[i, j, :, 0] = d["heads"]
+            t_hint[i, j, :, 1] = d["n"]
+            t_stats[i, j, :, 0] = d["mean"]
+            t_stats[i, j, :, 1] = d["m2"]
+            ts_parts.append(d["ts"])
+            val_parts.append(d["vals"])
+    out.update(t_int=t_int, t_hint=t_hint, t_stats=t_stats, t_off=_offsets(ts_parts),
+               t_ts=_concat(ts_parts, np.int64), t_vals=_concat(val_parts, np.float64))
+
+    # candle / asset context series: live rows oldest -> newest (seq 0 = never allocated)
+    for name, fields, _ in _SERIES:
+        seqs = np.zeros(c, dtype=np.int64)
+        ts_parts, val_parts = [], []
+        for i, cs in enumerate(css):
+            ring = getattr(cs, name)
+            if ring is None:
+                ts_parts.append(np.zeros(0, dtype=np.int64))
+                val_parts.append(np.zeros((0, len(fields))))
+                continue
+            seqs[i], ts, vals = ring.dump()
+            ts_parts.append(ts)
+            val_parts.append(vals)
+        out.update({f"{name}_seq": seqs, f"{name}_off": _offsets(ts_parts),
+                    f"{name}_ts": _concat(ts_parts, np.int64), f"{name}_vals": _concat(val_parts, np.float64, len(fields))})
+
+    # full-depth books: levels and running aggregates of each side, bids then asks of each coin
+    sides = [side.dump() for cs in css for side in (cs.book.bids, cs.book.asks)]
+    bands = len(css[0].book.bids.bands) if css else 0
+    out["book_off"] = _offsets([px for px, _, _, _ in sides])
+    out["book_px"] = _concat([np.array(px, dtype=np.float64) for px, _, _, _ in sides], np.float64)
+    out["book_sz"] = _concat([np.array(sz, dtype=np.float64) for _, sz, _, _ in sides], np.float64)
+    out["book_agg"] = np.array([agg for _, _, agg, _ in sides], dtype=np.float64).reshape(len(sides), 4 + bands)
+    out["book_since"] = np.array([since for _, _, _, since in sides], dtype=np.int64)
+    return out
+
+def write_checkpoint(arrays: Dict[str, np.ndarray], path: str) -> int:
+    # atomically replaces `path`; returns its size in bytes
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return os.path.getsize(path)
+
+def save_checkpoint(state: MarketState, path: str) -> int:
+    return write_checkpoint(snapshot_state(state), path)
+
+def load_checkpoint(path: str, horizons: Optional[Dict[str, int]] = None) -> Tuple[MarketState, dict]:
+    # A fresh MarketState (with the given horizons, default DEFAULT_HORIZONS) holding every coin of the
+    # checkpoint, and the checkpoint's meta. Nothing outside the new state is touched, so a failure
+    # part-way (ValueError if the checkpoint was written with other horizons or window sizes) leaves the
+    # caller's state as it was.
+    state = MarketState(horizons=dict(horizons)) if horizons is not None else MarketState()
+    with np.load(path, allow_pickle=False) as z:
+        a = {name: z[name] for name in z.files}
+    meta = json.loads(a["meta"].tobytes())
+    if meta.get("format") != FORMAT:
+        raise ValueError(f"{path}: unsupported checkpoint format {meta.get('format')!r}")
+    if meta["horizons"] != dict(state.horizons):
+        raise ValueError(f"{path}: checkpoint horizons {meta['horizons']} differ from {dict(state.horizons)}")
+    if meta["window_len"] != state.windows.maxlen:
+        raise ValueError(f"{path}: checkpoint window length {meta['window_len']} differs from {state.windows.maxlen}")
+
+    coin_int, book_top, prev_mid = a["coin_int"].tolist(), a["book_top"].tolist(), a["prev_mid"].tolist()
+    w_buf, w_int, w_stats = a["w_buf"], a["w_int"].tolist(), a["w_stats"].tolist()
+    t_int, t_hint, t_stats = a["t_int"].tolist(), a["t_hint"], a["t_stats"]
+    t_off, t_ts, t_vals = a["t_off"].tolist(), a["t_ts"], a["t_vals"]
+    book_off, book_px, book_sz = a["book_off"].tolist(), a["book_px"], a["book_sz"]
+    book_agg, book_since = a["book_agg"].tolist(), a["book_since"].tolist()
+    for i, coin in enumerate(meta["coins"]):
+        cs = state.ensure_coin(coin)
+        if i == 0 and meta["timed_capacity"] != cs.timed[TIMED_SERIES[0]].capacity:
+            raise ValueError(f"{path}: checkpoint event-time capacity {meta['timed_capacity']} differs from "
+                             f"{cs.timed[TIMED_SERIES[0]].capacity}")
+        cs.last_trade_ms, cs.last_book_ms, cs.version, updates = coin_int[i]
+        cs.book_top = BookTop(*book_top[i])
+        cs._prev_mid = None if math.isnan(prev_mid[i]) else prev_mid[i]
+
+        sides = []
+        for k in (2 * i, 2 * i + 1):
+            lo, hi = book_off[k:k + 2]
+            sides.append((array("d", book_px[lo:hi].tobytes()), array("d", book_sz[lo:hi].tobytes()), book_agg[k], book_since[k]))
+        cs.book.restore(*sides, updates)
+
+        for k, name in enumerate(WINDOWS):
+            getattr(cs, name).restore(w_buf[k, i], *w_int[k][i], *w_stats[k][i])
+
+        for j, name in enumerate(TIMED_SERIES):
+            seq, last_ts, since_resync = t_int[i][j]
+            lo, hi = t_off[i * len(TIMED_SERIES) + j:i * len(TIMED_SERIES) + j + 2]
+            cs.timed[name].restore(seq, last_ts, since_resync, t_hint[i, j, :, 0].tolist(), t_hint[i, j, :, 1].tolist(),
+                                   t_stats[i, j, :, 0].tolist(), t_stats[i, j, :, 1].tolist(), t_ts[lo:hi], t_vals[lo:hi])
+
+        for name, fields, bucket_ms in _SERIES:
+            seq = int(a[f"{name}_seq"][i])
+            if seq:
+                lo, hi = a[f"{name}_off"][i:i + 2].tolist()
+                ring = SeriesRing(fields, SERIES_ROWS, bucket_ms)
+                ring.restore(seq, a[f"{name}_ts"][lo:hi], a[f"{name}_vals"][lo:hi])
+                setattr(cs, name, ring)
+        if cs.ctx is not None:
+            cs.ctx_features = ctx_features(cs.ctx)
+    return state, meta
+
+class GapFilter:
+    # Admits only decoded records that are newer than a restored state, for replaying the gap between
+    # a checkpoint and now from a capture that overlaps it. Per coin: trades after its last trade time,
+    # books after its last book time (so records sharing the checkpoint's millisecond are dropped, as
+    # after a reconnect). Candle and asset context records carry no comparable time; the capture is in
+    # arrival order, so they are admitted once any trade / book record has been (everything from there
+    # on arrived after the checkpoint was taken). Coins the checkpoint does not hold are admitted throughout.
+    def __init__(self, state: MarketState):
+        self.floors = {c: (cs.last_trade_ms, cs.last_book_ms) for c, cs in state.coins.items()}
+        # capture time before which nothing can be admitted
+        self.start_ms: Optional[int] = min((min(f) for f in self.floors.values()), default=None)
+        self.past = not self.floors
+        self.admitted = 0
+        self.skipped = 0
+
+    def admit(self, channel: str, records):
+        # records (possibly with the old trades removed), or None to skip them
+        if channel == "trades":
+            coin = records[0].coin if records else ""
+        else:
+            coin = records.coin
+        floor = self.floors.get(coin)
+        if floor is not None:
+            if channel == "trades":
+                if records[0].time <= floor[0]:
+                    records = [t for t in records if t.time > floor[0]]
+                    if not records:
+                        self.skipped += 1
+                        return None
+                self.past = True
+            elif channel == "l2Book":
+                if records.time <= floor[1]:
+                    self.skipped += 1
+                    return None
+                self.past = True
+            elif not self.past:
+                self.skipped += 1
+                return None
+        self.admitted += 1
+        return records
+
+class Checkpointer:
+    # Periodic checkpoints from the event loop: every `every_sec` the state is copied on the loop and
+    # written from a worker thread, so ingestion never waits on the disk. save() can also be awaited
+    # directly (e.g. once more at shutdown).
+    def __init__(self, state: MarketState, path: str, every_sec: float = 30.0):
+        self.state = state
+        self.path = path
+        self.every_sec = every_sec
+        self.restored: Optional[dict] = None  # meta of the checkpoint `state` was restored from, if any
+        self.saves = 0
+        self.errors = 0
+        self.bytes = 0
+        self.last_saved_ms = 0
+        self.copy_ms = 0.0  # time the last save held the loop
+        self.write_ms = 0.0
+
+    async def save(self) -> None:
+        t0 = time.perf_counter()
+        arrays = snapshot_state(self.state)
+        t1 = time.perf_counter()
+        try:
+            self.bytes = await asyncio.to_thread(write_checkpoint, arrays, self.path)
+        except OSError:
+            self.errors += 1
+            return
+        self.copy_ms = (t1 - t0) * 1e3
+        self.write_ms = (time.perf_counter() - t1) * 1e3
+        self.saves += 1
+        self.last_saved_ms = int(time.time() * 1000)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.every_sec)
+            await self.save()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "every_sec": self.every_sec,
+            "restored_event_ms": self.restored["event_ms"] if self.restored else None,
+            "saves": self.saves,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "last_saved_ms": self.last_saved_ms,
+            "copy_ms": round(self.copy_ms, 3),
+            "write_ms": round(self.write_ms, 3),
+        }
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+# Pluggable JSON decoding for WS frames. orjson / msgspec are optional; stdlib json is the fallback.
+
+Frame = Union[str, bytes]
+Loads = Callable[[Frame], Any]
+
+def _orjson() -> Loads:
+    import orjson
+    return orjson.loads
+
+def _msgspec() -> Loads:
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+def _stdlib() -> Loads:
+    return json.loads
+
+_DECODERS: Dict[str, Callable[[], Loads]] = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+DECODER_NAMES = ("auto",) + tuple(_DECODERS)
+
+def resolve_decoder(name: str = "auto") -> str:
+    if name == "auto":
+        for candidate in ("orjson", "msgspec"):
+            try:
+                _DECODERS[candidate]()
+                return candidate
+            except ImportError:
+                continue
+        return "json"
+    if name not in _DECODERS:
+        raise ValueError(f"Unknown decoder {name!r}; expected one of {DECODER_NAMES}")
+    return name
+
+def get_loads(name: str = "auto") -> Loads:
+    return _DECODERS[resolve_decoder(name)]()
+
+_KEY_STR = '"channel":"'
+_KEY_BYTES = b'"channel":"'
+_PEEK_LIMIT = 64  # Hyperliquid puts "channel" first; don't scan deep into large payloads looking for it
+
+def peek_channel(raw: Frame) -> Optional[str]:
+    # Cheap channel sniff without a full parse. Returns None when the key isn't where we expect it
+    # (e.g. whitespace after the colon); callers then fall back to decoding the whole frame.
+    if isinstance(raw, str):
+        i = raw.find(_KEY_STR, 0, _PEEK_LIMIT)
+        if i < 0:
+            return None
+        start = i + len(_KEY_STR)
+        end = raw.find('"', start)
+        return raw[start:end] if end > 0 else None
+    i = raw.find(_KEY_BYTES, 0, _PEEK_LIMIT)
+    if i < 0:
+        return None
+    start = i + len(_KEY_BYTES)
+    end = raw.find(b'"', start)
+    return raw[start:end].decode() if end > 0 else None
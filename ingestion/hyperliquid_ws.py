@@ -1,14 +1,25 @@
 from __future__ import annotations
 import asyncio
 import json
+import logging
+import random
 import time
-from typing import Callable, Dict, List, Optional
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
 import websockets
-from websockets import WebSocketClientProtocol
 
 from config import HLConfig
-from ingestion.market_state import MarketState
+from ingestion.decode import Frame, get_loads, peek_channel
+from ingestion.latency import LatencyTracker
+from ingestion.market_state import CoinState, MarketState
+from ingestion.messages import AssetCtxUpdate, Candle, L2Update, Trade, make_frame_decoders, make_payload_parsers
+
+if TYPE_CHECKING:
+    # the legacy protocol module is slow to import and only needed for the annotation
+    from websockets import WebSocketClientProtocol
+
+log = logging.getLogger(__name__)
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
@@ -19,23 +30,95 @@ class HyperliquidWS:
         self.cfg = cfg
         self._ws: Optional[WebSocketClientProtocol] = None
         self._stop = asyncio.Event()
+        self._loads = get_loads(cfg.decoder)
+        # channel -> handler(records) returning the updated CoinState (or None). Channels without a handler
+        # are skipped, before a full parse when possible.
+        self._handlers: Dict[str, Callable[[object], None]] = {
+            "trades": self._on_trades,
+            "l2Book": self._on_l2book,
+            "candle": self._on_candle,
+            "activeAssetCtx": self._on_asset_ctx,
+        }
+        self._frame_decoders = make_frame_decoders(self._loads, _now_ms)
+        self._payload_parsers = make_payload_parsers(_now_ms)
+        self.frames_skipped = 0
+        # optional fn(raw frame) called for every received frame before decoding (e.g. FrameRecorder.submit)
+        self.tap: Optional[Callable[[Frame], None]] = None
+        # optional per-message timing (receipt lag, decode, apply) for frames through on_frame
+        self.latency: Optional[LatencyTracker] = None
+        self.connected = False
+        self.connects = 0  # successful (re)subscribes
+        self.errors = 0  # sessions (or connect attempts) that ended in an exception
+        self.last_error: Optional[str] = None
+        # called after `connected` changes; default mirrors it into state.ws_connected (a
+        # ConnectionPool instead reports whether all of its connections are up)
+        self.on_status: Optional[Callable[[HyperliquidWS], None]] = None
+        # coin -> last trade time before a reconnect; the first trades batch after resubscribing
+        # replays recent trades, and anything at or before this was already applied
+        self._trade_floor: Dict[str, int] = {}
 
     async def connect_and_run(self, coins: List[str]) -> None:
+        # A session that was up (it delivered market data, or lasted stable_session_sec) is retried right
+        # away, after a little jitter so connections dropped together don't reconnect in lockstep. Failed
+        # attempts, and sessions the server ends right after the subscribe burst, back off.
         backoff = self.cfg.reconnect_backoff_sec
         while not self._stop.is_set():
+            was_up = False
             try:
                 async with websockets.connect(self.cfg.ws_url, ping_interval=None) as ws:
                     self._ws = ws
-                    self.state.ws_connected = True
+                    self._resync(coins)
                     await self._subscribe_all(coins)
-                    backoff = self.cfg.reconnect_backoff_sec
-                    await self._run_loop()
+                    self.connects += 1
+                    self._set_connected(True)
+                    started, seen = time.monotonic(), self._data_seen(coins)
+                    try:
+                        await self._run_loop()
+                    finally:
+                        was_up = (self._data_seen(coins) != seen
+                                  or time.monotonic() - started >= self.cfg.stable_session_sec)
             except Exception as e:
-                self.state.ws_connected = False
-                # reconnect with backoff
+                self._failed(e)
+            self._set_connected(False)
+            if self._stop.is_set():
+                break
+            if was_up:
+                backoff = self.cfg.reconnect_backoff_sec
+                await asyncio.sleep(random.uniform(0.0, self.cfg.reconnect_jitter_sec))
+            else:
                 await asyncio.sleep(backoff)
                 backoff = min(self.cfg.max_backoff_sec, backoff * 1.6)
 
+    def _data_seen(self, coins: List[str]) -> int:
+        # total updates applied to this connection's coins; moves only when market data arrived
+        states = self.state.coins
+        return sum(states[c].version for c in coins if c in states)
+
+    def _failed(self, e: Exception) -> None:
+        self.errors += 1
+        err = f"{type(e).__name__}: {e}"
+        if err != self.last_error:  # once per distinct error, not once per reconnect
+            log.warning("ws %s: session failed, reconnecting: %s", self.cfg.ws_url, err)
+        self.last_error = err
+
+    def _set_connected(self, flag: bool) -> None:
+        self.connected = flag
+        if self.on_status is None:
+            self.state.ws_connected = flag
+        else:
+            self.on_status(self)
+
+    def _resync(self, coins: List[str]) -> None:
+        # Before (re)subscribing to coins the state already holds (a reconnect, or a start from a
+        # checkpoint): l2Book messages are full snapshots, so the book re-syncs on the first one, but the
+        # mid return across the gap is not a return; and the trade snapshot that follows a subscribe
+        # must not count trades twice.
+        for c in coins:
+            cs = self.state.coins.get(c)
+            if cs is not None:
+                cs.resync()
+                self._trade_floor[c] = cs.last_trade_ms
+
     async def stop(self) -> None:
         self._stop.set()
         try:
@@ -46,15 +129,20 @@ class HyperliquidWS:
 
     async def _subscribe_all(self, coins: List[str]) -> None:
         # Per docs: { "method":"subscribe", "subscription": { "type":"trades", "coin":"SOL"} } citeturn1view0turn2view0
+        # Only the channels in cfg.streams.
+        streams = self.cfg.streams
         subs = []
-        subs.append({"type": "allMids"})
+        if "allMids" in streams:
+            subs.append({"type": "allMids"})
+        per_coin = [ch for ch in streams if ch != "allMids"]
         for c in coins:
-            subs.extend([
-                {"type": "trades", "coin": c},
-                {"type": "l2Book", "coin": c},
-                {"type": "candle", "coin": c, "interval": "1m"},
-                {"type": "activeAssetCtx", "coin": c},
-            ])
+            for ch in per_coin:
+                sub = {"type": ch, "coin": c}
+                if ch == "candle":
+                    sub["interval"] = self.cfg.candle_interval
+                subs.append(sub)
+        # Pipelined: written back to back without waiting for any subscriptionResponse (a send only
+        # waits for the local write buffer, ~30 us per frame), so subscribing costs no round trips.
         for s in subs:
             await self._send({"method": "subscribe", "subscription": s})
 
@@ -63,12 +151,13 @@ class HyperliquidWS:
         # lightweight heartbeat
         hb_task = asyncio.create_task(self._heartbeat())
         try:
+            tap = self.tap
             async for msg in self._ws:
-                data = json.loads(msg)
-                await self._handle_msg(data)
+                if tap is not None:
+                    tap(msg)
+                self.on_frame(msg)
         finally:
             hb_task.cancel()
-            self.state.ws_connected = False
 
     async def _heartbeat(self) -> None:
         # Hyperliquid provides a heartbeats doc page; here we just send pings to keep connection alive
@@ -86,47 +175,97 @@ class HyperliquidWS:
             return
         await self._ws.send(json.dumps(obj))
 
-    async def _handle_msg(self, m: dict) -> None:
-        ch = m.get("channel")
-        d = m.get("data")
-        if not ch:
+    def on_frame(self, raw: Frame) -> None:
+        ch = peek_channel(raw)
+        if ch is None:
+            self._dispatch(self._loads(raw))
             return
-        # Ignore subscriptionResponse; it echoes your subscription and may include snapshots (isSnapshot flag on some streams) citeturn2view0
-        if ch == "subscriptionResponse":
+        handler = self._handlers.get(ch)
+        if handler is None:
+            self.frames_skipped += 1
             return
-
-        # trades stream: channel "trades" data: WsTrade[] citeturn2view0
-        if ch == "trades" and isinstance(d, list) and d:
-            coin = d[0].get("coin")
-            if coin:
-                cs = self.state.ensure_coin(coin)
-                ts_ms = int(d[0].get("time", _now_ms()))
-                cs.update_trades(d, ts_ms)
+        lat = self.latency
+        if lat is None:
+            records = self._frame_decoders[ch](raw)
+            if records is not None:
+                handler(records)
             return
-
-        # order book stream: channel "l2Book" data: {coin, time, levels: [[bids],[asks]]} citeturn2view0
-        if ch == "l2Book" and isinstance(d, dict):
-            coin = d.get("coin")
-            if coin:
-                cs = self.state.ensure_coin(coin)
-                ts_ms = int(d.get("time", _now_ms()))
-                levels = d.get("levels", [[], []])
-                bids = levels[0] if len(levels) > 0 else []
-                asks = levels[1] if len(levels) > 1 else []
-                # top of book
-                if bids and asks:
-                    bid = bids[0]
-                    ask = asks[0]
-                    bid_px, bid_sz = float(bid.get("px", 0.0)), float(bid.get("sz", 0.0))
-                    ask_px, ask_sz = float(ask.get("px", 0.0)), float(ask.get("sz", 0.0))
-                    cs.update_book_top(bid_px, bid_sz, ask_px, ask_sz, ts_ms)
+        # on_frame runs as soon as the frame is read, so t0 doubles as the receipt time
+        t0 = perf_counter_ns()
+        records = self._frame_decoders[ch](raw)
+        if records is None:
             return
+        t1 = perf_counter_ns()
+        cs = handler(records)
+        if cs is not None:
+            # LatencyTracker.message, inlined
+            src = cs.last_book_ms if ch == "l2Book" else cs.last_trade_ms if ch == "trades" else 0
+            pending = lat.pending
+            pending.append((cs.coin, ch, src, t0, t1, perf_counter_ns()))
+            if len(pending) >= lat.batch:
+                lat.flush()
+
+    def on_records(self, channel: str, records) -> None:
+        # already-decoded records (e.g. from a binary capture) straight to the channel handler
+        handler = self._handlers.get(channel)
+        if handler is not None:
+            handler(records)
+
+    async def _handle_msg(self, m: dict) -> None:
+        self._dispatch(m)
 
-        # all mids stream: channel "allMids" data: {mids: {coin: px}} citeturn2view0
-        if ch == "allMids" and isinstance(d, dict):
-            mids = d.get("mids", {})
-            # we don't push mids directly; book gives more structure
+    def _dispatch(self, m: dict) -> None:
+        # Ignore subscriptionResponse; it echoes your subscription and may include snapshots (isSnapshot flag on some streams) citeturn2view0
+        # allMids has no handler (mids come from the books); subscribe to it only if something else reads it
+        ch = m.get("channel")
+        handler = self._handlers.get(ch)
+        if handler is None:
             return
+        records = self._payload_parsers[ch](m.get("data"))
+        if records is not None:
+            handler(records)
+
+    def _on_trades(self, trades: List[Trade]) -> Optional[CoinState]:
+        # trades stream: channel "trades" data: WsTrade[] citeturn2view0
+        if trades and trades[0].coin:
+            cs = self.state.ensure_coin(trades[0].coin)
+            if self._trade_floor:
+                floor = self._trade_floor.pop(cs.coin, None)
+                if floor is not None:
+                    # the post-resubscribe trade snapshot; trades sharing the floor's millisecond are dropped too
+                    trades = [t for t in trades if t.time > floor]
+                    if not trades:
+                        return None
+            cs.update_trades(trades, trades[0].time)
+            self.state.notify(cs)
+            return cs
+        return None
+
+    def _on_l2book(self, u: L2Update) -> Optional[CoinState]:
+        # order book stream: channel "l2Book" data: {coin, time, levels: [[bids],[asks]]} citeturn2view0
+        # full depth into the book engine, top of book into the rolling windows
+        if u.coin and u.bids and u.asks:
+            cs = self.state.ensure_coin(u.coin)
+            cs.update_book(u)
+            self.state.notify(cs)
+            return cs
+        return None
+
+    def _on_candle(self, c: Candle) -> Optional[CoinState]:
+        # candle stream: channel "candle" data: {t, T, s, i, o, c, h, l, v, n}; the open candle is re-sent as it builds
+        if c.coin:
+            cs = self.state.ensure_coin(c.coin)
+            cs.update_candle(c)
+            return cs
+        return None
 
-        # candle / activeAssetCtx are optional enrichments; ignored for now but kept for extension
-        return
+    def _on_asset_ctx(self, u: AssetCtxUpdate) -> Optional[CoinState]:
+        # activeAssetCtx stream: channel "activeAssetCtx" data: {coin, ctx: {funding, openInterest, markPx, ...}}
+        # The payload has no timestamp; it is stamped with the coin's latest trade / book time, so a replay
+        # files it in the same series rows as the live run did.
+        if u.coin:
+            cs = self.state.ensure_coin(u.coin)
+            cs.update_ctx(u.ctx, max(cs.last_trade_ms, cs.last_book_ms))
+            self.state.notify(cs)
+            return cs
+        return None
@@ -0,0 +1,218 @@
+from __future__ import annotations
+import operator
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fixed-bucket, HDR-style latency histograms. Values are integer microseconds, bucketed log-linearly:
+# exact below 2 * SUB_BUCKETS, then SUB_BUCKETS buckets per power of two (at most 1 / SUB_BUCKETS
+# relative error) up to MAX_US; anything larger lands in the last bucket. Boundaries never move, so
+# histograms merge by adding counts and percentiles are read off cumulative counts.
+
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_US = 1 << 32  # ~72 minutes
+
+def bucket_index(us: int) -> int:
+    us = min(max(us, 0), MAX_US - 1)
+    e = max(us.bit_length() - SUB_BITS - 1, 0)
+    return (e << SUB_BITS) + (us >> e)
+
+N_BUCKETS = bucket_index(MAX_US - 1) + 1
+
+def bucket_indices(us: np.ndarray) -> np.ndarray:
+    # bucket_index elementwise; frexp's exponent is the bit length of each (exactly representable) value
+    us = np.clip(us, 0, MAX_US - 1).astype(np.int64)
+    e = np.maximum(np.frexp(us.astype(np.float64))[1] - SUB_BITS - 1, 0)
+    return (e << SUB_BITS) + (us >> e)
+
+def _bucket_lows() -> np.ndarray:
+    idx = np.arange(N_BUCKETS, dtype=np.int64)
+    e = np.maximum((idx >> SUB_BITS) - 1, 0)
+    return (idx - (e << SUB_BITS)) << e
+
+BUCKET_LOW_US = _bucket_lows()
+# highest value each bucket holds, reported for percentiles (as HDR histograms do)
+BUCKET_HIGH_US = np.append(BUCKET_LOW_US[1:] - 1, MAX_US - 1)
+
+# le bounds of the Prometheus histograms, microseconds
+PROM_BOUNDS_US = (10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000,
+                  250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+_PROM_IDX = np.array([bucket_index(b) for b in PROM_BOUNDS_US])
+
+class HistogramSet:
+    # One fixed-bucket histogram per (stage, key), e.g. key = (coin, channel): a (stages x keys x
+    # N_BUCKETS) count array whose key axis grows by doubling, plus per-histogram sum and max.
+    def __init__(self, stages: Sequence[str], labels: Sequence[str], capacity: int = 16):
+        self.stages = tuple(stages)
+        self.labels = tuple(labels)
+        self.keys: List[Tuple[str, ...]] = []
+        self._index: Dict[Tuple[str, ...], int] = {}
+        self.capacity = capacity
+        self.counts = np.zeros((len(self.stages), capacity, N_BUCKETS), dtype=np.int64)
+        self.sum_us = np.zeros((len(self.stages), capacity), dtype=np.int64)
+        self.max_us = np.zeros((len(self.stages), capacity), dtype=np.int64)
+
+    def key_id(self, key: Tuple[str, ...]) -> int:
+        i = self._index.get(key)
+        if i is None:
+            i = len(self.keys)
+            if i == self.capacity:
+                self._grow()
+            self.keys.append(key)
+            self._index[key] = i
+        return i
+
+    def _grow(self) -> None:
+        n = self.capacity
+        self.capacity *= 2
+        for name in ("counts", "sum_us", "max_us"):
+            old = getattr(self, name)
+            new = np.zeros((old.shape[0], self.capacity) + old.shape[2:], dtype=old.dtype)
+            new[:, :n] = old
+            setattr(self, name, new)
+
+    def record(self, stage: int, key: Tuple[str, ...], us: int) -> None:
+        i = self.key_id(key)
+        us = max(us, 0)
+        self.counts[stage, i, bucket_index(us)] += 1
+        self.sum_us[stage, i] += us
+        if us > self.max_us[stage, i]:
+            self.max_us[stage, i] = us
+
+    def record_many(self, stage: int, ids: np.ndarray, us: np.ndarray) -> None:
+        if not len(ids):
+            return
+        us = np.maximum(us, 0)
+        k = int(ids.max()) + 1
+        flat = np.bincount(ids * N_BUCKETS + bucket_indices(us), minlength=k * N_BUCKETS)
+        self.counts[stage, :k] += flat.reshape(k, N_BUCKETS)
+        self.sum_us[stage, :k] += np.bincount(ids, weights=us, minlength=k).astype(np.int64)
+        np.maximum.at(self.max_us[stage], ids, us)
+
+    def merged(self, stage: int, rows: Sequence[int]) -> dict:
+        # count / mean / percentiles / max over the histograms of `rows`, microseconds
+        rows = list(rows)
+        counts = self.counts[stage, rows].sum(axis=0)
+        n = int(counts.sum())
+        if not n:
+            return {"count": 0}
+        cum = np.cumsum(counts)
+        out = {"count": n, "mean": float(self.sum_us[stage, rows].sum()) / n}
+        for q in (50, 90, 99, 99.9):
+            i = int(np.searchsorted(cum, n * q / 100.0))
+            out[f"p{q:g}"] = int(BUCKET_HIGH_US[min(i, N_BUCKETS - 1)])
+        out["max"] = int(self.max_us[stage, rows].max())
+        return out
+
+    def group(self, by: Sequence[str]) -> Dict[Tuple[str, ...], List[int]]:
+        # rows grouped by the named labels (by=() merges everything)
+        pos = [self.labels.index(b) for b in by]
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, key in enumerate(self.keys):
+            groups.setdefault(tuple(key[p] for p in pos), []).append(i)
+        return groups
+
+MESSAGE_STAGES = ("exchange_to_receipt", "decode", "apply")
+# fields of a pending message row: (coin, channel, src_ms, t0_ns, t1_ns, t2_ns)
+_key = operator.itemgetter(0, 1)
+_COLS = tuple(operator.itemgetter(i) for i in range(2, 6))
+SNAPSHOT_STAGES = ("snapshot", "serialize")
+
+class LatencyTracker:
+    # Where the time goes between an exchange event and a served signal:
+    #   exchange_to_receipt  frame received (wall clock) minus the exchange timestamp it carries
+    #   decode               raw frame -> typed records
+    #   apply                state update plus listeners (includes eager snapshot refreshes)
+    # per (coin, channel), and per (coin, horizon)
+    #   snapshot             features -> regime / edge envelope
+    #   serialize            envelope -> JSON body
+    # The per-message hot path takes three perf_counter_ns readings and appends one tuple; batches are
+    # bucketed with numpy on flush() (every `batch` messages, and before any read). Receipt wall time
+    # is derived from the first reading plus a wall-minus-perf clock offset taken at each flush.
+    # Not thread-safe: message(), flush() and the reads belong on the thread that ingests (the event loop).
+    def __init__(self, batch: int = 4096):
+        self.batch = batch
+        self.messages = HistogramSet(MESSAGE_STAGES, ("coin", "channel"))
+        self.snapshots = HistogramSet(SNAPSHOT_STAGES, ("coin", "horizon"))
+        self.pending: List[tuple] = []  # message() rows not yet in the histograms
+        self._offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def message(self, coin: str, channel: str, src_ms: int, t0_ns: int, t1_ns: int, t2_ns: int) -> None:
+        # src_ms: exchange timestamp (0 = none); t0..t2: perf_counter_ns at receipt / before decode,
+        # after decode, after apply. HyperliquidWS.on_frame inlines this append.
+        p = self.pending
+        p.append((coin, channel, src_ms, t0_ns, t1_ns, t2_ns))
+        if len(p) >= self.batch:
+            self.flush()
+
+    def snapshot(self, coin: str, horizon: Optional[str], t0_ns: int, t1_ns: int, t2_ns: int) -> None:
+        key = (coin, horizon or "count")
+        self.snapshots.record(0, key, (t1_ns - t0_ns + 500) // 1000)
+        self.snapshots.record(1, key, (t2_ns - t1_ns + 500) // 1000)
+
+    def flush(self) -> None:
+        p = self.pending
+        if not p:
+            return
+        self.pending = []
+        hs = self.messages
+        n = len(p)
+        keys = list(map(_key, p))
+        ids = list(map(hs._index.get, keys))  # C-level lookups; only unseen keys take the slow path
+        if None in ids:
+            ids = list(map(hs.key_id, keys))
+        ids = np.array(ids, dtype=np.int64)
+        src, t0, t1, t2 = (np.fromiter(map(col, p), dtype=np.int64, count=n) for col in _COLS)
+        has_src = src > 0
+        lag = (t0[has_src] + self._offset_ns) // 1000 - src[has_src] * 1000
+        self._offset_ns = time.time_ns() - time.perf_counter_ns()
+        hs.record_many(0, ids[has_src], lag)
+        hs.record_many(1, ids, (t1 - t0 + 500) // 1000)
+        hs.record_many(2, ids, (t2 - t1 + 500) // 1000)
+
+    def _sets(self):
+        for hs in (self.messages, self.snapshots):
+            for s, stage in enumerate(hs.stages):
+                yield hs, s, stage
+
+    def summary(self, coin: Optional[str] = None) -> dict:
+        # per stage: all coins merged, then by channel / horizon; coin= restricts to one coin
+        self.flush()
+        out = {}
+        for hs, s, stage in self._sets():
+            by = hs.labels[1]
+            rows = [i for i, key in enumerate(hs.keys) if coin is None or key[0] == coin]
+            entry = {"all": hs.merged(s, rows), by: {}}
+            for (label,), group in sorted(hs.group((by,)).items()):
+                group = [i for i in group if coin is None or hs.keys[i][0] == coin]
+                if group:
+                    entry[by][label] = hs.merged(s, group)
+            out[stage] = entry
+        return out
+
+    def prometheus(self, per_coin: bool = False) -> str:
+        # Prometheus text exposition: one histogram family, labelled by stage and channel / horizon
+        # (and coin with per_coin). le bounds are resolved to the histogram's bucket precision.
+        self.flush()
+        name = "hl_latency_seconds"
+        lines = [
+            f"# HELP {name} Exchange-to-signal pipeline latency by stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for hs, s, stage in self._sets():
+            by = hs.labels if per_coin else hs.labels[1:]
+            for labels, rows in sorted(hs.group(by).items()):
+                tags = ",".join([f'stage="{stage}"'] + [f'{k}="{v}"' for k, v in zip(by, labels)])
+                counts = hs.counts[s, rows].sum(axis=0)
+                n = int(counts.sum())
+                if not n:
+                    continue
+                cum = np.cumsum(counts)[_PROM_IDX]
+                for bound, c in zip(PROM_BOUNDS_US, cum.tolist()):
+                    lines.append(f'{name}_bucket{{{tags},le="{bound / 1e6:g}"}} {c}')
+                lines.append(f'{name}_bucket{{{tags},le="+Inf"}} {n}')
+                lines.append(f"{name}_sum{{{tags}}} {int(hs.sum_us[s, rows].sum()) / 1e6:g}")
+                lines.append(f"{name}_count{{{tags}}} {n}")
+        return "\n".join(lines) + "\n"
@@ -1,10 +1,15 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, Deque, Optional, Tuple, List
-from collections import deque
+from typing import Callable, Dict, Optional, Sequence, Tuple, List
+import math
 import time
 
-@dataclass
+import numpy as np
+
+from ingestion.messages import AssetCtx, Candle, L2Update, Side, Trade
+from ingestion.orderbook import OrderBook
+
+@dataclass(slots=True)
 class BookTop:
     bid_px: float = 0.0
     bid_sz: float = 0.0
@@ -13,78 +18,509 @@ class BookTop:
     spread: float = 0.0
     mid: float = 0.0
 
-@dataclass
 class RollingWindow:
-    maxlen: int
-    values: Deque[float] = field(default_factory=deque)
+    # Fixed-capacity ring buffer over a preallocated float64 array. Every sample is written
+    # twice (slot i and i + maxlen) so the live window is always one contiguous slice,
+    # which lets view() hand feature code an ordered, zero-copy array.
+    __slots__ = ("maxlen", "_buf", "_mv", "_count", "_head", "_n", "_mean", "_m2", "_since_resync")
+
+    def __init__(self, maxlen: int, buf: Optional[np.ndarray] = None, count: Optional[np.ndarray] = None):
+        self.maxlen = maxlen
+        # buf: optional zeroed float64 storage of length 2 * maxlen, e.g. a row of a WindowTable;
+        # count: optional 1-element int64 array mirroring len(self) (only written while filling up)
+        self._buf = np.zeros(2 * maxlen, dtype=np.float64) if buf is None else buf
+        self._mv = memoryview(self._buf)  # scalar reads/writes via the buffer protocol avoid NumPy boxing
+        self._count = memoryview(count) if count is not None else None
+        self._head = 0  # index of the oldest sample once the window is full
+        self._n = 0
+        # running stats (sliding Welford), readable in O(1) without copying the window
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
 
     def push(self, x: float) -> None:
-        self.values.append(float(x))
-        while len(self.values) > self.maxlen:
-            self.values.popleft()
+        x = float(x)
+        buf = self._mv
+        m = self.maxlen
+        n = self._n
+        if n < m:
+            buf[n] = x
+            buf[n + m] = x
+            n += 1
+            self._n = n
+            if self._count is not None:
+                self._count[0] = n
+            delta = x - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (x - self._mean)
+        else:
+            h = self._head
+            old = buf[h]
+            buf[h] = x
+            buf[h + m] = x
+            self._head = h + 1 if h + 1 < m else 0
+            # replace old with x: mean shifts by (x - old) / n
+            prev_mean = self._mean
+            self._mean = prev_mean + (x - old) / n
+            self._m2 += (x - old) * (x - self._mean + old - prev_mean)
+        self._since_resync += 1
+        if self._since_resync >= m:
+            self._resync()
+
+    def _resync(self) -> None:
+        # periodic exact recomputation bounds floating-point drift from the incremental updates
+        self._since_resync = 0
+        if not self._n:
+            self._mean = self._m2 = 0.0
+            return
+        v = self.view()
+        mean = float(v.mean())
+        d = v - mean
+        self._mean = mean
+        self._m2 = float(d @ d)
+
+    def dump(self) -> Tuple[np.ndarray, int, int, int, float, float]:
+        # (storage, n, head, since_resync, mean, m2): what restore() needs to continue exactly where
+        # this window is; storage is the live buffer, valid until the next push
+        return self._buf, self._n, self._head, self._since_resync, self._mean, self._m2
+
+    def restore(self, buf: np.ndarray, n: int, head: int, since_resync: int, mean: float, m2: float) -> None:
+        self._buf[:] = buf
+        self._n, self._head, self._since_resync = n, head, since_resync
+        if self._count is not None:
+            self._count[0] = n
+        self._mean, self._m2 = mean, m2
+
+    def rebind(self, buf: np.ndarray, count: Optional[np.ndarray] = None) -> None:
+        # move onto new storage holding a copy of the current contents
+        self._buf = buf
+        self._mv = memoryview(buf)
+        self._count = memoryview(count) if count is not None else None
+
+    def __len__(self) -> int:
+        return self._n
+
+    def view(self) -> np.ndarray:
+        # oldest -> newest; a read-only view into the ring, valid until the next push
+        v = self._buf[self._head:self._head + self._n]
+        v.flags.writeable = False
+        return v
+
+    def mean(self) -> float:
+        return self._mean if self._n else 0.0
+
+    def std(self) -> float:
+        n = self._n
+        if not n:
+            return 0.0
+        return math.sqrt(max(0.0, self._m2) / n)
 
     def as_list(self) -> List[float]:
-        return list(self.values)
+        return self.view().tolist()
 
-@dataclass
+# Event-time horizons served alongside the count-based windows (label -> milliseconds).
+DEFAULT_HORIZONS: Dict[str, int] = {"10s": 10_000, "60s": 60_000, "5m": 300_000}
+
+def parse_horizon(label: str) -> int:
+    # "250ms", "10s", "5m", "1h" -> milliseconds
+    units = (("ms", 1), ("s", 1_000), ("m", 60_000), ("h", 3_600_000))
+    for suffix, mult in units:
+        if label.endswith(suffix) and label[:-len(suffix)].isdigit():
+            return int(label[:-len(suffix)]) * mult
+    raise ValueError(f"Bad horizon {label!r}; expected e.g. 10s, 60s, 5m")
+
+TIME_CAPACITY = 1024  # TimeWindow default sample capacity
+
+class TimeWindow:
+    # Samples keyed by event timestamp, stored once in a fixed-capacity ring and shared by several
+    # horizons. Each horizon keeps its own head pointer and running (Welford) stats; timestamps arrive
+    # in order, so heads only move forward and eviction is amortized O(1) per horizon per push.
+    # Horizons are relative to the newest event seen (data time, not wall clock), which keeps replay
+    # deterministic. If a horizon holds more than `capacity` samples, its oldest samples are dropped.
+    __slots__ = ("labels", "horizons_ms", "capacity", "_ts", "_vals", "_tsv", "_vv", "_seq", "_last_ts",
+                 "_heads", "_n", "_mean", "_m2", "_since_resync", "_index")
+
+    def __init__(self, horizons: Dict[str, int], capacity: int = TIME_CAPACITY):
+        self.labels = tuple(horizons)
+        self.horizons_ms = tuple(horizons.values())
+        self._index = {label: i for i, label in enumerate(self.labels)}
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._vals = np.zeros(capacity, dtype=np.float64)
+        self._tsv, self._vv = memoryview(self._ts), memoryview(self._vals)
+        self._seq = 0  # total samples ever pushed; sample k lives in slot k % capacity
+        self._last_ts = 0
+        h = len(self.labels)
+        self._heads = [0] * h  # sequence number of each horizon's oldest live sample
+        self._n = [0] * h
+        self._mean = [0.0] * h
+        self._m2 = [0.0] * h
+        self._since_resync = 0
+
+    def push(self, ts_ms: int, x: float) -> None:
+        x = float(x)
+        cap = self.capacity
+        seq = self._seq
+        tsv, vv = self._tsv, self._vv
+        heads, ns, means, m2s = self._heads, self._n, self._mean, self._m2
+        # the slot about to be overwritten must leave every window that still holds it
+        if seq >= cap:
+            for h in range(len(heads)):
+                if heads[h] <= seq - cap:
+                    self._remove(h, vv[heads[h] % cap])
+                    heads[h] += 1
+        i = seq % cap
+        tsv[i] = ts_ms
+        vv[i] = x
+        seq += 1
+        self._seq = seq
+        last = ts_ms if ts_ms > self._last_ts else self._last_ts
+        self._last_ts = last
+        for h, horizon in enumerate(self.horizons_ms):
+            n = ns[h] + 1
+            ns[h] = n
+            d = x - means[h]
+            means[h] += d / n
+            m2s[h] += d * (x - means[h])
+            cutoff = last - horizon
+            head = heads[h]
+            while head < seq and tsv[head % cap] <= cutoff:
+                self._remove(h, vv[head % cap])
+                head += 1
+            heads[h] = head
+        self._since_resync += 1
+        if self._since_resync >= cap:
+            self._resync()
+
+    def _remove(self, h: int, y: float) -> None:
+        n = self._n[h] - 1
+        self._n[h] = n
+        if n <= 0:
+            self._n[h] = 0
+            self._mean[h] = self._m2[h] = 0.0
+            return
+        mean = self._mean[h]
+        d = y - mean
+        mean -= d / n
+        self._mean[h] = mean
+        self._m2[h] -= d * (y - mean)
+
+    def _resync(self) -> None:
+        # periodic exact recomputation bounds floating-point drift from the incremental updates
+        self._since_resync = 0
+        for h in range(len(self._heads)):
+            v = self.view(self.labels[h])
+            if len(v):
+                mean = float(v.mean())
+                d = v - mean
+                self._mean[h], self._m2[h] = mean, float(d @ d)
+            else:
+                self._mean[h] = self._m2[h] = 0.0
+
+    def dump(self) -> dict:
+        # ring position, per-horizon heads and stats, and the live samples (from the oldest head on,
+        # copied): what restore() needs to continue exactly where this window is
+        seq = self._seq
+        idx = np.arange(min(self._heads, default=seq), seq) % self.capacity
+        return {"seq": seq, "last_ts": self._last_ts, "since_resync": self._since_resync,
+                "heads": list(self._heads), "n": list(self._n), "mean": list(self._mean), "m2": list(self._m2),
+                "ts": self._ts[idx], "vals": self._vals[idx]}
+
+    def restore(self, seq: int, last_ts: int, since_resync: int, heads: List[int], n: List[int],
+                mean: List[float], m2: List[float], ts: np.ndarray, vals: np.ndarray) -> None:
+        # into a window with the same horizons and capacity
+        self._seq, self._last_ts, self._since_resync = seq, last_ts, since_resync
+        self._heads, self._n, self._mean, self._m2 = list(heads), list(n), list(mean), list(m2)
+        idx = np.arange(seq - len(ts), seq) % self.capacity
+        self._ts[idx] = ts
+        self._vals[idx] = vals
+
+    def view(self, label: str) -> np.ndarray:
+        # samples in the horizon, oldest -> newest (a copy only if the window wraps the ring)
+        h = self._index[label]
+        n, cap = self._n[h], self.capacity
+        start = self._heads[h] % cap
+        if start + n <= cap:
+            return self._vals[start:start + n]
+        return np.concatenate((self._vals[start:], self._vals[:start + n - cap]))
+
+    def count(self, label: str) -> int:
+        return self._n[self._index[label]]
+
+    def mean(self, label: str) -> float:
+        h = self._index[label]
+        return self._mean[h] if self._n[h] else 0.0
+
+    def std(self, label: str) -> float:
+        h = self._index[label]
+        n = self._n[h]
+        if not n:
+            return 0.0
+        return math.sqrt(max(0.0, self._m2[h]) / n)
+
+class SeriesRing:
+    # Bounded per-coin time series: rows of float64 fields keyed by event time, in a fixed-capacity ring
+    # (the oldest row is overwritten once full). Rows are bucketed: a push that falls in the newest row's
+    # bucket (bucket_ms = 0: same timestamp) overwrites that row, so a candle updated in place or an
+    # asset context re-sent many times a minute costs no extra memory. Late pushes also land in the
+    # newest row, keeping timestamps ordered.
+    __slots__ = ("fields", "capacity", "bucket_ms", "_ts", "_vals", "_seq", "_index")
+
+    def __init__(self, fields: Sequence[str], capacity: int, bucket_ms: int = 0):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.bucket_ms = bucket_ms
+        self._index = {f: j for j, f in enumerate(self.fields)}
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._vals = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._seq = 0  # rows ever started; row k lives in slot k % capacity
+
+    def push(self, ts_ms: int, values: Sequence[float]) -> None:
+        seq = self._seq
+        if seq:
+            last = int(self._ts[(seq - 1) % self.capacity])
+            b = self.bucket_ms
+            if ts_ms <= last or (b and ts_ms // b == last // b):
+                i = (seq - 1) % self.capacity
+                self._ts[i] = max(ts_ms, last)
+                self._vals[i] = values
+                return
+        i = seq % self.capacity
+        self._ts[i] = ts_ms
+        self._vals[i] = values
+        self._seq = seq + 1
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def _order(self, a: np.ndarray) -> np.ndarray:
+        # oldest -> newest (a copy only once the ring has wrapped)
+        if self._seq <= self.capacity:
+            return a[:self._seq]
+        h = self._seq % self.capacity
+        return np.concatenate((a[h:], a[:h]))
+
+    def times(self) -> np.ndarray:
+        return self._order(self._ts)
+
+    def dump(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        # rows ever started, and the live rows oldest -> newest (views until the ring wraps)
+        return self._seq, self.times(), self._order(self._vals)
+
+    def restore(self, seq: int, ts: np.ndarray, vals: np.ndarray) -> None:
+        idx = np.arange(seq - len(ts), seq) % self.capacity
+        self._ts[idx] = ts
+        self._vals[idx] = vals
+        self._seq = seq
+
+    def column(self, name: str) -> np.ndarray:
+        return self._order(self._vals[:, self._index[name]])
+
+    def last(self, name: str) -> float:
+        if not self._seq:
+            return 0.0
+        return float(self._vals[(self._seq - 1) % self.capacity, self._index[name]])
+
+# candle / activeAssetCtx series kept per coin: a day of 1m candles, and the asset context sampled
+# once a minute (the latest value seen in each minute) for a day
+CANDLE_FIELDS = ("o", "h", "l", "c", "v", "n")
+CTX_FIELDS = ("funding", "open_interest", "mark_px", "oracle_px", "premium")
+SERIES_ROWS = 1440
+CTX_BUCKET_MS = 60_000
+OI_CHANGE_MS = 300_000  # open interest change lookback
+# features derived from the asset context series, in FEATURE_KEYS order
+CTX_KEYS = ("oi_change", "funding_z")
+
+def ctx_features(ctx: SeriesRing) -> Dict[str, float]:
+    # oi_change: relative open interest change over OI_CHANGE_MS (or since the oldest row, if younger);
+    # funding_z: current funding rate as a z-score against the funding history in the series
+    ts = ctx.times()
+    oi = ctx.column("open_interest")
+    ref = max(0, int(np.searchsorted(ts, ts[-1] - OI_CHANGE_MS, side="right")) - 1)
+    oi_change = oi[-1] / oi[ref] - 1.0 if oi[ref] > 0 else 0.0
+    f = ctx.column("funding")
+    lo, hi = f.min(), f.max()
+    # a constant history (one row, or an unchanged rate) has no spread to score against
+    funding_z = (f[-1] - f.mean()) / f.std() if hi > lo else 0.0
+    return {"oi_change": float(oi_change), "funding_z": float(funding_z)}
+
+TIMED_SERIES = ("mid_returns", "vol_imbalance", "spread_norm", "trade_imbalance")
+WINDOW_LEN = 120
+
+class WindowTable:
+    # Storage for the count-based windows of every coin: one (series x coins x 2 * maxlen) sample
+    # array plus a (series x coins) length array, row [s, i] backing coin i's RollingWindow for
+    # series s. Per-coin pushes are unchanged; universe-wide code (features.universe) reduces over
+    # all coins and series at once. Rows are handed out in order and the arrays grow by doubling,
+    # rebinding the windows to the new storage.
+    def __init__(self, series: Sequence[str] = TIMED_SERIES, maxlen: int = WINDOW_LEN, capacity: int = 64):
+        self.series = tuple(series)
+        self.maxlen = maxlen
+        self.capacity = capacity
+        self.coins: List[str] = []
+        self.states: List[CoinState] = []
+        self.buf = np.zeros((len(self.series), capacity, 2 * maxlen))
+        self.n = np.zeros((len(self.series), capacity), dtype=np.int64)
+        self.windows: List[List[RollingWindow]] = [[] for _ in self.series]
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+    def attach(self, cs: CoinState) -> None:
+        # give a fresh CoinState windows backed by the next row
+        row = len(self.coins)
+        if row == self.capacity:
+            self._grow()
+        self.coins.append(cs.coin)
+        self.states.append(cs)
+        for s, name in enumerate(self.series):
+            w = RollingWindow(self.maxlen, buf=self.buf[s, row], count=self.n[s, row:row + 1])
+            setattr(cs, name, w)
+            self.windows[s].append(w)
+
+    def _grow(self) -> None:
+        old_buf, old_n = self.buf, self.n
+        self.capacity *= 2
+        self.buf = np.zeros((old_buf.shape[0], self.capacity, old_buf.shape[2]))
+        self.buf[:, :old_buf.shape[1]] = old_buf
+        self.n = np.zeros((old_n.shape[0], self.capacity), dtype=np.int64)
+        self.n[:, :old_n.shape[1]] = old_n
+        for s, ws in enumerate(self.windows):
+            for row, w in enumerate(ws):
+                w.rebind(self.buf[s, row], self.n[s, row:row + 1])
+
+    def counts(self) -> np.ndarray:
+        # (series x coins) window lengths
+        return self.n[:, :len(self.coins)]
+
+    def samples(self) -> np.ndarray:
+        # (series x coins x maxlen): every live sample of each window, in ring order (not time
+        # order); unfilled slots of a window that is not full yet are zero
+        return self.buf[:, :len(self.coins), :self.maxlen]
+
+@dataclass(slots=True)
 class CoinState:
     coin: str
     last_trade_ms: int = 0
     last_book_ms: int = 0
+    # bumped on every state change; lets readers cache anything derived from this coin
+    version: int = 0
     book_top: BookTop = field(default_factory=BookTop)
+    # full-depth book; depth features are maintained on update
+    book: OrderBook = field(default_factory=OrderBook)
     # rolling windows for simple, explainable signals
-    mid_returns: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=120))
-    vol_imbalance: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=120))
-    spread_norm: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=120))
-    trade_imbalance: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=120))
-    vol_z: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=120))
+    mid_returns: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=WINDOW_LEN))
+    vol_imbalance: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=WINDOW_LEN))
+    spread_norm: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=WINDOW_LEN))
+    trade_imbalance: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=WINDOW_LEN))
+    vol_z: RollingWindow = field(default_factory=lambda: RollingWindow(maxlen=WINDOW_LEN))
+    # event-time windows over the same series, one shared buffer per series for all horizons
+    horizons: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_HORIZONS))
+    timed: Dict[str, TimeWindow] = field(default_factory=dict)
+    # candle / asset context series, allocated on the coin's first such message
+    candles: Optional[SeriesRing] = None
+    ctx: Optional[SeriesRing] = None
+    ctx_features: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(CTX_KEYS, 0.0))
 
     _prev_mid: Optional[float] = None
 
+    def __post_init__(self) -> None:
+        for name in TIMED_SERIES:
+            self.timed[name] = TimeWindow(self.horizons)
+
+    def resync(self) -> None:
+        # the feed is about to resume after a gap: the next mid starts a new return series
+        self._prev_mid = None
+
+    def update_book(self, u: L2Update) -> None:
+        bids, asks = u.bids, u.asks
+        if not (bids and asks):
+            return
+        self.book.apply(bids, asks)
+        bid, ask = bids[0], asks[0]
+        self.update_book_top(bid.px, bid.sz, ask.px, ask.sz, u.time)
+
     def update_book_top(self, bid_px: float, bid_sz: float, ask_px: float, ask_sz: float, ts_ms: int) -> None:
         self.last_book_ms = ts_ms
+        self.version += 1
         spread = max(0.0, ask_px - bid_px) if bid_px and ask_px else 0.0
         mid = (ask_px + bid_px) / 2.0 if bid_px and ask_px else 0.0
         self.book_top = BookTop(bid_px, bid_sz, ask_px, ask_sz, spread, mid)
+        timed = self.timed
         if mid > 0 and self._prev_mid and self._prev_mid > 0:
             r = (mid / self._prev_mid) - 1.0
             self.mid_returns.push(r)
+            timed["mid_returns"].push(ts_ms, r)
         if mid > 0:
             self._prev_mid = mid
         # order book imbalance: (bidSz - askSz) / (bidSz + askSz)
         denom = (bid_sz + ask_sz)
         imb = (bid_sz - ask_sz) / denom if denom > 0 else 0.0
         self.vol_imbalance.push(imb)
+        timed["vol_imbalance"].push(ts_ms, imb)
         # normalize spread by mid
         spr = (spread / mid) if mid > 0 else 0.0
         self.spread_norm.push(spr)
+        timed["spread_norm"].push(ts_ms, spr)
 
-    def update_trades(self, trades: list, ts_ms: int) -> None:
-        # trades: array of {side, px, sz, ...} from ws
+    def update_trades(self, trades: Sequence[Trade], ts_ms: int) -> None:
+        # trades: parsed Trade records from ingestion.messages
         self.last_trade_ms = ts_ms
+        self.version += 1
         buy = 0.0
         sell = 0.0
         for t in trades:
-            sz = float(t.get("sz", 0.0))
-            side = str(t.get("side", "")).lower()
-            if side == "b" or side == "buy":
-                buy += sz
-            elif side == "s" or side == "sell":
-                sell += sz
+            side = t.side
+            if side is Side.BUY:
+                buy += t.sz
+            elif side is Side.SELL:
+                sell += t.sz
         denom = buy + sell
         imb = (buy - sell) / denom if denom > 0 else 0.0
         self.trade_imbalance.push(imb)
+        self.timed["trade_imbalance"].push(ts_ms, imb)
+
+    def update_ctx(self, ctx: AssetCtx, ts_ms: int) -> None:
+        self.version += 1
+        series = self.ctx
+        if series is None:
+            series = self.ctx = SeriesRing(CTX_FIELDS, SERIES_ROWS, CTX_BUCKET_MS)
+        premium = ctx.premium
+        series.push(ts_ms, (ctx.funding, ctx.open_interest, ctx.mark_px, ctx.oracle_px,
+                            math.nan if premium is None else premium))
+        self.ctx_features = ctx_features(series)
+
+    def update_candle(self, c: Candle) -> None:
+        # no feature reads candles yet, so the version (and anything cached on it) is left alone
+        series = self.candles
+        if series is None:
+            series = self.candles = SeriesRing(CANDLE_FIELDS, SERIES_ROWS)
+        series.push(c.open_ms, (c.o, c.h, c.l, c.c, c.v, c.n))
 
 @dataclass
 class MarketState:
     start_time: float = field(default_factory=time.time)
     coins: Dict[str, CoinState] = field(default_factory=dict)
     ws_connected: bool = False
+    horizons: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_HORIZONS))
+    # called with the CoinState after each ingested update (snapshot cache, streaming, ...)
+    listeners: List[Callable[[CoinState], None]] = field(default_factory=list)
+    # count-based windows of all coins, row order = order coins were first seen
+    windows: WindowTable = field(default_factory=WindowTable)
+
+    def add_listener(self, fn: Callable[[CoinState], None]) -> None:
+        self.listeners.append(fn)
+
+    def notify(self, cs: CoinState) -> None:
+        for fn in self.listeners:
+            fn(cs)
 
     def ensure_coin(self, coin: str) -> CoinState:
-        if coin not in self.coins:
-            self.coins[coin] = CoinState(coin=coin)
-        return self.coins[coin]
+        cs = self.coins.get(coin)
+        if cs is None:
+            cs = self.coins[coin] = CoinState(coin=coin, horizons=self.horizons)
+            self.windows.attach(cs)
+        return cs
 
     def uptime_sec(self) -> float:
         return time.time() - self.start_time
@@ -0,0 +1,302 @@
+from __future__ import annotations
+from array import array
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from ingestion.decode import Frame, Loads
+
+NAN = float("nan")
+
+# Typed records for the WS channels (trades, l2Book, candle, activeAssetCtx) with numeric fields and an
+# enum side. With msgspec installed, raw frames decode straight into these records in one pass (no dicts);
+# otherwise the same record types are built by hand from the decoded payload.
+
+class Side(str, Enum):
+    # values are Hyperliquid's wire codes: "B" = buy aggressor, "A" = sell (ask) aggressor
+    BUY = "B"
+    SELL = "A"
+    UNKNOWN = "?"
+
+_SIDES: Dict[str, Side] = {
+    "B": Side.BUY, "b": Side.BUY, "buy": Side.BUY,
+    "A": Side.SELL, "a": Side.SELL, "ask": Side.SELL,
+    "S": Side.SELL, "s": Side.SELL, "sell": Side.SELL,
+}
+
+def parse_side(raw) -> Side:
+    s = _SIDES.get(raw)
+    if s is None:
+        s = _SIDES.get(str(raw).lower(), Side.UNKNOWN)
+    return s
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - exercised when msgspec is absent
+    msgspec = None
+
+if msgspec is not None:
+    class Level(msgspec.Struct, gc=False):
+        px: float
+        sz: float
+        n: int = 0
+
+    class Trade(msgspec.Struct, gc=False):
+        px: float
+        sz: float
+        side: Side
+        time: int
+        coin: str = ""
+
+    class L2Update(msgspec.Struct):
+        coin: str
+        time: int
+        levels: List[List[Level]]
+
+        @property
+        def bids(self) -> List[Level]:
+            return self.levels[0] if self.levels else []
+
+        @property
+        def asks(self) -> List[Level]:
+            return self.levels[1] if len(self.levels) > 1 else []
+
+    class Candle(msgspec.Struct, gc=False):
+        # wire names: t / T open and close time, s coin, o h l c v, n trade count
+        open_ms: int = msgspec.field(name="t")
+        close_ms: int = msgspec.field(name="T")
+        coin: str = msgspec.field(name="s")
+        o: float = 0.0
+        h: float = 0.0
+        l: float = 0.0
+        c: float = 0.0
+        v: float = 0.0
+        n: int = 0
+
+    class AssetCtx(msgspec.Struct, gc=False):
+        funding: float = 0.0
+        open_interest: float = msgspec.field(default=0.0, name="openInterest")
+        mark_px: float = msgspec.field(default=NAN, name="markPx")
+        oracle_px: float = msgspec.field(default=NAN, name="oraclePx")
+        premium: Optional[float] = None
+
+    class AssetCtxUpdate(msgspec.Struct):
+        coin: str
+        ctx: AssetCtx
+
+    class _TradesFrame(msgspec.Struct):
+        data: List[Trade]
+
+    class _L2Frame(msgspec.Struct):
+        data: L2Update
+
+    class _CandleFrame(msgspec.Struct):
+        data: Candle
+
+    class _AssetCtxFrame(msgspec.Struct):
+        data: AssetCtxUpdate
+
+    # strict=False lets the decoder turn Hyperliquid's string-encoded px/sz into floats
+    _decode_trades = msgspec.json.Decoder(_TradesFrame, strict=False).decode
+    _decode_l2 = msgspec.json.Decoder(_L2Frame, strict=False).decode
+    _decode_candle = msgspec.json.Decoder(_CandleFrame, strict=False).decode
+    _decode_ctx = msgspec.json.Decoder(_AssetCtxFrame, strict=False).decode
+    _DecodeError = msgspec.DecodeError
+else:
+    class Level:
+        __slots__ = ("px", "sz", "n")
+
+        def __init__(self, px: float, sz: float, n: int = 0):
+            self.px = px
+            self.sz = sz
+            self.n = n
+
+    class Trade:
+        __slots__ = ("px", "sz", "side", "time", "coin")
+
+        def __init__(self, px: float, sz: float, side: Side, time: int, coin: str = ""):
+            self.px = px
+            self.sz = sz
+            self.side = side
+            self.time = time
+            self.coin = coin
+
+    class L2Update:
+        __slots__ = ("coin", "time", "levels")
+
+        def __init__(self, coin: str, time: int, levels: List[List[Level]]):
+            self.coin = coin
+            self.time = time
+            self.levels = levels
+
+        @property
+        def bids(self) -> List[Level]:
+            return self.levels[0] if self.levels else []
+
+        @property
+        def asks(self) -> List[Level]:
+            return self.levels[1] if len(self.levels) > 1 else []
+
+    class Candle:
+        __slots__ = ("open_ms", "close_ms", "coin", "o", "h", "l", "c", "v", "n")
+
+        def __init__(self, open_ms: int, close_ms: int, coin: str, o: float = 0.0, h: float = 0.0,
+                     l: float = 0.0, c: float = 0.0, v: float = 0.0, n: int = 0):
+            self.open_ms = open_ms
+            self.close_ms = close_ms
+            self.coin = coin
+            self.o = o
+            self.h = h
+            self.l = l
+            self.c = c
+            self.v = v
+            self.n = n
+
+    class AssetCtx:
+        __slots__ = ("funding", "open_interest", "mark_px", "oracle_px", "premium")
+
+        def __init__(self, funding: float = 0.0, open_interest: float = 0.0, mark_px: float = NAN,
+                     oracle_px: float = NAN, premium: Optional[float] = None):
+            self.funding = funding
+            self.open_interest = open_interest
+            self.mark_px = mark_px
+            self.oracle_px = oracle_px
+            self.premium = premium
+
+    class AssetCtxUpdate:
+        __slots__ = ("coin", "ctx")
+
+        def __init__(self, coin: str, ctx: AssetCtx):
+            self.coin = coin
+            self.ctx = ctx
+
+    _decode_trades = _decode_l2 = _decode_candle = _decode_ctx = None
+    _DecodeError = ValueError
+
+class LevelArrays:
+    # One side of a book as packed float64 arrays (best first), e.g. straight out of a binary capture.
+    # Indexes like a list of Level; the order book engine reads .px / .sz directly without per-level objects.
+    __slots__ = ("px", "sz", "n")
+
+    def __init__(self, px: array, sz: array, n: array):
+        self.px = px
+        self.sz = sz
+        self.n = n
+
+    def __len__(self) -> int:
+        return len(self.px)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return LevelArrays(self.px[i], self.sz[i], self.n[i])
+        return Level(self.px[i], self.sz[i], int(self.n[i]))
+
+def parse_trades(data: list, default_ms: int) -> List[Trade]:
+    # trades stream: channel "trades" data: WsTrade[] ({coin, side, px, sz, time, hash, tid})
+    return [
+        Trade(
+            px=float(t.get("px", 0.0)),
+            sz=float(t.get("sz", 0.0)),
+            side=parse_side(t.get("side")),
+            time=int(t.get("time", default_ms)),
+            coin=t.get("coin", ""),
+        )
+        for t in data
+    ]
+
+def parse_l2(data: dict, default_ms: int, depth: Optional[int] = None) -> Optional[L2Update]:
+    # order book stream: channel "l2Book" data: {coin, time, levels: [[bids],[asks]]}; depth=None keeps every level
+    coin = data.get("coin")
+    if not coin:
+        return None
+    levels = data.get("levels") or []
+    sides = []
+    for side in levels[:2]:
+        if depth is not None:
+            side = side[:depth]
+        sides.append([Level(px=float(l.get("px", 0.0)), sz=float(l.get("sz", 0.0)), n=int(l.get("n", 0))) for l in side])
+    return L2Update(coin=coin, time=int(data.get("time", default_ms)), levels=sides)
+
+def _num(x, default: float) -> float:
+    return default if x is None else float(x)
+
+def parse_candle(data: dict) -> Optional[Candle]:
+    # candle stream: channel "candle" data: {t, T, s, i, o, c, h, l, v, n}
+    coin = data.get("s")
+    if not coin or data.get("t") is None:
+        return None
+    return Candle(
+        open_ms=int(data["t"]), close_ms=int(data.get("T") or 0), coin=coin,
+        o=_num(data.get("o"), 0.0), h=_num(data.get("h"), 0.0), l=_num(data.get("l"), 0.0),
+        c=_num(data.get("c"), 0.0), v=_num(data.get("v"), 0.0), n=int(data.get("n") or 0),
+    )
+
+def parse_asset_ctx(data: dict) -> Optional[AssetCtxUpdate]:
+    # activeAssetCtx stream: channel "activeAssetCtx" data: {coin, ctx: {funding, openInterest, oraclePx,
+    # markPx, premium, ...}}; premium is null when there is no mark yet
+    coin = data.get("coin")
+    ctx = data.get("ctx")
+    if not coin or not isinstance(ctx, dict):
+        return None
+    premium = ctx.get("premium")
+    return AssetCtxUpdate(coin=coin, ctx=AssetCtx(
+        funding=_num(ctx.get("funding"), 0.0), open_interest=_num(ctx.get("openInterest"), 0.0),
+        mark_px=_num(ctx.get("markPx"), NAN), oracle_px=_num(ctx.get("oraclePx"), NAN),
+        premium=None if premium is None else float(premium),
+    ))
+
+def make_frame_decoders(loads: Loads, now_ms: Callable[[], int]) -> Dict[str, Callable[[Frame], object]]:
+    # channel -> (raw frame -> records). Typed single-pass decode when msgspec is available; frames it
+    # rejects (unexpected side codes, missing fields) fall back to the tolerant dict parser.
+    def trades(raw: Frame) -> Optional[List[Trade]]:
+        if _decode_trades is not None:
+            try:
+                return _decode_trades(raw).data
+            except _DecodeError:
+                pass
+        d = loads(raw).get("data")
+        return parse_trades(d, now_ms()) if isinstance(d, list) else None
+
+    def l2(raw: Frame) -> Optional[L2Update]:
+        if _decode_l2 is not None:
+            try:
+                return _decode_l2(raw).data
+            except _DecodeError:
+                pass
+        d = loads(raw).get("data")
+        return parse_l2(d, now_ms()) if isinstance(d, dict) else None
+
+    def candle(raw: Frame) -> Optional[Candle]:
+        if _decode_candle is not None:
+            try:
+                return _decode_candle(raw).data
+            except _DecodeError:
+                pass
+        d = loads(raw).get("data")
+        return parse_candle(d) if isinstance(d, dict) else None
+
+    def ctx(raw: Frame) -> Optional[AssetCtxUpdate]:
+        if _decode_ctx is not None:
+            try:
+                return _decode_ctx(raw).data
+            except _DecodeError:
+                pass
+        d = loads(raw).get("data")
+        return parse_asset_ctx(d) if isinstance(d, dict) else None
+
+    return {"trades": trades, "l2Book": l2, "candle": candle, "activeAssetCtx": ctx}
+
+def make_payload_parsers(now_ms: Callable[[], int]) -> Dict[str, Callable[[object], object]]:
+    # channel -> (decoded "data" payload -> records), for already-decoded messages (e.g. NDJSON replay)
+    def trades(d) -> Optional[List[Trade]]:
+        return parse_trades(d, now_ms()) if isinstance(d, list) else None
+
+    def l2(d) -> Optional[L2Update]:
+        return parse_l2(d, now_ms()) if isinstance(d, dict) else None
+
+    def candle(d) -> Optional[Candle]:
+        return parse_candle(d) if isinstance(d, dict) else None
+
+    def ctx(d) -> Optional[AssetCtxUpdate]:
+        return parse_asset_ctx(d) if isinstance(d, dict) else None
+
+    return {"trades": trades, "l2Book": l2, "candle": candle, "activeAssetCtx": ctx}
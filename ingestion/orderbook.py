@@ -0,0 +1,181 @@
+from __future__ import annotations
+import math
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from operator import mul
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ingestion.messages import LevelArrays
+
+# Full-depth L2 book per coin. Each side keeps its levels in packed float64 arrays (best level first)
+# together with running aggregates, so depth features are maintained on update rather than on read.
+#
+# Distances are measured in bps from the side's own best price, which keeps the two sides independent:
+# a side whose levels did not change costs nothing. Snapshots are diffed against the stored side;
+# when only sizes changed at unchanged prices (the common case) the aggregates are adjusted by the
+# size deltas, and only a price change rebuilds the side.
+
+DEFAULT_BANDS_BPS: Tuple[float, ...] = (5.0, 25.0)
+DEFAULT_DECAY_BPS = 5.0
+_RESYNC_EVERY = 256  # incremental updates between exact recomputations (bounds float drift)
+
+class BookSide:
+    __slots__ = (
+        "capacity", "bands", "decay_bps", "px", "sz",
+        "_dist", "_weight", "_dsuffix", "_cuts",
+        "total", "weighted", "within", "slope_num", "slope_den", "_since_resync",
+    )
+
+    def __init__(self, capacity: int = 64, bands: Sequence[float] = DEFAULT_BANDS_BPS, decay_bps: float = DEFAULT_DECAY_BPS):
+        self.capacity = capacity
+        self.bands = tuple(sorted(bands))
+        self.decay_bps = decay_bps
+        # level storage (best first) as packed float64 arrays; whole-side comparisons run in C
+        self.px = array("d")
+        self.sz = array("d")
+        # per-level coefficients, fixed until the side's prices change
+        self._dist: List[float] = []     # bps from best price
+        self._weight: List[float] = []   # exp(-dist / decay)
+        self._dsuffix: List[float] = []  # sum of dist over this level and every deeper one
+        self._cuts: List[int] = [0] * len(self.bands)  # number of levels within each band
+        self.total = 0.0
+        self.weighted = 0.0
+        self.within = [0.0] * len(self.bands)
+        self.slope_num = 0.0  # sum(dist_i * cumulative_size_i)
+        self.slope_den = 0.0  # sum(dist_i ** 2)
+        self._since_resync = 0
+
+    @property
+    def n(self) -> int:
+        return len(self.px)
+
+    def apply(self, levels) -> bool:
+        # levels: sequence of objects with numeric .px / .sz (or a LevelArrays), best first.
+        # Returns True if the side changed.
+        if isinstance(levels, LevelArrays):
+            pxs, szs = levels.px[:self.capacity], levels.sz[:self.capacity]
+        else:
+            levels = levels[:self.capacity]
+            pxs = array("d", [lv.px for lv in levels])
+            szs = array("d", [lv.sz for lv in levels])
+        if pxs != self.px or self._since_resync >= _RESYNC_EVERY:
+            return self._rebuild(pxs, szs)
+        old = self.sz
+        if szs == old:
+            return False
+        # same prices: fold the size deltas into the aggregates
+        weight, dsuffix, cuts, within = self._weight, self._dsuffix, self._cuts, self.within
+        for i, (new, prev) in enumerate(zip(szs, old)):
+            if new != prev:
+                delta = new - prev
+                self.total += delta
+                self.weighted += weight[i] * delta
+                # cumulative size at every level >= i grows by delta
+                self.slope_num += delta * dsuffix[i]
+                for k, cut in enumerate(cuts):
+                    if i < cut:
+                        within[k] += delta
+        self.sz = szs
+        self._since_resync += 1
+        return True
+
+    def _rebuild(self, pxs: array, szs: array) -> bool:
+        self.px, self.sz = pxs, szs
+        self._since_resync = 0
+        n = len(pxs)
+        best = pxs[0] if n else 0.0
+        scale = 1e4 / best if best > 0 else 0.0
+        k = -1.0 / self.decay_bps
+        exp = math.exp
+        dist = [abs(best - p) * scale for p in pxs]
+        weight = [exp(d * k) for d in dist]
+        cum = list(accumulate(szs))
+        self.total = cum[-1] if n else 0.0
+        self.weighted = sum(map(mul, weight, szs))
+        self.slope_num = sum(map(mul, dist, cum))
+        self.slope_den = sum(map(mul, dist, dist))
+        self._dsuffix = list(accumulate(reversed(dist)))[::-1]
+        # dist is non-decreasing with depth, so each band covers a prefix of the levels
+        self._cuts = [bisect_right(dist, band) for band in self.bands]
+        self.within = [cum[c - 1] if c else 0.0 for c in self._cuts]
+        self._dist, self._weight = dist, weight
+        return True
+
+    def dump(self) -> Tuple[array, array, Tuple[float, ...], int]:
+        # levels, running aggregates (total, weighted, slope_num, slope_den, *within) and the updates
+        # since the last exact recomputation
+        return self.px, self.sz, (self.total, self.weighted, self.slope_num, self.slope_den, *self.within), self._since_resync
+
+    def restore(self, px: array, sz: array, aggregates: Sequence[float], since_resync: int) -> None:
+        # the level coefficients follow from the prices; the aggregates are taken as dumped rather
+        # than recomputed, so they carry on exactly as the incrementally updated originals
+        self._rebuild(px, sz)
+        self.total, self.weighted, self.slope_num, self.slope_den, *self.within = aggregates
+        self._since_resync = since_resync
+
+    def best(self) -> Tuple[float, float]:
+        return (self.px[0], self.sz[0]) if self.px else (0.0, 0.0)
+
+    def slope(self) -> float:
+        # least-squares slope through the origin of cumulative size vs distance (size per bps)
+        return self.slope_num / self.slope_den if self.slope_den > 0 else 0.0
+
+    def levels(self) -> Tuple[np.ndarray, np.ndarray]:
+        # zero-copy NumPy views over the stored levels, valid until the next update
+        if not self.px:
+            return np.empty(0), np.empty(0)
+        return np.frombuffer(self.px), np.frombuffer(self.sz)
+
+class OrderBook:
+    __slots__ = ("bids", "asks", "updates", "features")
+
+    def __init__(self, capacity: int = 64, bands: Sequence[float] = DEFAULT_BANDS_BPS, decay_bps: float = DEFAULT_DECAY_BPS):
+        self.bids = BookSide(capacity, bands, decay_bps)
+        self.asks = BookSide(capacity, bands, decay_bps)
+        self.updates = 0
+        self.features: Dict[str, float] = _empty_features(bands)
+
+    def apply(self, bids, asks) -> bool:
+        # Applies a full snapshot (Level-like sequences, best first); recomputes features only if a side changed.
+        changed_b = self.bids.apply(bids)
+        changed_a = self.asks.apply(asks)
+        if changed_b or changed_a:
+            self.updates += 1
+            self._refresh()
+            return True
+        return False
+
+    def restore(self, bids: tuple, asks: tuple, updates: int) -> None:
+        # from each side's BookSide.dump()
+        self.bids.restore(*bids)
+        self.asks.restore(*asks)
+        self.updates = updates
+        self._refresh()
+
+    def _refresh(self) -> None:
+        b, a = self.bids, self.asks
+        bid_px, bid_sz = b.best()
+        ask_px, ask_sz = a.best()
+        f = self.features
+        for k, band in enumerate(b.bands):
+            f[f"depth_{band:g}bps"] = b.within[k] + a.within[k]
+        wsum = b.weighted + a.weighted
+        f["depth_imb"] = (b.weighted - a.weighted) / wsum if wsum > 0 else 0.0
+        top = bid_sz + ask_sz
+        if bid_px > 0 and ask_px > 0 and top > 0:
+            mid = (bid_px + ask_px) / 2.0
+            micro = (bid_px * ask_sz + ask_px * bid_sz) / top
+            f["microprice"] = micro
+            f["micro_dev_bps"] = (micro - mid) / mid * 1e4
+        else:
+            f["microprice"] = 0.0
+            f["micro_dev_bps"] = 0.0
+        f["book_slope"] = (b.slope() + a.slope()) / 2.0
+
+def _empty_features(bands: Sequence[float]) -> Dict[str, float]:
+    f = {f"depth_{band:g}bps": 0.0 for band in bands}
+    f.update(depth_imb=0.0, microprice=0.0, micro_dev_bps=0.0, book_slope=0.0)
+    return f
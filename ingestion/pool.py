@@ -0,0 +1,47 @@
+from __future__ import annotations
+import asyncio
+from typing import Callable, List, Optional
+
+from config import HLConfig
+from ingestion.decode import Frame
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.latency import LatencyTracker
+from ingestion.market_state import MarketState
+from ingestion.sharded import shard_coins
+
+# In-process connection pool: N HyperliquidWS connections feeding one MarketState, with coins sharded
+# round-robin across them. Each connection subscribes, reconnects and backs off on its own, so a
+# dropped socket only blinds its own shard and a reconnect re-sends 1/N of the subscriptions.
+# state.ws_connected is true only while every connection is up (as with ShardedIngest workers).
+
+class ConnectionPool:
+    def __init__(self, state: MarketState, cfg: HLConfig, connections: Optional[int] = None):
+        self.state = state
+        self.cfg = cfg
+        self.n = max(1, cfg.ws_connections if connections is None else connections)
+        self.clients: List[HyperliquidWS] = []
+        self.shards: List[List[str]] = []
+        # passed on to every connection (see HyperliquidWS)
+        self.tap: Optional[Callable[[Frame], None]] = None
+        self.latency: Optional[LatencyTracker] = None
+
+    async def connect_and_run(self, coins: List[str]) -> None:
+        self.shards = shard_coins(coins, self.n) if coins else []
+        self.clients = []
+        for _ in self.shards:
+            client = HyperliquidWS(self.state, self.cfg)
+            client.tap = self.tap
+            client.latency = self.latency
+            client.on_status = self._on_status
+            self.clients.append(client)
+        await asyncio.gather(*(c.connect_and_run(s) for c, s in zip(self.clients, self.shards)))
+
+    def _on_status(self, client: HyperliquidWS) -> None:
+        self.state.ws_connected = all(c.connected for c in self.clients)
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(c.stop() for c in self.clients))
+
+    def stats(self) -> List[dict]:
+        return [{"coins": len(s), "connected": c.connected, "connects": c.connects, "errors": c.errors,
+                 "last_error": c.last_error} for c, s in zip(self.clients, self.shards)]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import asyncio
+import multiprocessing as mp
+import os
+from typing import Dict, List, Optional, Sequence
+
+from config import HLConfig
+from features.compute import FEATURE_KEYS, summarize_features
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import DEFAULT_HORIZONS, CoinState, MarketState, parse_horizon
+from ingestion.shm import SharedFeatureSource, SharedFeatureTable
+
+# Sharded ingestion: coins are split across N worker processes, each running its own HyperliquidWS
+# connection and MarketState. After every update a worker publishes the coin's feature rows (one per
+# horizon) into a SharedFeatureTable; the API process serves from that table and never parses frames.
+
+def shard_coins(coins: Sequence[str], n: int) -> List[List[str]]:
+    # round-robin, so a sorted universe spreads the busiest coins across workers
+    n = max(1, min(n, len(coins)))
+    return [list(coins[w::n]) for w in range(n)]
+
+class FeaturePublisher:
+    # MarketState listener in a worker process: copies the updated coin's features into the table
+    def __init__(self, table: SharedFeatureTable, worker: int):
+        self.table = table
+        self.worker = worker
+        self.updates = 0
+
+    def __call__(self, cs: CoinState) -> None:
+        t = self.table
+        i = t.index.get(cs.coin)
+        if i is None:
+            return  # not part of the table layout (e.g. a coin the feed sent unasked)
+        base = i * t.n_horizons
+        for j, horizon in enumerate(t.horizons):
+            f = summarize_features(cs, horizon)
+            t.write(base + j, cs.version, cs.last_trade_ms, cs.last_book_ms, [f[k] for k in FEATURE_KEYS])
+        self.updates += 1
+
+async def _report_status(table: SharedFeatureTable, worker: int, state: MarketState, pub: FeaturePublisher) -> None:
+    pid = os.getpid()
+    while True:
+        table.set_worker(worker, state.ws_connected, pub.updates, pid)
+        await asyncio.sleep(0.5)
+
+def worker_main(table_name: str, worker: int, coins: List[str], cfg: HLConfig) -> None:
+    # process entry point: one WS connection for this shard's coins
+    table = SharedFeatureTable.attach(table_name)
+    state = MarketState(horizons={h: parse_horizon(h) for h in table.horizons if h is not None})
+    pub = FeaturePublisher(table, worker)
+    state.add_listener(pub)
+    client = HyperliquidWS(state=state, cfg=cfg)
+
+    async def run() -> None:
+        status = asyncio.create_task(_report_status(table, worker, state, pub))
+        try:
+            await client.connect_and_run(coins)
+        finally:
+            status.cancel()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+class ShardedIngest:
+    # Owns the shared table and the worker processes. Workers are spawned (not forked) so they start
+    # from a clean interpreter regardless of what the API process has running.
+    def __init__(
+        self,
+        coins: Sequence[str],
+        n_workers: int,
+        cfg: HLConfig,
+        horizons: Optional[Dict[str, int]] = None,
+    ):
+        self.cfg = cfg
+        self.shards = shard_coins(coins, n_workers)
+        horizons = DEFAULT_HORIZONS if horizons is None else horizons
+        self.table = SharedFeatureTable.create(list(coins), list(horizons), len(self.shards))
+        self.source = SharedFeatureSource(self.table)
+        self.procs: List[mp.Process] = []
+
+    def start(self) -> None:
+        ctx = mp.get_context("spawn")
+        for w, shard in enumerate(self.shards):
+            p = ctx.Process(
+                target=worker_main,
+                args=(self.table.name, w, shard, self.cfg),
+                name=f"hl-ingest-{w}",
+                daemon=True,
+            )
+            p.start()
+            self.procs.append(p)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for p in self.procs:
+            p.terminate()
+        for p in self.procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.kill()
+                p.join()
+        self.procs = []
+        self.table.close()
@@ -0,0 +1,225 @@
+from __future__ import annotations
+import asyncio
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from features.compute import FEATURE_KEYS
+from ingestion.market_state import parse_horizon
+
+# Fixed-layout shared-memory table of per-coin feature rows. Ingestion worker processes write it,
+# the API process reads it in place, without locks.
+#
+# Layout (native int64 / float64, every section 8-byte aligned):
+#   header   int64[8]    magic, layout version, n_coins, n_horizons, n_keys, n_workers, coin_bytes, horizon_bytes
+#   coins    coin_bytes per coin name (UTF-8, NUL padded; sized from the longest name, a multiple of 8)
+#   horizons horizon_bytes per horizon label, likewise; slot 0 is the count-based windows (horizon None, stored as b"")
+#   rows     one per (coin, horizon): seq, version, last_trade_ms, last_book_ms, FEATURE_KEYS floats
+#   workers  int64[4] per worker: connected, updates, heartbeat_ms, pid
+#
+# Each row has exactly one writer (the worker that owns the coin) and is guarded by a seqlock: the
+# writer makes seq odd, writes the row, then makes it even again; a reader unpacks the row and retries
+# if seq was odd or moved underneath it.
+
+_MAGIC = 0x4D48534C48  # "HLSHM"
+_LAYOUT = 2
+_HEADER_Q = 8
+_WORKER_Q = 4
+_ROW = struct.Struct(f"=qqq{len(FEATURE_KEYS)}d")  # row after seq
+_ROW_BYTES = 8 + _ROW.size
+_MAX_SPINS = 1000
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+def _name_bytes(names: Sequence[bytes]) -> int:
+    # field width that holds the longest encoded name, so none is cut
+    return max(8, _align8(max(map(len, names), default=0)))
+
+def _sizes(n_coins: int, n_horizons: int, n_workers: int, coin_bytes: int, horizon_bytes: int) -> Tuple[int, int, int, int]:
+    names = _HEADER_Q * 8
+    rows = _align8(names + coin_bytes * n_coins + horizon_bytes * n_horizons)
+    workers = rows + _ROW_BYTES * n_coins * n_horizons
+    return names, rows, workers, workers + 8 * _WORKER_Q * n_workers
+
+class SharedFeatureTable:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self._buf = shm.buf
+        hdr = struct.unpack_from(f"={_HEADER_Q}q", self._buf, 0)
+        if hdr[0] != _MAGIC or hdr[1] != _LAYOUT:
+            raise ValueError(f"{shm.name} is not a feature table (layout {_LAYOUT})")
+        n_coins, n_horizons, n_keys, n_workers, coin_bytes, horizon_bytes = hdr[2:8]
+        if n_keys != len(FEATURE_KEYS):
+            raise ValueError(f"feature table has {n_keys} keys, this build expects {len(FEATURE_KEYS)}")
+        names, rows, workers, _ = _sizes(n_coins, n_horizons, n_workers, coin_bytes, horizon_bytes)
+        buf = self._buf
+        self.coins: List[str] = [
+            bytes(buf[names + i * coin_bytes:names + (i + 1) * coin_bytes]).rstrip(b"\0").decode()
+            for i in range(n_coins)
+        ]
+        h0 = names + coin_bytes * n_coins
+        self.horizons: List[Optional[str]] = [
+            bytes(buf[h0 + j * horizon_bytes:h0 + (j + 1) * horizon_bytes]).rstrip(b"\0").decode() or None
+            for j in range(n_horizons)
+        ]
+        self.n_workers = n_workers
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.coins)}
+        self.horizon_index: Dict[Optional[str], int] = {h: j for j, h in enumerate(self.horizons)}
+        self._rows = rows
+        self._workers = workers
+        # int64 views for the seq / version words and worker status; single aligned words, read without the lock
+        self._q = buf[rows:workers].cast("q")
+        self._wq = buf[workers:workers + 8 * _WORKER_Q * n_workers].cast("q")
+        self._stride_q = _ROW_BYTES // 8
+
+    @classmethod
+    def create(cls, coins: Sequence[str], horizons: Sequence[str], n_workers: int, name: Optional[str] = None) -> SharedFeatureTable:
+        coin_names = [c.encode() for c in coins]
+        labels = [(h or "").encode() for h in (None, *horizons)]
+        coin_bytes, horizon_bytes = _name_bytes(coin_names), _name_bytes(labels)
+        _, _, _, size = _sizes(len(coins), len(labels), n_workers, coin_bytes, horizon_bytes)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buf = shm.buf
+        buf[:size] = bytes(size)
+        names = _HEADER_Q * 8
+        struct.pack_into(f"={_HEADER_Q}q", buf, 0, _MAGIC, _LAYOUT, len(coins), len(labels), len(FEATURE_KEYS), n_workers,
+                         coin_bytes, horizon_bytes)
+        for i, c in enumerate(coin_names):
+            struct.pack_into(f"{coin_bytes}s", buf, names + i * coin_bytes, c)
+        h0 = names + coin_bytes * len(coins)
+        for j, h in enumerate(labels):
+            struct.pack_into(f"{horizon_bytes}s", buf, h0 + j * horizon_bytes, h)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> SharedFeatureTable:
+        try:
+            # the creating process owns the segment; keep the resource tracker from unlinking it on our exit
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def n_horizons(self) -> int:
+        return len(self.horizons)
+
+    def slot(self, coin: str, horizon: Optional[str] = None) -> int:
+        return self.index[coin] * len(self.horizons) + self.horizon_index[horizon]
+
+    def write(self, slot: int, version: int, last_trade_ms: int, last_book_ms: int, values: Sequence[float]) -> None:
+        q, k = self._q, slot * self._stride_q
+        q[k] += 1
+        _ROW.pack_into(self._buf, self._rows + slot * _ROW_BYTES + 8, version, last_trade_ms, last_book_ms, *values)
+        q[k] += 1
+
+    def read(self, slot: int) -> Optional[tuple]:
+        # (version, last_trade_ms, last_book_ms, *features) from one consistent write, or None if the
+        # row was never written (or its writer stalled mid-write)
+        q, k = self._q, slot * self._stride_q
+        off = self._rows + slot * _ROW_BYTES + 8
+        for spin in range(_MAX_SPINS):
+            s = q[k]
+            if s & 1 == 0:
+                row = _ROW.unpack_from(self._buf, off)
+                if q[k] == s:
+                    return row if s else None
+            if spin > 10:
+                time.sleep(0)  # let a descheduled writer finish
+        return None
+
+    def version(self, slot: int) -> int:
+        return self._q[slot * self._stride_q + 1]
+
+    def set_worker(self, worker: int, connected: bool, updates: int, pid: int) -> None:
+        base = worker * _WORKER_Q
+        wq = self._wq
+        wq[base] = int(connected)
+        wq[base + 1] = updates
+        wq[base + 2] = int(time.time() * 1000)
+        wq[base + 3] = pid
+
+    def workers(self) -> List[Dict[str, int]]:
+        wq = self._wq
+        return [
+            {"connected": bool(wq[b]), "updates": wq[b + 1], "heartbeat_ms": wq[b + 2], "pid": wq[b + 3]}
+            for b in range(0, self.n_workers * _WORKER_Q, _WORKER_Q)
+        ]
+
+    def close(self) -> None:
+        # views into the segment must be released before it can be unmapped
+        self._q.release()
+        self._wq.release()
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SharedFeatureSource:
+    # SnapshotCache feature source backed by a SharedFeatureTable (sharded ingestion). Same interface
+    # as api.snapshot.StateSource; change notifications come from poll(), which compares row versions.
+    def __init__(self, table: SharedFeatureTable):
+        self.table = table
+        self.horizons: Dict[str, int] = {h: parse_horizon(h) for h in table.horizons if h is not None}
+        self._listeners: List[Callable[[str], None]] = []
+        self._seen = [0] * len(table.coins)
+
+    def add_listener(self, fn: Callable[[str], None]) -> None:
+        self._listeners.append(fn)
+
+    def coins(self) -> List[str]:
+        t = self.table
+        return [c for i, c in enumerate(t.coins) if t.version(i * t.n_horizons)]
+
+    def version(self, coin: str) -> Optional[int]:
+        t = self.table
+        i = t.index.get(coin)
+        if i is None:
+            return None
+        v = t.version(i * t.n_horizons)
+        return v or None
+
+    def read(self, coin: str, horizon: Optional[str] = None) -> Optional[Tuple[int, Dict[str, float]]]:
+        if coin not in self.table.index:
+            return None
+        row = self.table.read(self.table.slot(coin, horizon))
+        if row is None:
+            return None
+        return row[0], dict(zip(FEATURE_KEYS, row[3:]))
+
+    def times(self, coin: str) -> Tuple[int, int]:
+        row = self.table.read(self.table.slot(coin)) if coin in self.table.index else None
+        return (row[1], row[2]) if row else (0, 0)
+
+    @property
+    def connected(self) -> bool:
+        ws = self.table.workers()
+        return bool(ws) and all(w["connected"] for w in ws)
+
+    def poll(self) -> int:
+        # notifies listeners for every coin whose version moved since the last poll
+        t, seen = self.table, self._seen
+        changed = 0
+        for i, coin in enumerate(t.coins):
+            v = t.version(i * t.n_horizons)
+            if v != seen[i]:
+                seen[i] = v
+                changed += 1
+                for fn in self._listeners:
+                    fn(coin)
+        return changed
+
+    async def watch(self, interval_sec: float = 0.005) -> None:
+        while True:
+            self.poll()
+            await asyncio.sleep(interval_sec)
+
+    def stats(self) -> dict:
+        return {"mode": "sharded", "table": self.table.name, "workers": self.table.workers()}
@@ -1,41 +1,109 @@
 from __future__ import annotations
-from typing import Tuple, List
+from dataclasses import dataclass
+from typing import Callable, Dict, NamedTuple, Tuple, List, Optional
 from api.schemas import Regime
 import math
+import operator
+
+import numpy as np
+
+# Label codes used by the array APIs (and stored by tools.backfill): REGIME_LABELS[code]
+REGIME_LABELS = ("TRENDING", "MEAN_REVERTING", "LIQUIDATION_RISK", "CHAOTIC", "UNKNOWN")
+TRENDING, MEAN_REVERTING, LIQUIDATION_RISK, CHAOTIC, UNKNOWN = range(len(REGIME_LABELS))
+
+@dataclass(frozen=True)
+class RegimeThresholds:
+    high_vol: float = 0.0025
+    wide_spread: float = 0.0006
+    chaotic_flow: float = 0.55
+    trend_mom: float = 0.35
+    mr_mom: float = 0.15
+    mr_vol: float = 0.0018
+
+DEFAULT_THRESHOLDS = RegimeThresholds()
+
+# Per-horizon overrides for the event-time windows (see CoinState.horizons). Features are per-sample
+# statistics in every horizon, so the defaults apply until a horizon is tuned separately.
+HORIZON_THRESHOLDS: Dict[str, RegimeThresholds] = {
+    "10s": DEFAULT_THRESHOLDS,
+    "60s": DEFAULT_THRESHOLDS,
+    "5m": DEFAULT_THRESHOLDS,
+}
+
+def thresholds_for(horizon: Optional[str]) -> RegimeThresholds:
+    if horizon is None:
+        return DEFAULT_THRESHOLDS
+    return HORIZON_THRESHOLDS.get(horizon, DEFAULT_THRESHOLDS)
+
+def _select_first(conditions, choices, default):
+    # np.select for scalars: the choice of the first condition that holds
+    for cond, choice in zip(conditions, choices):
+        if cond:
+            return choice
+    return default
+
+class RuleOps(NamedTuple):
+    # what the rule tables below need that differs between Python floats and NumPy arrays
+    not_: Callable
+    fmin: Callable
+    fmax: Callable
+    select: Callable  # (conditions, choices, default) -> choice of the first condition that holds
+
+# min / max and np.fmin / np.fmax agree on NaN (the non-NaN argument wins) when the constant comes first
+SCALAR_OPS = RuleOps(operator.not_, min, max, _select_first)
+ARRAY_OPS = RuleOps(np.logical_not, np.fmin, np.fmax, np.select)
+
+def _regime_rules(ret_std, spread_mean, trade_imb_std, mom_raw, th: RegimeThresholds, ops: RuleOps):
+    # Explainable heuristic classifier:
+    # - liquidation-like risk: vol high AND spread widening OR flow chaotic
+    # - trending: strong momentum AND not chaotic
+    # - mean-reverting: low momentum AND good liquidity
+    # - chaotic: very high trade imbalance variance
+    # Rules in priority order (first match wins); anything else is UNKNOWN.
+    abs_mom = abs(mom_raw)
+    high_vol = ret_std > th.high_vol
+    wide_spread = spread_mean > th.wide_spread
+    chaotic_flow = trade_imb_std > th.chaotic_flow
+
+    liquidation = high_vol & (wide_spread | chaotic_flow)
+    trending = (abs_mom > th.trend_mom) & ops.not_(chaotic_flow)
+    mean_reverting = (abs_mom < th.mr_mom) & ops.not_(wide_spread) & (ret_std < th.mr_vol)
+    chaotic = chaotic_flow | wide_spread
+    rules = (
+        (liquidation, LIQUIDATION_RISK, ops.fmin(1.0, 0.6 + 80.0 * ops.fmax(0.0, ret_std - th.high_vol))),
+        (trending, TRENDING, ops.fmin(1.0, 0.55 + 0.8 * ops.fmin(1.0, abs_mom))),
+        (mean_reverting, MEAN_REVERTING, 0.65),
+        (chaotic, CHAOTIC, 0.6),
+    )
+    conditions = [cond for cond, _, _ in rules]
+    code = ops.select(conditions, [code for _, code, _ in rules], UNKNOWN)
+    conf = ops.select(conditions, [conf for _, _, conf in rules], 0.25)
+    return code, ops.fmax(0.0, ops.fmin(1.0, conf))
 
 def classify_regime(
     ret_std: float,
     spread_mean: float,
     trade_imb_std: float,
     mom_raw: float,
+    horizon: Optional[str] = None,
 ) -> Regime:
-    # Explainable heuristic classifier:
-    # - liquidation-like risk: vol high AND spread widening OR flow chaotic
-    # - trending: strong momentum AND not chaotic
-    # - mean-reverting: low momentum AND good liquidity
-    # - chaotic: very high trade imbalance variance
-    conf = 0.0
-    label = "UNKNOWN"
-
-    # thresholds are intentionally simple & tunable
-    high_vol = ret_std > 0.0025
-    wide_spread = spread_mean > 0.0006
-    chaotic_flow = trade_imb_std > 0.55
-
-    if (high_vol and wide_spread) or (high_vol and chaotic_flow):
-        label = "LIQUIDATION_RISK"
-        conf = min(1.0, 0.6 + 80.0 * max(0.0, ret_std - 0.0025))
-    elif abs(mom_raw) > 0.35 and not chaotic_flow:
-        label = "TRENDING"
-        conf = min(1.0, 0.55 + 0.8 * min(1.0, abs(mom_raw)))
-    elif abs(mom_raw) < 0.15 and not wide_spread and ret_std < 0.0018:
-        label = "MEAN_REVERTING"
-        conf = 0.65
-    elif chaotic_flow or wide_spread:
-        label = "CHAOTIC"
-        conf = 0.6
-    else:
-        label = "UNKNOWN"
-        conf = 0.25
-
-    return Regime(label=label, confidence=float(max(0.0, min(1.0, conf))))
+    # thresholds are intentionally simple & tunable (per horizon via HORIZON_THRESHOLDS)
+    code, conf = _regime_rules(float(ret_std), float(spread_mean), float(trade_imb_std), float(mom_raw),
+                               thresholds_for(horizon), SCALAR_OPS)
+    return Regime(label=REGIME_LABELS[code], confidence=float(conf))
+
+def classify_regime_array(
+    ret_std: np.ndarray,
+    spread_mean: np.ndarray,
+    trade_imb_std: np.ndarray,
+    mom_raw: np.ndarray,
+    horizon: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # classify_regime over arrays (every coin of the universe, every row of a backfill):
+    # label codes (uint8, REGIME_LABELS index) and confidences; identical to the scalar results.
+    code, conf = _regime_rules(
+        np.asarray(ret_std, dtype=np.float64), np.asarray(spread_mean, dtype=np.float64),
+        np.asarray(trade_imb_std, dtype=np.float64), np.asarray(mom_raw, dtype=np.float64),
+        thresholds_for(horizon), ARRAY_OPS,
+    )
+    return np.asarray(code, dtype=np.uint8), np.asarray(conf, dtype=np.float64)
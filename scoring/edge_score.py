@@ -1,39 +1,69 @@
 from __future__ import annotations
 from typing import List, Tuple
+
+import numpy as np
+
 from api.schemas import Edge, Signals, Regime
+from models.regime import ARRAY_OPS, CHAOTIC, LIQUIDATION_RISK, MEAN_REVERTING, REGIME_LABELS, SCALAR_OPS, TRENDING, RuleOps
 
-def score_edge(regime: Regime, signals: Signals) -> Edge:
+# Edge.explain tags; the array API returns them as a bitmask, bit i = EXPLAIN_FLAGS[i]
+EXPLAIN_FLAGS = (
+    "trend_regime", "mr_regime", "liq_risk_regime", "chaotic_regime",
+    "momentum_high", "liquidity_good", "risk_elevated", "actionable",
+)
+(TREND_REGIME, MR_REGIME, LIQ_RISK_REGIME, CHAOTIC_REGIME,
+ MOMENTUM_HIGH, LIQUIDITY_GOOD, RISK_ELEVATED, ACTIONABLE) = (1 << i for i in range(len(EXPLAIN_FLAGS)))
+
+_CODES = {label: i for i, label in enumerate(REGIME_LABELS)}
+
+# explain bitmask -> tags, in flag order
+_EXPLAIN_TAGS = tuple(tuple(f for i, f in enumerate(EXPLAIN_FLAGS) if mask >> i & 1) for mask in range(1 << len(EXPLAIN_FLAGS)))
+
+def explain_labels(mask: int) -> List[str]:
+    return list(_EXPLAIN_TAGS[int(mask)])
+
+def _edge_rules(code, momentum, liquidity, risk, ops: RuleOps):
     # Composite score that prefers:
     # - trend with momentum
     # - stable liquidity
     # - low risk
-    explain: List[str] = []
-
-    base = 0.0
-    if regime.label == "TRENDING":
-        base += 0.25
-        explain.append("trend_regime")
-    elif regime.label == "MEAN_REVERTING":
-        base += 0.15
-        explain.append("mr_regime")
-    elif regime.label == "LIQUIDATION_RISK":
-        base -= 0.25
-        explain.append("liq_risk_regime")
-    elif regime.label == "CHAOTIC":
-        base -= 0.15
-        explain.append("chaotic_regime")
+    # Regime terms (score base, explain bit) by regime; any other regime adds nothing.
+    trending = code == TRENDING
+    mean_reverting = code == MEAN_REVERTING
+    liquidation = code == LIQUIDATION_RISK
+    chaotic = code == CHAOTIC
+    regimes = [trending, mean_reverting, liquidation, chaotic]
+    base = ops.select(regimes, [0.25, 0.15, -0.25, -0.15], 0.0)
+    bits = ops.select(regimes, [TREND_REGIME, MR_REGIME, LIQ_RISK_REGIME, CHAOTIC_REGIME], 0)
 
     # agreement: momentum + liquidity - risk
-    score = base + 0.55 * signals.momentum + 0.45 * signals.liquidity - 0.65 * signals.risk
+    score = base + 0.55 * momentum + 0.45 * liquidity - 0.65 * risk
 
     # actionable if score clears threshold AND not liquidation risk
-    actionable = (score > 0.55) and (regime.label not in ("LIQUIDATION_RISK", "CHAOTIC"))
+    actionable = (score > 0.55) & ops.not_(liquidation) & ops.not_(chaotic)
 
-    if signals.momentum > 0.6: explain.append("momentum_high")
-    if signals.liquidity > 0.6: explain.append("liquidity_good")
-    if signals.risk > 0.55: explain.append("risk_elevated")
-    if actionable: explain.append("actionable")
+    explain = (bits | (momentum > 0.6) * MOMENTUM_HIGH | (liquidity > 0.6) * LIQUIDITY_GOOD
+               | (risk > 0.55) * RISK_ELEVATED | actionable * ACTIONABLE)
 
     # clamp
-    score = float(max(0.0, min(1.0, score)))
-    return Edge(score=score, actionable=bool(actionable), explain=explain)
+    return ops.fmax(0.0, ops.fmin(1.0, score)), actionable, explain
+
+def score_edge(regime: Regime, signals: Signals) -> Edge:
+    score, actionable, explain = _edge_rules(
+        _CODES[regime.label], signals.momentum, signals.liquidity, signals.risk, SCALAR_OPS,
+    )
+    return Edge(score=float(score), actionable=bool(actionable), explain=explain_labels(explain))
+
+def score_edge_array(
+    regime_code: np.ndarray,
+    momentum: np.ndarray,
+    liquidity: np.ndarray,
+    risk: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # score_edge over arrays of regime codes (models.regime.REGIME_LABELS) and signals:
+    # scores, actionable mask and explain bitmasks (uint8, see EXPLAIN_FLAGS); identical to score_edge.
+    score, actionable, explain = _edge_rules(
+        np.asarray(regime_code), np.asarray(momentum, dtype=np.float64),
+        np.asarray(liquidity, dtype=np.float64), np.asarray(risk, dtype=np.float64), ARRAY_OPS,
+    )
+    return np.asarray(score, dtype=np.float64), np.asarray(actionable, dtype=bool), np.asarray(explain, dtype=np.uint8)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from ingestion.market_state import DEFAULT_HORIZONS, WINDOW_LEN, RollingWindow, TimeWindow
+from tools.backfill import _window_stats, backfill, verify
+from tools.synth import write_ndjson
+
+
+@pytest.mark.parametrize("horizon", [None, "10s"])
+def test_backfill_matches_live_path(tmp_path, horizon):
+    path = write_ndjson(str(tmp_path / "cap.ndjson"), ["BTC", "ETH", "SOL"], 4000, seed=1)
+    out = backfill(path, horizon)
+    assert len(out["seq"]) > 3000
+    assert out["coins"].tolist() == ["BTC", "ETH", "SOL"]
+    assert verify(out, path) == []
+
+
+def test_window_stats_bit_identical_to_multi_horizon_live_windows():
+    # a long series with a large offset (where closed-form window sums lose digits) and out-of-order
+    # timestamps; a single-horizon window must track each horizon of the live multi-horizon one exactly
+    rnd = np.random.default_rng(0)
+    x = 1e3 + rnd.normal(0, 1e-3, 20_000)
+    x[::97] = 1e3  # runs of repeated values
+    ts = np.cumsum(rnd.integers(-50, 300, len(x)))
+    live = TimeWindow(DEFAULT_HORIZONS)
+    means = {h: [] for h in DEFAULT_HORIZONS}
+    stds = {h: [] for h in DEFAULT_HORIZONS}
+    for t, v in zip(ts.tolist(), x.tolist()):
+        live.push(t, v)
+        for h in DEFAULT_HORIZONS:
+            means[h].append(live.mean(h))
+            stds[h].append(live.std(h))
+    for h, ms in DEFAULT_HORIZONS.items():
+        mean, std = _window_stats(x, ts, ms)
+        assert mean.tolist() == means[h] and std.tolist() == stds[h]
+
+    live = RollingWindow(WINDOW_LEN)
+    expect = []
+    for v in x.tolist():
+        live.push(v)
+        expect.append((live.mean(), live.std()))
+    mean, std = _window_stats(x, ts, None)
+    assert list(zip(mean.tolist(), std.tolist())) == expect
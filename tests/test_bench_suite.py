@@ -0,0 +1,16 @@
+from bench.suite import _metric, compare
+
+
+def _run(**values):
+    units = {"ingest": ("msg/s", "higher"), "latency": ("ns/op", "lower")}
+    return {"meta": {}, "metrics": {k: _metric(v, *units[k.split("_")[0]]) for k, v in values.items()}}
+
+
+def test_compare_flags_regressions_in_the_metric_direction():
+    base = _run(ingest_a=1000, ingest_b=1000, latency_a=100, latency_b=100, latency_gone=5)
+    new = _run(ingest_a=850, ingest_b=1500, latency_a=120, latency_b=60, latency_new=7)
+    rows, regressions = compare(base, new, threshold=0.10)
+    # metrics missing from either run are not compared
+    assert [r["metric"] for r in rows] == ["ingest_a", "ingest_b", "latency_a", "latency_b"]
+    assert [r["metric"] for r in regressions] == ["ingest_a", "latency_a"]
+    assert compare(base, new, threshold=0.25)[1] == []
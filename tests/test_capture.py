@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from config import HLConfig
+from features.compute import summarize_features
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from tools.capture import CaptureReader, convert_ndjson, is_capture, zstandard
+from tools.synth import write_ndjson
+
+CODECS = ["none", "zlib"] + (["zstd"] if zstandard is not None else [])
+
+
+def _replay_ndjson(path):
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig())
+    with open(path, "rb") as f:
+        for line in f:
+            client.on_frame(line)
+    return state
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_capture_replay_matches_ndjson(tmp_path, codec):
+    src = write_ndjson(str(tmp_path / "cap.ndjson"), ["BTC", "ETH"], 3000, seed=2)
+    dest = str(tmp_path / "cap.hlcap")
+    convert_ndjson(src, dest, codec=codec, chunk_events=500)
+    assert is_capture(dest) and not is_capture(src)
+
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig())
+    channels = []
+    with CaptureReader(dest) as r:
+        assert r.codec == codec and r.n_events == 3000
+        for ch, payload in r.iter_records():
+            channels.append(ch)
+            if isinstance(payload, bytes):
+                client.on_frame(payload)
+            else:
+                client.on_records(ch, payload)
+
+    with open(src) as f:
+        assert channels == [json.loads(line)["channel"] for line in f]
+    ref = _replay_ndjson(src)
+    for coin, cs in ref.coins.items():
+        assert state.coins[coin].version == cs.version
+        assert summarize_features(state.coins[coin]) == summarize_features(cs)
+
+
+def test_index_selects_coin_and_time_range(tmp_path):
+    src = write_ndjson(str(tmp_path / "cap.ndjson"), ["BTC", "ETH", "SOL"], 4000, seed=3)
+    dest = str(tmp_path / "cap.hlcap")
+    convert_ndjson(src, dest, codec="none", chunk_events=200)
+    with CaptureReader(dest) as r:
+        t0, t1 = r.time_range()
+        lo, hi = t0 + (t1 - t0) // 3, t0 + (t1 - t0) // 2
+        assert len(r.select(start_ms=lo, end_ms=hi)) < len(r.chunks)
+
+        def key(ch, p):
+            return (ch, p.coin, p.time) if ch == "l2Book" else (ch, p[0].coin, p[0].time)
+
+        want = [
+            key(ch, p) for ch, p in r.iter_records(channels=["trades", "l2Book"])
+            if key(ch, p)[1] == "ETH" and lo <= key(ch, p)[2] <= hi
+        ]
+        got = [key(ch, p) for ch, p in r.iter_records(coins=["ETH"], channels=["trades", "l2Book"], start_ms=lo, end_ms=hi)]
+        assert got == want and got
+
+
+def _flat(ch, p):
+    if ch == "l2Book":
+        return ch, p.coin, p.time, [(list(side.px), list(side.sz), list(side.n)) for side in p.levels]
+    if ch == "trades":
+        return ch, [(t.px, t.sz, t.side, t.time, t.coin) for t in p]
+    return ch, p
+
+
+def test_unclosed_capture_is_recovered_by_scanning_chunks(tmp_path):
+    src = write_ndjson(str(tmp_path / "cap.ndjson"), ["BTC", "ETH", "SOL"], 3000, seed=4)
+    dest = str(tmp_path / "cap.hlcap")
+    convert_ndjson(src, dest, codec="zlib", chunk_events=400)
+    with CaptureReader(dest) as r:
+        assert not r.recovered
+        chunks, entries, coins = r.chunks.copy(), r.entries.copy(), list(r.coins)
+        records = [_flat(ch, p) for ch, p in r.iter_records()]
+
+    with open(dest, "rb") as f:
+        data = f.read()
+    # a live writer: complete chunks, no footer
+    live = str(tmp_path / "live.hlcap")
+    with open(live, "wb") as f:
+        f.write(data[:int(chunks["offset"][-1] + chunks["clen"][-1])])
+    with CaptureReader(live) as r:
+        assert r.recovered and r.coins == coins
+        assert r.chunks.tolist() == chunks.tolist() and r.entries.tolist() == entries.tolist()
+        assert [_flat(ch, p) for ch, p in r.iter_records()] == records
+
+    # a crashed writer: the last chunk cut short is dropped, everything before it is read
+    crashed = str(tmp_path / "crashed.hlcap")
+    with open(crashed, "wb") as f:
+        f.write(data[:int(chunks["offset"][-1] + chunks["clen"][-1] // 2)])
+    with CaptureReader(crashed) as r:
+        assert r.recovered and len(r.chunks) == len(chunks) - 1
+        assert r.n_events == int(chunks["n_events"][:-1].sum())
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from config import HLConfig
+from features.compute import summarize_features
+from ingestion.checkpoint import Checkpointer, load_checkpoint, save_checkpoint
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from tools.capture import convert_ndjson
+from tools.replay import catch_up
+from tools.synth import iter_synthetic, synth_coins
+
+
+def _frames(n, seed=1):
+    return [json.dumps(m, separators=(",", ":")) for m in iter_synthetic(synth_coins(12), n, seed=seed, levels=8)]
+
+
+def _feed(frames, state=None):
+    state = state if state is not None else MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    for raw in frames:
+        client.on_frame(raw)
+    return state
+
+
+def _signature(state):
+    # everything the envelopes are computed from, compared exactly (repr keeps every float bit)
+    return repr({
+        c: (summarize_features(cs), [summarize_features(cs, h) for h in state.horizons], cs.ctx_features,
+            cs.book.features, cs.book_top, cs._prev_mid, cs.version, cs.last_trade_ms, cs.last_book_ms,
+            cs.candles.column("c").tolist() if cs.candles is not None else None)
+        for c, cs in sorted(state.coins.items())
+    })
+
+
+def test_restored_state_matches_and_continues_exactly(tmp_path):
+    frames = _frames(30_000)
+    live = _feed(frames[:20_000])
+    path = str(tmp_path / "state.ckpt")
+    save_checkpoint(live, path)
+    restored, meta = load_checkpoint(path)
+    assert meta["coins"] == list(live.coins)
+    assert _signature(restored) == _signature(live)
+    # ring positions and running stats came back too: both go on identically
+    _feed(frames[20_000:], live)
+    _feed(frames[20_000:], restored)
+    assert _signature(restored) == _signature(live)
+    assert restored.windows.counts().tolist() == live.windows.counts().tolist()
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path, horizons={"10s": 10_000})
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "hlcap"])
+def test_catch_up_replays_only_the_gap(tmp_path, fmt):
+    frames = _frames(24_000, seed=4)
+    state = _feed(frames[:15_000])
+    ckpt = Checkpointer(state, str(tmp_path / "state.ckpt"))
+    asyncio.run(ckpt.save())
+    assert ckpt.saves == 1 and ckpt.bytes == os.path.getsize(ckpt.path)
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+    _feed(frames[15_000:], state)
+
+    # the recording overlaps the checkpoint: everything before it must be skipped, not applied twice
+    capture = str(tmp_path / "feed.ndjson")
+    with open(capture, "w") as f:
+        f.write("\n".join(frames[5_000:]) + "\n")
+    if fmt == "hlcap":
+        convert_ndjson(capture, str(tmp_path / "feed.hlcap"))
+        capture = str(tmp_path / "feed.hlcap")
+
+    restored, meta = load_checkpoint(ckpt.path)
+    assert meta["event_ms"] > 0
+    got = catch_up(restored, [capture])
+    assert got["applied"] > 0 and got["skipped"] > 0
+    assert _signature(restored) == _signature(state)
+
+
+def test_failed_restore_means_a_clean_cold_start(tmp_path, caplog):
+    from api.server import build_parser, runtime_from_args
+    from ingestion.checkpoint import snapshot_state, write_checkpoint
+
+    path = str(tmp_path / "state.ckpt")
+    arrays = snapshot_state(_feed(_frames(5_000)))
+    arrays["t_off"] = arrays["t_off"][:1]  # fails part-way through the first coin
+    write_checkpoint(arrays, path)
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+    with caplog.at_level("INFO", logger="api.server"):
+        rt = runtime_from_args(build_parser().parse_args(["--checkpoint", path]))
+    assert rt.state.coins == {} and rt.checkpoint.restored is None
+    assert [(r.levelname, r.exc_info is not None) for r in caplog.records] == [("WARNING", True)]
+    assert "not restored" in caplog.records[0].getMessage()
+    assert rt.checkpoint.state is rt.state and rt.cache.source.state is rt.state
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "hlcap"])
+def test_catch_up_reads_recordings_a_crash_left_behind(tmp_path, fmt):
+    frames = _frames(20_000, seed=6)
+    state = _feed(frames[:12_000])
+    path = str(tmp_path / "state.ckpt")
+    save_checkpoint(state, path)
+    _feed(frames[12_000:19_000], state)
+
+    capture = str(tmp_path / f"feed.{fmt}")
+    if fmt == "ndjson":
+        with open(capture, "w") as f:  # the recorder died half-way through a line
+            f.write("\n".join(frames[10_000:19_000]) + "\n" + frames[19_000][:40])
+    else:
+        from tools.capture import CaptureWriter
+
+        w = CaptureWriter(capture, chunk_events=1_000)  # never closed: no footer
+        for raw in frames[10_000:19_000]:
+            w.write_frame(raw)
+        w.flush()
+    restored, _ = load_checkpoint(path)
+    catch_up(restored, [capture])
+    assert _signature(restored) == _signature(state)
+
+
+def test_failed_catch_up_falls_back_to_the_checkpoint(tmp_path, caplog):
+    from api.server import build_parser, runtime_from_args
+
+    frames = _frames(8_000, seed=7)
+    path = str(tmp_path / "state.ckpt")
+    save_checkpoint(_feed(frames[:5_000]), path)
+    capture = str(tmp_path / "feed.ndjson")
+    with open(capture, "w") as f:
+        f.write("\n".join(frames[5_000:6_000] + ["{not json"] + frames[6_000:]) + "\n")
+
+    with caplog.at_level("INFO", logger="api.server"):
+        rt = runtime_from_args(build_parser().parse_args(["--checkpoint", path, "--catchup", capture]))
+    assert rt.checkpoint.restored is not None
+    assert [r.levelname for r in caplog.records] == ["INFO", "WARNING"]
+    assert "catch-up" in caplog.records[1].getMessage() and caplog.records[1].exc_info
+    assert _signature(rt.state) == _signature(load_checkpoint(path)[0])
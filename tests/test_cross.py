@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from features.cross import CrossCoinCovariance, market_aggregate, top_eigen_share
+from ingestion.market_state import MarketState
+from models.regime import REGIME_LABELS
+
+
+def _ticks(coins, n_ticks, seed=0):
+    # correlated random walks (common factor + idiosyncratic), ticking asynchronously
+    rng = np.random.default_rng(seed)
+    px = {c: 100.0 * (i + 1) for i, c in enumerate(coins)}
+    loadings = {c: 0.5 + i * 0.3 for i, c in enumerate(coins)}
+    ts, out = 0, []
+    for _ in range(n_ticks):
+        ts += int(rng.integers(1, 120))
+        f = rng.normal(0, 1e-4)
+        c = coins[int(rng.integers(len(coins)))]
+        px[c] *= np.exp(loadings[c] * f + rng.normal(0, 5e-5))
+        out.append((c, ts, px[c]))
+    return out
+
+
+def _bucket_returns(ticks, bucket_ms, window):
+    # from scratch: last mid per bucket, carried forward, log differences between bucket closes
+    seen, last, closes, rows, end = [], {}, {}, [], None
+    for c, ts, px in ticks:
+        if end is None:
+            end = (ts // bucket_ms + 1) * bucket_ms
+        while ts >= end:
+            rows.append([np.log(last[k] / closes[k]) if k in closes else 0.0 for k in seen])
+            closes.update(last)
+            end += bucket_ms
+        if c not in seen:
+            seen.append(c)
+        last[c] = px
+    n = len(seen)
+    return seen, np.array([row + [0.0] * (n - len(row)) for row in rows[-window:]])
+
+
+def test_rolling_covariance_matches_recomputation():
+    coins = ["BTC", "ETH", "SOL", "ARB", "DOGE"]
+    cross = CrossCoinCovariance(bucket_ms=500, window=40, capacity=2)  # grows twice
+    ticks = _ticks(coins, 6000)
+    for c, ts, px in ticks:
+        cross.update(c, ts, px)
+    order, r = _bucket_returns(ticks, 500, 40)
+    assert cross.coins == order and len(cross) == len(r) == 40 and cross.buckets > 3 * 40
+    assert cross.covariance() == pytest.approx(np.cov(r.T, ddof=0), rel=1e-7, abs=1e-16)
+    corr = cross.correlation()
+    assert corr == pytest.approx(np.corrcoef(r.T), rel=1e-7, abs=1e-9)
+    beta = cross.beta("BTC")
+    j = order.index("BTC")
+    assert beta == pytest.approx(np.cov(r.T, ddof=0)[:, j] / np.var(r[:, j]), rel=1e-7)
+    share, _ = top_eigen_share(corr)
+    assert share == pytest.approx(np.linalg.eigvalsh(corr)[-1] / len(coins), rel=1e-6)
+    assert share > 1.0 / len(coins)  # the common factor shows up
+
+
+def test_market_endpoint():
+    from api.server import Runtime, create_app
+
+    state = MarketState()
+    cross = CrossCoinCovariance(bucket_ms=100, window=50)
+    state.add_listener(cross.on_update)
+    rng = np.random.default_rng(3)
+    mids = {"BTC": 100.0, "ETH": 50.0, "SOL": 20.0}
+    for k in range(3000):
+        for c in mids:
+            mids[c] *= np.exp(rng.normal(0, 1e-4))
+            state.ensure_coin(c).update_book_top(mids[c] - 0.01, 1.0, mids[c] + 0.01, 1.0, 25 * k)
+            state.notify(state.coins[c])
+    agg, _ = market_aggregate(state, cross)
+    assert agg["coins"] == 3 and sum(agg["regime_counts"].values()) == 3
+    assert set(agg["breadth"]) == set(REGIME_LABELS)
+    assert agg["beta"]["BTC"] == pytest.approx(1.0)
+
+    rt = Runtime(list(mids), state=state)
+    rt.cross = cross
+    http = TestClient(create_app(rt))
+    body = http.get("/v1/market").json()
+    assert body["coins"] == 3 and body["buckets"] == 50
+    assert 1 / 3 <= body["pc1_share"] <= 1.0
+    assert http.get("/v1/market?horizon=7s").status_code == 400
@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from api.snapshot import SnapshotCache
+from config import HLConfig
+from history.store import COLUMNS, HistoryStore
+from history.writer import HistoryWriter
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from models.regime import REGIME_LABELS
+from scoring.edge_score import EXPLAIN_FLAGS
+from tools.synth import iter_synthetic
+
+
+def _rows(ts):
+    ts = np.asarray(ts, dtype=np.int64)
+    rows = {name: (ts % 251 / 251).astype(dtype) for name, dtype in COLUMNS if dtype == "<f4"}
+    rows["ts"] = ts
+    rows["regime"] = (ts // 100 % 5).astype(np.uint8)
+    rows["explain"] = (ts % 256).astype(np.uint8)
+    return rows
+
+
+def test_store_ranges_downsamples_and_survives_reopen(tmp_path):
+    store = HistoryStore(str(tmp_path), partition_ms=10_000, resolution_ms=100)
+    ts = np.arange(1_000, 35_000, 100)
+    assert store.append("BTC", _rows(ts[:200])) == 200
+    assert store.append("BTC", _rows(ts[150:])) == len(ts) - 200  # overlap with what is stored is dropped
+    store.close()
+    assert store.partitions("BTC") == [0, 10_000, 20_000, 30_000]
+
+    reader = HistoryStore(str(tmp_path), partition_ms=10_000, resolution_ms=100)
+    got = reader.query("BTC", 9_950, 21_000)
+    want = _rows(ts[(ts >= 9_950) & (ts <= 21_000)])
+    for name, _ in COLUMNS:
+        np.testing.assert_array_equal(got[name], want[name].astype(got[name].dtype))
+    assert got["count"].tolist() == [1] * len(want["ts"])
+
+    down = reader.query("BTC", 0, 40_000, step_ms=5_000)
+    assert down["ts"].tolist() == [4_900, 9_900, 14_900, 19_900, 24_900, 29_900, 34_900]
+    assert down["count"].tolist() == [40, 50, 50, 50, 50, 50, 50]
+    assert len(reader.query("BTC", 50_000, 60_000)["ts"]) == 0 and len(reader.query("ETH", 0, 1 << 40)["ts"]) == 0
+
+
+def test_compaction_downsamples_then_drops_old_partitions(tmp_path):
+    hour = 3_600_000
+    store = HistoryStore(str(tmp_path), partition_ms=hour, resolution_ms=1_000, retention_ms=24 * hour,
+                         compact_after_ms=2 * hour, compact_step_ms=60_000)
+    for h in range(30):
+        store.append("BTC", _rows(np.arange(h * hour, (h + 1) * hour, 1_000)))
+    store.flush()
+    before = store.disk_bytes()
+    # newest row is at 30h - 1s: partitions ending 24h before that go, those ending 2h before are compacted
+    assert store.compact() == {"deleted": 5, "compacted": 22}
+    assert store.compact() == {"deleted": 0, "compacted": 0}
+    assert store.partitions("BTC")[0] == 5 * hour and len(store.partitions("BTC")) == 25
+    assert store.disk_bytes() < before / 4
+    old = store.query("BTC", 6 * hour, 7 * hour - 1)
+    assert len(old["ts"]) == 60 and old["ts"][-1] == 7 * hour - 1_000
+    assert len(store.query("BTC", 29 * hour, 30 * hour)["ts"]) == 3_600  # recent data stays at full resolution
+
+
+def test_writer_records_cached_snapshots_and_serves_history(tmp_path):
+    state = MarketState()
+    cache = SnapshotCache(state)
+    writer = HistoryWriter(HistoryStore(str(tmp_path), resolution_ms=500), cache, batch=64).attach().start()
+    seen = {}
+    state.add_listener(lambda cs: seen.setdefault((cs.coin, max(cs.last_trade_ms, cs.last_book_ms)), cache.get(cs.coin)))
+    client = HyperliquidWS(state, HLConfig())
+    for m in iter_synthetic(["BTC", "ETH"], 3_000, seed=5, levels=5):
+        client.on_frame(json.dumps(m, separators=(",", ":")))
+    writer.close()
+    assert writer.dropped == 0 and writer.written == writer.queued > 0
+
+    rows = writer.store.query("BTC", 0, 1 << 62)
+    assert np.all(np.diff(rows["ts"] // 500) > 0)  # one row per resolution step
+    for ts, score, label in zip(rows["ts"].tolist()[:50], rows["edge_score"].tolist(), rows["regime"].tolist()):
+        env = seen[("BTC", ts)]
+        assert abs(score - env.edge.score) < 1e-6 and REGIME_LABELS[label] == env.regime.label
+
+    from api.server import Runtime, create_app
+    rt = Runtime(["BTC", "ETH"], state=state)
+    rt.history = writer
+    http = TestClient(create_app(rt))
+    body = http.get("/v1/history/btc", params={"from": 0, "to": 1 << 62, "step": "5s"}).json()
+    assert body["coin"] == "BTC" and body["rows"] == len(body["ts"]) > 0 and body["step_ms"] == 5_000
+    assert sum(body["count"]) == len(rows["ts"]) and body["explain_flags"] == list(EXPLAIN_FLAGS)
+    assert http.get("/v1/history/BTC", params={"step": "7q"}).status_code == 400
+    assert http.get("/v1/history/DOGE").status_code == 404
+    rt.history = None
+    assert http.get("/v1/history/BTC").status_code == 503
+
+
+def test_writer_survives_a_failed_append(tmp_path):
+    state = MarketState()
+    writer = HistoryWriter(HistoryStore(str(tmp_path), resolution_ms=500), SnapshotCache(state), batch=64)
+    append = writer.store.append
+    calls = []
+
+    def flaky(coin, rows):
+        calls.append(coin)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        return append(coin, rows)
+
+    writer.store.append = flaky
+    writer.attach().start()
+    client = HyperliquidWS(state, HLConfig())
+    for m in iter_synthetic(["BTC"], 3_000, seed=5, levels=5):
+        client.on_frame(json.dumps(m, separators=(",", ":")))
+    writer.close()
+    assert writer.errors == 1 and "No space left" in writer.last_error
+    assert writer.lost > 0 and writer.written + writer.lost == writer.queued
+    assert len(writer.store.query("BTC", 0, 1 << 62)["ts"]) == writer.written
@@ -0,0 +1,193 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from config import HLConfig
+from features.compute import FEATURE_KEYS, streams_for, summarize_features
+from ingestion.decode import get_loads, peek_channel
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState, SeriesRing
+from ingestion.orderbook import OrderBook
+from ingestion.messages import Level, Side, make_frame_decoders, make_payload_parsers, parse_l2, parse_trades
+
+
+def _book(coin, t, bid, ask):
+    return {"channel": "l2Book", "data": {"coin": coin, "time": t, "levels": [
+        [{"px": str(bid), "sz": "2.0", "n": 1}], [{"px": str(ask), "sz": "1.0", "n": 1}]]}}
+
+
+def test_peek_channel_str_and_bytes():
+    raw = json.dumps(_book("BTC", 1, 100, 101), separators=(",", ":"))
+    assert peek_channel(raw) == "l2Book"
+    assert peek_channel(raw.encode()) == "l2Book"
+    assert peek_channel('{"data": 1, "channel" : "trades"}') is None
+
+
+def test_decoders_agree():
+    raw = json.dumps(_book("ETH", 5, 10.5, 10.6))
+    assert get_loads("json")(raw) == get_loads("auto")(raw)
+
+
+def test_on_frame_dispatches_and_skips_unhandled_channels():
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    client.on_frame(json.dumps(_book("BTC", 7, 100.0, 100.5), separators=(",", ":")))
+    client.on_frame('{"channel":"allMids","data":{"mids":{"BTC":"100.2"}}}')
+    client.on_frame('{"channel":"subscriptionResponse","data":{"method":"subscribe"}}')
+    cs = state.coins["BTC"]
+    assert cs.last_book_ms == 7
+    assert cs.book_top.mid == 100.25
+    assert client.frames_skipped == 2
+
+
+def test_parse_trades_numeric_fields_and_sides():
+    data = [
+        {"coin": "SOL", "side": "B", "px": "150.5", "sz": "2", "time": 10},
+        {"coin": "SOL", "side": "A", "px": "150.4", "sz": "0.5", "time": 11},
+        {"coin": "SOL", "side": "sell", "px": "150.3", "sz": "1", "time": 12},
+        {"coin": "SOL", "side": "?", "px": "150.3", "sz": "1", "time": 13},
+    ]
+    trades = parse_trades(data, 0)
+    assert [t.side for t in trades] == [Side.BUY, Side.SELL, Side.SELL, Side.UNKNOWN]
+    assert trades[0].px == 150.5 and trades[1].sz == 0.5 and trades[2].time == 12
+
+    state = MarketState()
+    cs = state.ensure_coin("SOL")
+    cs.update_trades(trades, 10)
+    assert cs.trade_imbalance.as_list() == [(2.0 - 1.5) / 3.5]
+
+
+def test_parse_l2_depth():
+    d = _book("BTC", 3, 100.0, 100.5)["data"]
+    d["levels"][0].append({"px": "99.5", "sz": "4", "n": 2})
+    full = parse_l2(d, 0)
+    top = parse_l2(d, 0, depth=1)
+    assert [l.px for l in full.bids] == [100.0, 99.5] and [l.sz for l in full.bids] == [2.0, 4.0]
+    assert len(top.bids) == 1 and top.asks[0].px == 100.5 and top.time == 3
+    assert parse_l2({"levels": []}, 0) is None
+
+
+def test_frame_decoders_match_payload_parsers():
+    frame = {"channel": "trades", "data": [
+        {"coin": "BTC", "side": "B", "px": "100.5", "sz": "0.25", "time": 4, "hash": "0x0", "tid": 1},
+        {"coin": "BTC", "side": "sell", "px": "100.4", "sz": "1.5", "time": 4, "hash": "0x1", "tid": 2},
+    ]}
+    decoders = make_frame_decoders(get_loads("json"), lambda: 0)
+    parsers = make_payload_parsers(lambda: 0)
+    raw = json.dumps(frame)
+    for a, b in zip(decoders["trades"](raw), parsers["trades"](frame["data"])):
+        assert (a.px, a.sz, a.side, a.time, a.coin) == (b.px, b.sz, b.side, b.time, b.coin)
+
+    book = _book("ETH", 9, 10.0, 10.1)
+    a = decoders["l2Book"](json.dumps(book))
+    b = parsers["l2Book"](book["data"])
+    assert (a.coin, a.time, a.bids[0].px, a.asks[0].sz) == (b.coin, b.time, b.bids[0].px, b.asks[0].sz)
+
+
+def _levels(pxs, szs):
+    return [Level(px=p, sz=s) for p, s in zip(pxs, szs)]
+
+
+def test_orderbook_incremental_matches_rebuild():
+    import numpy as np
+
+    rng = np.random.default_rng(3)
+    bid_px = [100.0 - 0.01 * i for i in range(20)]
+    ask_px = [100.02 + 0.01 * i for i in range(20)]
+    book = OrderBook(bands=(1.0, 5.0))
+    for step in range(300):
+        bid_sz = rng.uniform(0.1, 5.0, 20).tolist()
+        ask_sz = rng.uniform(0.1, 5.0, 20).tolist()
+        if step % 7 == 0:  # shift prices now and then to exercise the rebuild path
+            bid_px = [p + 0.01 for p in bid_px]
+            ask_px = [p + 0.01 for p in ask_px]
+        book.apply(_levels(bid_px, bid_sz), _levels(ask_px, ask_sz))
+
+        fresh = OrderBook(bands=(1.0, 5.0))
+        fresh.apply(_levels(bid_px, bid_sz), _levels(ask_px, ask_sz))
+        for k, v in fresh.features.items():
+            assert book.features[k] == pytest.approx(v, rel=1e-9, abs=1e-9), k
+
+
+def test_orderbook_features_and_unchanged_snapshot():
+    book = OrderBook(bands=(2.0,))
+    bids = _levels([100.0, 99.99, 99.0], [1.0, 2.0, 50.0])
+    asks = _levels([100.01, 100.02], [3.0, 1.0])
+    assert book.apply(bids, asks)
+    f = book.features
+    # 99.0 is ~100 bps from the best bid, outside the 2 bps band
+    assert f["depth_2bps"] == pytest.approx(1.0 + 2.0 + 3.0 + 1.0)
+    assert f["microprice"] == pytest.approx((100.0 * 3.0 + 100.01 * 1.0) / 4.0)
+    assert f["micro_dev_bps"] < 0  # heavier ask at the touch leans the microprice toward the bid
+    assert not book.apply(bids, asks)
+    assert book.updates == 1
+
+
+def _candle(coin, t, c, v):
+    return {"channel": "candle", "data": {"t": t, "T": t + 59_999, "s": coin, "i": "1m", "o": "10", "c": str(c),
+                                          "h": "11", "l": "9", "v": str(v), "n": 3}}
+
+
+def _ctx(coin, funding, oi, premium="0.0001"):
+    return {"channel": "activeAssetCtx", "data": {"coin": coin, "ctx": {
+        "funding": str(funding), "openInterest": str(oi), "oraclePx": "10.0", "markPx": "10.01",
+        "premium": premium, "dayNtlVlm": "1000", "prevDayPx": "9.9", "midPx": "10.0"}}}
+
+
+def test_candle_and_ctx_decoders_match_payload_parsers():
+    decoders = make_frame_decoders(get_loads("json"), lambda: 0)
+    parsers = make_payload_parsers(lambda: 0)
+    candle = _candle("BTC", 60_000, 10.5, 2.25)
+    a, b = decoders["candle"](json.dumps(candle)), parsers["candle"](candle["data"])
+    for c in (a, b):
+        assert (c.coin, c.open_ms, c.close_ms, c.o, c.c, c.v, c.n) == ("BTC", 60_000, 119_999, 10.0, 10.5, 2.25, 3)
+    for premium in ("0.0002", None):
+        ctx = _ctx("ETH", 1.25e-5, 5000.5, premium)
+        for u in (decoders["activeAssetCtx"](json.dumps(ctx)), parsers["activeAssetCtx"](ctx["data"])):
+            assert u.coin == "ETH"
+            assert (u.ctx.funding, u.ctx.open_interest, u.ctx.mark_px, u.ctx.oracle_px) == (1.25e-5, 5000.5, 10.01, 10.0)
+            assert u.ctx.premium == (None if premium is None else 0.0002)
+
+
+def test_candle_and_ctx_series_feed_features():
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    for i, t in enumerate((0, 0, 60_000)):  # the open candle is re-sent as it builds
+        client.on_frame(json.dumps(_candle("BTC", t, 10 + i, i)))
+    cs = state.coins["BTC"]
+    assert cs.version == 0  # candles feed no feature
+    assert cs.candles.times().tolist() == [0, 60_000] and cs.candles.column("c").tolist() == [11.0, 12.0]
+
+    funding = [1e-5, 1e-5, 2e-5, 0.0, 3e-5, 1e-5, 5e-5]
+    for minute, f in enumerate(funding):
+        client.on_frame(json.dumps(_book("BTC", minute * 60_000 + 1, 100.0, 100.5)))
+        client.on_frame(json.dumps(_ctx("BTC", f, 1000 + 100 * minute)))
+        client.on_frame(json.dumps(_ctx("BTC", f, 1000 + 100 * minute)))  # same minute: same row
+    assert len(cs.ctx) == len(funding)
+    feat = summarize_features(cs)
+    assert feat["oi_change"] == pytest.approx(1600 / 1100 - 1)  # vs the row 5 minutes back
+    assert feat["funding_z"] == pytest.approx((5e-5 - np.mean(funding)) / np.std(funding))
+    assert [k for k in feat] == list(FEATURE_KEYS)
+
+
+def test_series_ring_is_bounded():
+    ring = SeriesRing(("x",), capacity=4)
+    for t in range(10):
+        ring.push(t, (float(t),))
+    assert len(ring) == 4 and ring.times().tolist() == [6, 7, 8, 9] and ring.column("x").tolist() == [6, 7, 8, 9]
+    ring.push(5, (-1.0,))  # late: lands in the newest row
+    assert ring.times().tolist() == [6, 7, 8, 9] and ring.last("x") == -1.0
+
+
+def test_subscribe_only_feature_streams():
+    sent = []
+    client = HyperliquidWS(MarketState(), HLConfig(streams=streams_for()))
+
+    async def send(obj):
+        sent.append(obj["subscription"])
+
+    client._send = send
+    asyncio.run(client._subscribe_all(["BTC"]))
+    assert sent == [{"type": "l2Book", "coin": "BTC"}, {"type": "trades", "coin": "BTC"}, {"type": "activeAssetCtx", "coin": "BTC"}]
@@ -0,0 +1,53 @@
+import json
+import re
+
+import numpy as np
+
+from api.snapshot import SnapshotCache
+from config import HLConfig
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.latency import BUCKET_HIGH_US, BUCKET_LOW_US, SUB_BUCKETS, LatencyTracker, bucket_index, bucket_indices
+from ingestion.market_state import MarketState
+from tools.synth import iter_synthetic
+
+
+def test_buckets_scalar_and_vector_agree_within_precision():
+    rng = np.random.default_rng(0)
+    us = np.concatenate((np.arange(200), rng.integers(0, 1 << 33, 5000), [-5, (1 << 32) - 1]))
+    idx = bucket_indices(us)
+    assert idx.tolist() == [bucket_index(int(v)) for v in us]
+    v = np.clip(us, 0, (1 << 32) - 1)
+    assert np.all((BUCKET_LOW_US[idx] <= v) & (v <= BUCKET_HIGH_US[idx]))
+    assert np.all(BUCKET_HIGH_US - BUCKET_LOW_US + 1 <= np.maximum(1, BUCKET_LOW_US / SUB_BUCKETS + 1))
+
+
+def test_tracker_counts_stages_and_exports_prometheus():
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    lat = client.latency = LatencyTracker(batch=64)
+    cache = SnapshotCache(state, policy="eager")
+    cache.latency = lat
+    n = {"trades": 0, "l2Book": 0}
+    for m in iter_synthetic(["BTC", "ETH"], 500, seed=3, levels=5):
+        client.on_frame(json.dumps(m, separators=(",", ":")))
+        if m["channel"] in n:
+            n[m["channel"]] += 1
+    s = lat.summary()
+    assert {ch: e["count"] for ch, e in s["decode"]["channel"].items() if ch in n} == n
+    # synthetic exchange timestamps are in 2024, so receipt lag is large but recorded for trades / l2Book only
+    assert s["exchange_to_receipt"]["all"]["count"] == sum(n.values())
+    assert s["exchange_to_receipt"]["all"]["p50"] > 1e9
+    assert s["apply"]["all"]["p50"] <= s["apply"]["all"]["p99"]
+    assert s["snapshot"]["horizon"]["count"]["count"] == s["serialize"]["all"]["count"] > 0
+    assert set(lat.summary("BTC")["decode"]["channel"]) <= {"trades", "l2Book", "candle", "activeAssetCtx"}
+
+    text = lat.prometheus()
+    buckets = [int(v) for v in re.findall(r'hl_latency_seconds_bucket\{stage="decode",channel="l2Book",le="[^"]+"\} (\d+)', text)]
+    assert buckets == sorted(buckets) and buckets[-1] == n["l2Book"]
+    assert f'hl_latency_seconds_count{{stage="decode",channel="l2Book"}} {n["l2Book"]}' in text
+    assert 'coin="BTC"' in lat.prometheus(per_coin=True)
+
+    env = cache.get("BTC")
+    cs = state.coins["BTC"]
+    assert env.source_ts_ms == max(cs.last_trade_ms, cs.last_book_ms)
+    assert env.age_ms == env.timestamp_ms - env.source_ts_ms
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from ingestion.market_state import CoinState, RollingWindow, TimeWindow
+from ingestion.messages import Side, Trade
+from features.compute import summarize_features
+
+
+def test_rolling_window_stats_match_numpy_after_wraparound():
+    rng = np.random.default_rng(7)
+    w = RollingWindow(maxlen=120)
+    xs = rng.normal(1e-5, 3e-4, size=1000)
+    for i, x in enumerate(xs):
+        w.push(x)
+        window = xs[max(0, i - 119): i + 1]
+        assert w.mean() == pytest.approx(float(np.mean(window)), rel=1e-9, abs=1e-15)
+        assert w.std() == pytest.approx(float(np.std(window)), rel=1e-7, abs=1e-15)
+    assert len(w) == 120
+
+
+def test_rolling_window_empty_and_constant():
+    w = RollingWindow(maxlen=5)
+    assert w.mean() == 0.0 and w.std() == 0.0
+    for _ in range(20):
+        w.push(0.25)
+    assert w.mean() == pytest.approx(0.25)
+    assert w.std() == pytest.approx(0.0, abs=1e-12)
+
+
+def test_summarize_features_matches_full_window_recomputation():
+    rng = np.random.default_rng(11)
+    cs = CoinState(coin="BTC")
+    mid = 100.0
+    for i in range(400):
+        mid *= 1.0 + rng.normal(0.0, 5e-4)
+        half = mid * rng.uniform(1e-5, 5e-4)
+        cs.update_book_top(mid - half, rng.uniform(0.1, 5.0), mid + half, rng.uniform(0.1, 5.0), i)
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        cs.update_trades([Trade(mid, rng.uniform(0.1, 2.0), side, i)], i)
+
+    feat = summarize_features(cs)
+    expected = {
+        "ret_mean": np.mean(cs.mid_returns.as_list()),
+        "ret_std": np.std(cs.mid_returns.as_list()),
+        "ob_imb_mean": np.mean(cs.vol_imbalance.as_list()),
+        "ob_imb_std": np.std(cs.vol_imbalance.as_list()),
+        "spread_mean": np.mean(cs.spread_norm.as_list()),
+        "trade_imb_mean": np.mean(cs.trade_imbalance.as_list()),
+        "trade_imb_std": np.std(cs.trade_imbalance.as_list()),
+    }
+    for k, v in expected.items():
+        assert feat[k] == pytest.approx(float(v), rel=1e-9, abs=1e-12), k
+
+
+def test_rolling_window_view_is_ordered_and_zero_copy():
+    w = RollingWindow(maxlen=4)
+    for x in range(1, 11):
+        w.push(x)
+    v = w.view()
+    assert v.tolist() == [7.0, 8.0, 9.0, 10.0]
+    assert np.shares_memory(v, w.view())
+    assert not v.flags.writeable
+    assert w.as_list() == [7.0, 8.0, 9.0, 10.0]
+
+def test_time_window_matches_numpy_over_each_horizon():
+    rnd = np.random.default_rng(3)
+    horizons = {"1s": 1_000, "5s": 5_000, "20s": 20_000}
+    tw = TimeWindow(horizons, capacity=64)
+    ts, xs = [], []
+    t = 0
+    for _ in range(500):
+        t += int(rnd.integers(0, 400))  # duplicate timestamps included
+        x = float(rnd.normal())
+        tw.push(t, x)
+        ts.append(t)
+        xs.append(x)
+        for label, span in horizons.items():
+            live = [v for s, v in zip(ts, xs) if s > t - span][-64:]
+            assert tw.count(label) == len(live)
+            np.testing.assert_allclose(tw.view(label), live)
+            assert tw.mean(label) == pytest.approx(np.mean(live), abs=1e-9)
+            assert tw.std(label) == pytest.approx(np.std(live), abs=1e-9)
+
+def test_summarize_features_by_horizon():
+    cs = CoinState(coin="X")
+    for i in range(40):
+        cs.update_book_top(100.0 + 0.01 * i, 1.0, 100.02 + 0.01 * i, 3.0, i * 1_000)
+    assert cs.timed["vol_imbalance"].count("10s") == 10
+    assert cs.timed["vol_imbalance"].count("60s") == 40
+    f10 = summarize_features(cs, "10s")
+    assert f10["ob_imb_mean"] == pytest.approx(-0.5)
+    with pytest.raises(KeyError):
+        summarize_features(cs, "7s")
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+import time
+
+from config import HLConfig
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from ingestion.pool import ConnectionPool
+from tools.fake_ws import start_in_thread
+
+
+def _frame(m):
+    return json.dumps(m, separators=(",", ":"))
+
+
+def _book(t, mid):
+    return _frame({"channel": "l2Book", "data": {"coin": "BTC", "time": t, "levels": [
+        [{"px": str(mid - 0.5), "sz": "1.0", "n": 1}], [{"px": str(mid + 0.5), "sz": "1.0", "n": 1}]]}})
+
+
+def _trades(*times):
+    return _frame({"channel": "trades", "data": [
+        {"coin": "BTC", "side": "B", "px": "100", "sz": "1", "time": t} for t in times]})
+
+
+def test_resync_skips_gap_return_and_replayed_trades():
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig())
+    for frame in (_book(1, 100.0), _book(2, 101.0), _trades(3, 3)):
+        client.on_frame(frame)
+    cs = state.coins["BTC"]
+    assert len(cs.mid_returns) == 1
+
+    client._resync(["BTC", "ETH"])
+    version = cs.version
+    client.on_frame(_trades(3, 3))  # the post-subscribe snapshot: nothing new
+    assert cs.version == version and cs.last_trade_ms == 3
+    client.on_frame(_book(10, 150.0))  # first book after the gap: no return across it
+    assert len(cs.mid_returns) == 1
+    client.on_frame(_book(11, 151.0))
+    assert len(cs.mid_returns) == 2
+    client.on_frame(_trades(3, 3))  # only the first batch after a resync is filtered
+    assert cs.last_trade_ms == 3 and cs.version == version + 3
+
+
+def test_pool_shards_and_recovers_from_dropped_connections():
+    url, fake, stop = start_in_thread(rate=2000.0, levels=5)
+    coins = [f"C{i:03d}" for i in range(200)]
+    state = MarketState()
+    pool = ConnectionPool(state, HLConfig(ws_url=url, reconnect_backoff_sec=5.0), connections=4)
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_until_complete, args=(pool.connect_and_run(coins),), daemon=True)
+    t.start()
+
+    def wait_for(cond, timeout=30.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline and not cond():
+            time.sleep(0.02)
+        return cond()
+
+    try:
+        assert wait_for(lambda: state.ws_connected and len(state.coins) == len(coins))
+        assert [len(s) for s in pool.shards] == [50] * 4
+        assert fake.subscribes == 4 * (1 + 4 * 50)  # allMids + four per-coin channels per connection
+
+        t0 = time.perf_counter()
+        fake.drop_all()
+        assert wait_for(lambda: all(c.connects == 2 for c in pool.clients) and state.ws_connected)
+        versions = {c: cs.version for c, cs in state.coins.items()}
+        assert wait_for(lambda: all(state.coins[c].version > v for c, v in versions.items()))
+        recovery = time.perf_counter() - t0
+    finally:
+        # connect_and_run returns once every connection has closed, which ends the loop
+        asyncio.run_coroutine_threadsafe(pool.stop(), loop)
+        t.join(10)
+        stop()
+    assert not t.is_alive()
+    assert fake.drops == 4 and fake.subscribes == 2 * 4 * (1 + 4 * 50)
+    # well under the 5 s reconnect backoff: a connection that was up retries immediately
+    assert recovery < 4.0
+    assert not state.ws_connected
+
+
+def test_sessions_rejected_after_subscribe_back_off_and_are_logged(caplog):
+    url, fake, stop = start_in_thread(rate=2000.0, levels=5, reject=True)
+    state = MarketState()
+    client = HyperliquidWS(state, HLConfig(ws_url=url, reconnect_backoff_sec=0.2, reconnect_jitter_sec=0.0))
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_until_complete, args=(client.connect_and_run(["BTC"]),), daemon=True)
+    with caplog.at_level("WARNING", logger="ingestion.hyperliquid_ws"):
+        t.start()
+        try:
+            time.sleep(2.0)
+        finally:
+            asyncio.run_coroutine_threadsafe(client.stop(), loop)
+            t.join(10)
+            stop()
+    # subscribed every time but never got data: 0, 0.2, 0.52, 1.03, 1.85 s, not a retry every few ms
+    assert 3 <= client.connects <= 6 and fake.drops == client.connects
+    assert client.errors == client.connects and client.last_error
+    assert len([r for r in caplog.records if "session failed" in r.getMessage()]) == 1  # once per distinct error
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+import time
+
+from config import HLConfig
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import MarketState
+from tools.capture import CaptureReader
+from tools.fake_ws import start_in_thread
+from tools.recorder import FrameRecorder
+
+
+def _frame(i):
+    return json.dumps({"channel": "trades", "data": [{"coin": "BTC", "side": "B", "px": "1", "sz": "1", "time": i}]})
+
+
+def test_recorder_rotates_by_size_and_keeps_order(tmp_path):
+    with FrameRecorder(str(tmp_path / "cap.ndjson"), batch=50, rotate_mb=0.002) as rec:
+        for i in range(500):
+            rec.submit(_frame(i))
+            if i % 50 == 0:
+                time.sleep(0.01)
+    assert len(rec.files) > 1
+    times = []
+    for path in rec.files:
+        with open(path, "rb") as f:
+            times.extend(json.loads(line)["data"][0]["time"] for line in f)
+    assert times == list(range(500))
+    s = rec.stats()
+    assert s["written"] == s["submitted"] == 500 and s["dropped"] == 0 and s["queue_depth"] == 0
+    assert s["write_ms_max"] is not None
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    rec = FrameRecorder(str(tmp_path / "cap.ndjson"), max_queue=5)
+    for i in range(12):  # writer not started yet: nothing drains
+        rec.submit(_frame(i))
+    assert rec.stats()["queue_depth"] == 5
+    rec.start()
+    rec.close()
+    s = rec.stats()
+    assert (s["written"], s["dropped"], s["max_queue_depth"]) == (5, 7, 5)
+    with open(rec.files[0], "rb") as f:
+        assert [json.loads(line)["data"][0]["time"] for line in f] == list(range(5))
+
+
+def test_rotates_while_the_queue_never_drains(tmp_path):
+    rec = FrameRecorder(str(tmp_path / "cap.ndjson"), batch=50, rotate_mb=0.002)
+    for i in range(500):  # a backlog the writer cannot get ahead of
+        rec.submit(_frame(i))
+    rec.start()
+    rec.close()
+    assert len(rec.files) > 1 and rec.stats()["written"] == 500
+
+
+def test_write_failure_is_counted_and_the_writer_carries_on(tmp_path):
+    rec = FrameRecorder(str(tmp_path / "cap.ndjson"), batch=10)
+    write = rec._write
+    calls = []
+
+    def flaky(frames):
+        calls.append(len(frames))
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        write(frames)
+
+    rec._write = flaky
+    for i in range(10):
+        rec.submit(_frame(i))
+    rec.start()
+    while not calls:
+        time.sleep(0.01)
+    for i in range(10, 20):
+        rec.submit(_frame(i))
+    rec.close()
+    s = rec.stats()
+    assert (s["errors"], s["lost"], s["written"]) == (1, 10, 10)
+    assert "No space left" in s["last_error"]
+    with open(rec.files[0], "rb") as f:
+        assert [json.loads(line)["data"][0]["time"] for line in f] == list(range(10, 20))
+
+
+def test_ws_tap_records_live_feed(tmp_path):
+    url, fake, stop = start_in_thread(rate=2000.0)
+    rec = FrameRecorder(str(tmp_path / "live.hlcap")).start()
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig(ws_url=url))
+    client.tap = rec.submit
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_until_complete, args=(client.connect_and_run(["BTC", "ETH"]),), daemon=True)
+    t.start()
+    try:
+        deadline = time.time() + 30
+        while time.time() < deadline and rec.submitted < 200:
+            time.sleep(0.05)
+    finally:
+        loop.call_soon_threadsafe(client._stop.set)
+        stop()  # closing the server ends the client's read loop
+        t.join(10)
+    rec.close()
+    assert rec.submitted >= 200 and rec.written == rec.submitted
+    with CaptureReader(rec.files[0]) as r:
+        assert r.n_events == rec.written
+        assert set(r.coins) == {"BTC", "ETH"}
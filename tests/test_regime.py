@@ -1,6 +1,9 @@
+import numpy as np
 import pytest
 
-from models.regime import classify_regime
+from api.schemas import Regime, Signals
+from models.regime import REGIME_LABELS, classify_regime, classify_regime_array, thresholds_for
+from scoring.edge_score import explain_labels, score_edge, score_edge_array
 
 
 def test_liquidation_risk_high_vol_and_wide_spread():
@@ -38,3 +41,96 @@ def test_unknown_default_case():
     r = classify_regime(ret_std=0.0020, spread_mean=0.0004, trade_imb_std=0.20, mom_raw=0.20)
     assert r.label == "UNKNOWN"
     assert r.confidence == pytest.approx(0.25)
+
+
+def _score_edge_both(regime, signals):
+    # score_edge, checked against score_edge_array on the same single row
+    e = score_edge(regime, signals)
+    score, actionable, explain = score_edge_array(
+        np.array([REGIME_LABELS.index(regime.label)]), np.array([signals.momentum]),
+        np.array([signals.liquidity]), np.array([signals.risk]),
+    )
+    assert (score[0], bool(actionable[0]), explain_labels(explain[0])) == (e.score, e.actionable, e.explain)
+    return e
+
+
+def test_edge_trending_with_momentum_is_actionable():
+    e = _score_edge_both(Regime(label="TRENDING", confidence=0.8), Signals(momentum=0.9, liquidity=0.7, risk=0.1))
+    assert e.score == pytest.approx(0.25 + 0.55 * 0.9 + 0.45 * 0.7 - 0.65 * 0.1)
+    assert e.actionable
+    assert e.explain == ["trend_regime", "momentum_high", "liquidity_good", "actionable"]
+
+
+def test_edge_risky_regimes_are_never_actionable():
+    signals = Signals(momentum=1.0, liquidity=1.0, risk=0.0)
+    for label, tag in (("LIQUIDATION_RISK", "liq_risk_regime"), ("CHAOTIC", "chaotic_regime")):
+        e = _score_edge_both(Regime(label=label, confidence=0.6), signals)
+        assert e.score > 0.55 and not e.actionable
+        assert e.explain == [tag, "momentum_high", "liquidity_good"]
+
+
+def test_edge_score_is_clamped():
+    e = _score_edge_both(Regime(label="UNKNOWN", confidence=0.25), Signals(momentum=0.0, liquidity=0.0, risk=1.0))
+    assert e.score == 0.0 and not e.actionable
+    assert e.explain == ["risk_elevated"]
+
+
+# --- array APIs vs the scalar ones -------------------------------------------------------------
+
+
+# the cases above, with what both paths must return
+_CASES = [
+    (dict(ret_std=0.0030, spread_mean=0.0010, trade_imb_std=0.20, mom_raw=0.0), "LIQUIDATION_RISK", 0.64),
+    (dict(ret_std=0.0040, spread_mean=0.0002, trade_imb_std=0.70, mom_raw=0.10), "LIQUIDATION_RISK", 0.72),
+    (dict(ret_std=0.0015, spread_mean=0.0003, trade_imb_std=0.10, mom_raw=0.60), "TRENDING", 1.0),
+    (dict(ret_std=0.0010, spread_mean=0.0002, trade_imb_std=0.10, mom_raw=0.05), "MEAN_REVERTING", 0.65),
+    (dict(ret_std=0.0019, spread_mean=0.0007, trade_imb_std=0.20, mom_raw=0.20), "CHAOTIC", 0.6),
+    (dict(ret_std=0.0020, spread_mean=0.0004, trade_imb_std=0.20, mom_raw=0.20), "UNKNOWN", 0.25),
+]
+
+
+def _random_inputs(n, seed):
+    # values clustered around every threshold (exact threshold values included), plus a few NaN / inf
+    rng = np.random.default_rng(seed)
+    th = thresholds_for(None)
+
+    cols = {
+        "ret_std": np.abs(rng.choice([th.high_vol, th.mr_vol, 0.0], n) + rng.normal(0, 5e-4, n)),
+        "spread_mean": np.abs(th.wide_spread + rng.normal(0, 3e-4, n)),
+        "trade_imb_std": np.abs(th.chaotic_flow + rng.normal(0, 0.2, n)),
+        "mom_raw": rng.choice([-1, 1], n) * rng.choice([th.trend_mom, th.mr_mom, 1.0], n) + rng.normal(0, 0.2, n),
+    }
+    exact = {"ret_std": (th.high_vol, th.mr_vol), "spread_mean": (th.wide_spread,),
+             "trade_imb_std": (th.chaotic_flow,), "mom_raw": (th.trend_mom, -th.mr_mom, 1.0)}
+    for k, x in cols.items():
+        pick = rng.random(n) < 0.1
+        x[pick] = rng.choice(exact[k], int(pick.sum()))
+        x[rng.random(n) < 0.01] = np.nan
+        x[rng.random(n) < 0.005] = np.inf
+    signals = rng.choice([0.0, 0.55, 0.6, 1.0], (3, n)) + rng.normal(0, 0.1, (3, n)) * (rng.random((3, n)) < 0.8)
+    return cols, np.clip(signals, 0.0, 1.0)
+
+
+@pytest.mark.parametrize("case,label,confidence", _CASES)
+def test_both_paths_match_existing_cases(case, label, confidence):
+    r = classify_regime(**case)
+    code, conf = classify_regime_array(**{k: np.array([v]) for k, v in case.items()})
+    assert r.label == REGIME_LABELS[code[0]] == label
+    assert r.confidence == conf[0] == pytest.approx(confidence)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_array_and_scalar_apis_match(seed):
+    cols, (mom, liq, risk) = _random_inputs(4000, seed)
+    code, conf = classify_regime_array(**cols)
+    score, actionable, explain = score_edge_array(code, mom, liq, risk)
+    seen = set()
+    for i in range(len(code)):
+        args = {k: float(v[i]) for k, v in cols.items()}
+        ref = classify_regime(**args)
+        assert (REGIME_LABELS[code[i]], conf[i]) == (ref.label, ref.confidence)
+
+        edge = score_edge(ref, Signals(momentum=mom[i], liquidity=liq[i], risk=risk[i]))
+        assert (score[i], bool(actionable[i]), explain_labels(explain[i])) == (edge.score, edge.actionable, edge.explain)
+        seen.add(ref.label)
+    assert seen == set(REGIME_LABELS)  # every branch exercised
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from config import HLConfig
+from features.compute import FEATURE_KEYS, summarize_features
+from ingestion.market_state import CoinState
+from ingestion.sharded import FeaturePublisher, ShardedIngest, shard_coins
+from ingestion.shm import SharedFeatureSource, SharedFeatureTable
+import api.snapshot
+from api.snapshot import SnapshotCache, build_envelope
+from tools.fake_ws import start_in_thread
+
+
+def test_shard_coins_round_robin():
+    assert shard_coins(["A", "B", "C", "D", "E"], 2) == [["A", "C", "E"], ["B", "D"]]
+    assert shard_coins(["A"], 4) == [["A"]]
+
+
+def test_table_roundtrip_between_handles():
+    table = SharedFeatureTable.create(["BTC", "ETH"], ["10s", "60s"], n_workers=1)
+    try:
+        reader = SharedFeatureTable.attach(table.name)
+        assert reader.coins == ["BTC", "ETH"]
+        assert reader.horizons == [None, "10s", "60s"]
+        slot = reader.slot("ETH", "60s")
+        assert reader.read(slot) is None  # never written
+
+        values = [float(i) for i in range(len(FEATURE_KEYS))]
+        table.write(slot, 7, 111, 222, values)
+        assert reader.read(slot) == (7, 111, 222, *values)
+        assert reader.version(slot) == 7
+
+        # a writer stalled mid-write (odd seq) never yields a torn row
+        k = slot * table._stride_q
+        table._q[k] += 1
+        assert reader.read(slot) is None
+        table._q[k] += 1
+        reader.close()
+    finally:
+        table.close()
+
+
+def test_table_keeps_long_names_intact():
+    coins = ["BTC", "@1234", "PURR/USDC-SPOT-LONGNAME", "\u00e9t\u00e9-coin-with-a-long-name"]
+    table = SharedFeatureTable.create(coins, ["10s", "3600s_ewm"], n_workers=1)
+    try:
+        reader = SharedFeatureTable.attach(table.name)
+        assert reader.coins == coins
+        assert reader.horizons == [None, "10s", "3600s_ewm"]
+        assert reader.slot(coins[2], "3600s_ewm") == table.slot(coins[2], "3600s_ewm")
+        reader.close()
+    finally:
+        table.close()
+
+
+def test_published_features_match_local_envelope(monkeypatch):
+    table = SharedFeatureTable.create(["BTC"], ["10s"], n_workers=1)
+    try:
+        cs = CoinState(coin="BTC", horizons={"10s": 10_000})
+        pub = FeaturePublisher(table, 0)
+        for i in range(30):
+            cs.update_book_top(100.0 + 0.01 * i, 1.0, 100.02 + 0.01 * i, 2.0, i * 500)
+        pub(cs)
+        source = SharedFeatureSource(table)
+        seen = []
+        source.add_listener(seen.append)
+        assert source.poll() == 1 and seen == ["BTC"]
+        assert source.poll() == 0
+
+        version, feat = source.read("BTC", "10s")
+        assert version == cs.version
+        assert feat == pytest.approx(summarize_features(cs, "10s"))
+        # one clock for both, so the wall-clock fields (timestamp_ms, age_ms) compare too
+        monkeypatch.setattr(api.snapshot, "_now_ms", lambda: 1_700_000_000_000)
+        env = SnapshotCache(source).get("BTC")
+        assert env.age_ms == 1_700_000_000_000 - cs.last_book_ms
+        assert env.model_dump() == build_envelope(cs).model_dump()
+    finally:
+        table.close()
+
+
+def test_sharded_ingest_against_fake_server():
+    url, fake, stop = start_in_thread(rate=2000.0)
+    coins = ["BTC", "ETH", "SOL"]
+    ingest = ShardedIngest(coins, 2, HLConfig(ws_url=url))
+    try:
+        ingest.start()
+        deadline = time.time() + 60
+        while time.time() < deadline and sorted(ingest.source.coins()) != sorted(coins):
+            time.sleep(0.1)
+        assert sorted(ingest.source.coins()) == sorted(coins)
+        assert fake.connections == 2
+        cache = SnapshotCache(ingest.source)
+        assert cache.get("SOL", "60s").coin == "SOL"
+        while time.time() < deadline and not ingest.source.connected:
+            time.sleep(0.1)
+        assert all(w["updates"] > 0 for w in ingest.table.workers())
+    finally:
+        ingest.stop()
+        stop()
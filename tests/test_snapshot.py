@@ -0,0 +1,81 @@
+import json
+
+from ingestion.market_state import MarketState
+from api.snapshot import SnapshotCache, build_envelope
+
+
+def _feed_book(state, coin, n, px=100.0):
+    cs = state.ensure_coin(coin)
+    for i in range(n):
+        cs.update_book_top(px + i * 0.01, 1.0, px + i * 0.01 + 0.02, 2.0, i)
+        state.notify(cs)
+    return cs
+
+
+def test_lazy_cache_recomputes_only_when_version_changes():
+    state = MarketState()
+    cache = SnapshotCache(state, policy="lazy")
+    cs = _feed_book(state, "BTC", 10)
+
+    first = cache.lookup("BTC")
+    assert cache.lookup("BTC") is first
+    assert (cache.hits, cache.misses, cache.recomputes) == (1, 1, 1)
+
+    _feed_book(state, "BTC", 1)
+    assert cache.lookup("BTC") is not first
+    assert cache.recomputes == 2
+    assert cache.stats()["coins"]["BTC"]["versions_behind"] == 0
+    assert cache.get("ETH") is None
+
+
+def test_eager_cache_computes_on_ingest():
+    state = MarketState()
+    cache = SnapshotCache(state, policy="eager")
+    cs = _feed_book(state, "ETH", 5)
+    assert cache.recomputes == 5
+    env = cache.get("ETH")
+    assert cache.recomputes == 5 and cache.hits == 1
+    expected = build_envelope(cs)
+    assert env.regime == expected.regime
+    assert env.signals == expected.signals
+    assert env.edge == expected.edge
+
+
+def test_cached_json_matches_envelope():
+    state = MarketState()
+    cache = SnapshotCache(state)
+    _feed_book(state, "SOL", 3)
+    body = cache.get_json("SOL", now_ms=1_700_000_000_000)
+    assert body == cache.get("SOL", now_ms=1_700_000_000_000).model_dump_json().encode()
+    assert cache.recomputes == 1
+
+
+def test_cached_envelope_is_stamped_per_response(monkeypatch):
+    import api.snapshot
+
+    state = MarketState()
+    cache = SnapshotCache(state)
+    _feed_book(state, "BTC", 3)
+    monkeypatch.setattr(api.snapshot, "_now_ms", lambda: 1_700_000_000_000)
+    assert cache.get("BTC").timestamp_ms == 1_700_000_000_000
+    monkeypatch.setattr(api.snapshot, "_now_ms", lambda: 1_700_000_001_500)
+    env = cache.get("BTC")
+    assert env.timestamp_ms == 1_700_000_001_500 and env.age_ms == 1_700_000_001_500 - env.source_ts_ms
+    assert json.loads(cache.get_json("BTC")) == env.model_dump()
+    assert cache.recomputes == 1
+
+
+def test_eager_refresh_tolerates_horizons_registered_meanwhile():
+    # a threadpool read for a new horizon can land while the ingest loop is refreshing
+    state = MarketState()
+    cache = SnapshotCache(state, policy="eager")
+    refresh = cache._refresh
+
+    def racing_refresh(coin, horizon=None):
+        if horizon is None and "60s" not in cache.stats()["horizons"]:
+            cache.lookup(coin, "60s")
+        return refresh(coin, horizon)
+
+    cache._refresh = racing_refresh
+    _feed_book(state, "BTC", 2)
+    assert cache.stats()["horizons"] == ["60s", "count"]
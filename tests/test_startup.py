@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+from bench.startup import heaviest, parse_importtime
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    code = ("import sys, api.server, tools.replay; "
+            "print([m for m in ('numpy', 'fastapi', 'pydantic', 'uvicorn', 'websockets') if m in sys.modules])")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_parse_importtime():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | site",
+        "import time:        50 |         50 |     json.decoder",
+        "import time:        30 |         80 |   json",
+        "import time:       200 |        200 |   numpy",
+        "import time:        10 |        290 | app",
+    ])
+    rows = parse_importtime(stderr)
+    assert rows[1] == ("json.decoder", 2, 50, 50)
+    assert heaviest(rows, "app", 5) == [("numpy", 200), ("json", 80)]
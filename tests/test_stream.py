@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from ingestion.market_state import MarketState
+from api.snapshot import SnapshotCache
+from api.stream import SignalHub, StreamFilter
+
+
+def test_filter_regime_change_and_edge_delta():
+    f = StreamFilter(on_regime_change=True)
+    assert f.passes("TRENDING", 0.5, None, None)
+    assert not f.passes("TRENDING", 0.9, "TRENDING", 0.5)
+    assert f.passes("CHAOTIC", 0.5, "TRENDING", 0.5)
+
+    f = StreamFilter(min_edge_delta=0.1)
+    assert not f.passes("TRENDING", 0.55, "TRENDING", 0.5)
+    assert f.passes("TRENDING", 0.65, "TRENDING", 0.5)
+
+
+def test_hub_coalesces_bursts_and_serializes_once():
+    async def run():
+        state = MarketState()
+        cache = SnapshotCache(state)
+        hub = SignalHub(cache)
+        a = hub.subscribe(["BTC"], StreamFilter())
+        b = hub.subscribe(None, StreamFilter())
+        cs = state.ensure_coin("BTC")
+        for i in range(50):
+            cs.update_book_top(100.0 + i, 1.0, 100.1 + i, 1.0, i)
+            state.notify(cs)
+        batch_a = await a.next_batch(cache)
+        batch_b = await b.next_batch(cache)
+        assert len(batch_a) == len(batch_b) == 1
+        assert json.loads(batch_a[0])["coin"] == "BTC"
+        assert a.coalesced == 49 and cache.recomputes == 1  # one serialization shared by every subscriber
+
+        hub.unsubscribe(a)
+        cs.update_book_top(200.0, 1.0, 200.1, 1.0, 99)
+        state.notify(cs)
+        assert a not in hub.subscribers
+        assert len(await b.next_batch(cache)) == 1
+
+    asyncio.run(run())
+
+
+def test_rate_limit_defers_until_interval_elapsed():
+    async def run():
+        state = MarketState()
+        cache = SnapshotCache(state)
+        hub = SignalHub(cache)
+        sub = hub.subscribe(["ETH"], StreamFilter(max_rate_hz=20.0))
+        cs = state.ensure_coin("ETH")
+        cs.update_book_top(100.0, 1.0, 100.1, 1.0, 0)
+        state.notify(cs)
+        loop = asyncio.get_running_loop()
+        await sub.next_batch(cache)
+        cs.update_book_top(101.0, 1.0, 101.1, 1.0, 1)
+        state.notify(cs)
+        t0 = loop.time()
+        await sub.next_batch(cache)
+        assert loop.time() - t0 >= 0.04
+
+    asyncio.run(run())
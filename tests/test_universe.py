@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from api.snapshot import build_envelope
+from config import HLConfig
+from features.compute import summarize_features
+from features.universe import regime_labels, universe_features, universe_scores, window_stats
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import CoinState, MarketState, WindowTable
+from tools.synth import synth_coins, write_ndjson
+
+
+@pytest.fixture(scope="module")
+def state(tmp_path_factory):
+    path = write_ndjson(str(tmp_path_factory.mktemp("u") / "u.ndjson"), synth_coins(150), 40_000, seed=5)
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig())
+    with open(path, "rb") as f:
+        for line in f:
+            client.on_frame(line)
+    return state
+
+
+@pytest.mark.parametrize("horizon", [None, "60s"])
+def test_universe_pass_matches_per_coin(state, horizon):
+    uf = universe_features(state, horizon)
+    scores = universe_scores(uf)
+    assert uf.coins == list(state.coins)
+    labels = regime_labels(scores["regime"])
+    for i, coin in enumerate(uf.coins):
+        cs = state.coins[coin]
+        assert uf.versions[i] == cs.version
+        assert uf.row(i) == pytest.approx(summarize_features(cs, horizon), rel=1e-9, abs=1e-12)
+        env = build_envelope(cs, horizon)
+        assert labels[i] == env.regime.label
+        assert scores["confidence"][i] == pytest.approx(env.regime.confidence)
+        assert scores["edge_score"][i] == pytest.approx(env.edge.score)
+        assert bool(scores["actionable"][i]) == env.edge.actionable
+
+
+def test_window_table_grows_and_keeps_windows_bound():
+    table = WindowTable(maxlen=8, capacity=2)
+    rng = np.random.default_rng(1)
+    states = []
+    for i in range(5):  # two doublings
+        cs = CoinState(coin=f"C{i}")
+        table.attach(cs)
+        states.append(cs)
+        for x in rng.normal(size=3 + 2 * i):  # some windows full and wrapped, some still filling up
+            cs.mid_returns.push(x)
+            cs.trade_imbalance.push(-x)
+    assert table.capacity == 8
+    mean, std = window_stats(table)
+    s = table.series.index("mid_returns")
+    for i, cs in enumerate(states):
+        assert table.counts()[s, i] == len(cs.mid_returns)
+        assert mean[s, i] == pytest.approx(float(np.mean(cs.mid_returns.view())))
+        assert std[s, i] == pytest.approx(float(np.std(cs.mid_returns.view())))
+    assert std[table.series.index("spread_norm")].tolist() == [0.0] * 5  # never pushed
@@ -0,0 +1,316 @@
+from __future__ import annotations
+import argparse
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from api.schemas import Edge, Regime, Signals
+from config import HLConfig
+from features.compute import BOOK_KEYS, CTX_KEYS, FEATURE_KEYS, derived_features_array, sigmoid01_exact, summarize_features
+from ingestion.decode import get_loads, peek_channel
+from ingestion.hyperliquid_ws import HyperliquidWS
+from ingestion.market_state import (
+    CTX_BUCKET_MS, CTX_FIELDS, DEFAULT_HORIZONS, SERIES_ROWS, TIME_CAPACITY, WINDOW_LEN, CoinState, MarketState, RollingWindow,
+    SeriesRing, TimeWindow, ctx_features,
+)
+from ingestion.messages import Side, make_frame_decoders, make_payload_parsers
+from ingestion.orderbook import OrderBook
+from models.regime import REGIME_LABELS, classify_regime, classify_regime_array
+from scoring.edge_score import EXPLAIN_FLAGS, score_edge, score_edge_array
+
+# Batch replay of a capture into the full per-update time series of features, regime and edge score.
+#
+# The live path pushes every update through the rolling windows one message at a time. Here a single
+# decode pass only collects each coin's raw series (book tops, trade imbalances) and runs the order book
+# engine and the asset context series, which are inherently sequential. Each window series is then run
+# through the live window classes on its own (no message dispatch, no feature dicts), and everything
+# derived from the window statistics is computed for all rows at once. Row i of the output is exactly,
+# bit for bit, what the live path would have served for that coin right after its i-th update.
+# --verify replays the capture through HyperliquidWS as well and compares row by row.
+
+# update kinds; candles change no feature, so they are not updates here (nor live)
+_BOOK, _TRADE, _CTX = 0, 1, 2
+_ROW_CHANNELS = ("l2Book", "trades", "activeAssetCtx")
+
+class _CoinSeries:
+    # raw per-update inputs for one coin, appended in arrival order
+    __slots__ = ("rows", "ts", "kind", "top", "trade_imb", "book_feat", "ctx_feat", "book", "ctx",
+                 "ctx_now", "last_trade_ms", "last_book_ms")
+
+    def __init__(self):
+        self.rows: List[int] = []  # global update index
+        self.ts: List[int] = []
+        self.kind: List[int] = []
+        self.top: List[Tuple[float, float, float, float]] = []  # per book update
+        self.trade_imb: List[float] = []  # per trade update
+        self.book_feat: List[Tuple[float, ...]] = []  # book features after every update (carried over others)
+        self.ctx_feat: List[Tuple[float, ...]] = []  # asset context features after every update
+        self.book = OrderBook()
+        self.ctx: Optional[SeriesRing] = None
+        self.ctx_now: Tuple[float, ...] = (0.0,) * len(CTX_KEYS)
+        self.last_trade_ms = 0
+        self.last_book_ms = 0
+
+def _iter_frames(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+def collect(path: str, decoder: str = "auto") -> Tuple[Dict[str, _CoinSeries], int]:
+    # Decode pass: same channel sniffing, record types and acceptance rules as HyperliquidWS.
+    loads = get_loads(decoder)
+    frame_decoders = make_frame_decoders(loads, lambda: 0)
+    payload_parsers = make_payload_parsers(lambda: 0)
+    series: Dict[str, _CoinSeries] = {}
+    n = 0
+    buy_side, sell_side = Side.BUY, Side.SELL
+    for raw in _iter_frames(path):
+        ch = peek_channel(raw)
+        if ch is None:
+            m = loads(raw)
+            ch = m.get("channel")
+            if ch not in _ROW_CHANNELS:
+                continue
+            records = payload_parsers[ch](m.get("data"))
+        elif ch in _ROW_CHANNELS:
+            records = frame_decoders[ch](raw)
+        else:
+            continue
+        if records is None:
+            continue
+        if ch == "l2Book":
+            u = records
+            bids, asks = u.bids, u.asks
+            if not (u.coin and bids and asks):
+                continue
+            s = series.get(u.coin)
+            if s is None:
+                s = series[u.coin] = _CoinSeries()
+            s.book.apply(bids, asks)
+            bid, ask = bids[0], asks[0]
+            s.top.append((bid.px, bid.sz, ask.px, ask.sz))
+            s.ts.append(u.time)
+            s.kind.append(_BOOK)
+            s.last_book_ms = u.time
+        elif ch == "activeAssetCtx":
+            u = records
+            if not u.coin:
+                continue
+            s = series.get(u.coin)
+            if s is None:
+                s = series[u.coin] = _CoinSeries()
+            if s.ctx is None:
+                s.ctx = SeriesRing(CTX_FIELDS, SERIES_ROWS, CTX_BUCKET_MS)
+            c = u.ctx
+            ts = max(s.last_trade_ms, s.last_book_ms)  # as HyperliquidWS stamps it
+            s.ctx.push(ts, (c.funding, c.open_interest, c.mark_px, c.oracle_px,
+                            float("nan") if c.premium is None else c.premium))
+            cf = ctx_features(s.ctx)
+            s.ctx_now = tuple(cf[k] for k in CTX_KEYS)
+            s.ts.append(ts)
+            s.kind.append(_CTX)
+        else:
+            if not (records and records[0].coin):
+                continue
+            s = series.get(records[0].coin)
+            if s is None:
+                s = series[records[0].coin] = _CoinSeries()
+            buy = sell = 0.0
+            for t in records:
+                if t.side is buy_side:
+                    buy += t.sz
+                elif t.side is sell_side:
+                    sell += t.sz
+            denom = buy + sell
+            s.trade_imb.append((buy - sell) / denom if denom > 0 else 0.0)
+            s.ts.append(records[0].time)
+            s.kind.append(_TRADE)
+            s.last_trade_ms = records[0].time
+        f = s.book.features
+        s.book_feat.append(tuple(f[k] for k in BOOK_KEYS))
+        s.ctx_feat.append(s.ctx_now)
+        s.rows.append(n)
+        n += 1
+    return series, n
+
+def _window_stats(x: np.ndarray, ts: np.ndarray, horizon_ms: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    # mean / std of the window after each push of x, from the live window classes themselves: the same
+    # sliding Welford updates and periodic resyncs, so the results are bit-identical to the live path.
+    # (Closed-form window sums over the whole series drift from them, by more the longer the capture.)
+    means: List[float] = []
+    stds: List[float] = []
+    if horizon_ms is None:
+        w = RollingWindow(WINDOW_LEN)
+        for v in x.tolist():
+            w.push(v)
+            means.append(w.mean())
+            stds.append(w.std())
+    else:
+        # the horizons of a TimeWindow evolve independently, so one horizon alone matches the live window
+        w = TimeWindow({"h": horizon_ms}, TIME_CAPACITY)
+        for t, v in zip(ts.tolist(), x.tolist()):
+            w.push(t, v)
+            means.append(w.mean("h"))
+            stds.append(w.std("h"))
+    return np.asarray(means, dtype=np.float64), np.asarray(stds, dtype=np.float64)
+
+def _coin_features(s: _CoinSeries, horizon_ms: Optional[int]) -> Dict[str, np.ndarray]:
+    ts = np.asarray(s.ts, dtype=np.int64)
+    kind = np.asarray(s.kind, dtype=np.int8)
+    n = len(ts)
+    book_rows = np.flatnonzero(kind == _BOOK)
+    trade_rows = np.flatnonzero(kind == _TRADE)
+    top = np.asarray(s.top, dtype=np.float64).reshape(-1, 4)
+    bid_px, bid_sz, ask_px, ask_sz = top.T
+    both = (bid_px != 0) & (ask_px != 0)
+    spread = np.where(both, np.maximum(0.0, ask_px - bid_px), 0.0)
+    mid = np.where(both, (ask_px + bid_px) / 2.0, 0.0)
+    denom = bid_sz + ask_sz
+    vol_imb = np.divide(bid_sz - ask_sz, denom, out=np.zeros_like(denom), where=denom > 0)
+    spr = np.divide(spread, mid, out=np.zeros_like(mid), where=mid > 0)
+    # a return is pushed for every positive mid that has a positive predecessor
+    pos = np.flatnonzero(mid > 0)
+    ret = mid[pos[1:]] / mid[pos[:-1]] - 1.0
+    ret_rows = book_rows[pos[1:]]
+
+    pushes = {
+        "mid_returns": (ret_rows, ret),
+        "vol_imbalance": (book_rows, vol_imb),
+        "spread_norm": (book_rows, spr),
+        "trade_imbalance": (trade_rows, np.asarray(s.trade_imb, dtype=np.float64)),
+    }
+    rows = np.arange(n)
+    stats: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for name, (at, x) in pushes.items():
+        mean, std = _window_stats(x, ts[at], horizon_ms)
+        # every update row sees the window as of the latest push at or before it
+        k = np.searchsorted(at, rows, side="right") - 1
+        seen = k >= 0
+        ki = np.maximum(k, 0)
+        stats[name] = (
+            np.where(seen, mean[ki] if len(mean) else 0.0, 0.0),
+            np.where(seen, std[ki] if len(std) else 0.0, 0.0),
+        )
+
+    f: Dict[str, np.ndarray] = {}
+    f["ret_mean"], f["ret_std"] = stats["mid_returns"]
+    f["ob_imb_mean"], f["ob_imb_std"] = stats["vol_imbalance"]
+    f["spread_mean"] = stats["spread_norm"][0]
+    f["trade_imb_mean"], f["trade_imb_std"] = stats["trade_imbalance"]
+    derived_features_array(f, sigmoid01_exact)
+    for keys, rows_feat in ((BOOK_KEYS, s.book_feat), (CTX_KEYS, s.ctx_feat)):
+        block = np.asarray(rows_feat, dtype=np.float64).reshape(n, len(keys))
+        for j, key in enumerate(keys):
+            f[key] = block[:, j]
+    f["ts_ms"] = ts
+    f["version"] = rows + 1
+    return f
+
+def _score_rows(f: Dict[str, np.ndarray], horizon: Optional[str]) -> Dict[str, np.ndarray]:
+    # regime / edge for every row through the array forms of the live models (same rules, same results)
+    code, conf = classify_regime_array(f["ret_std"], f["spread_mean"], f["trade_imb_std"], f["mom_raw"], horizon)
+    score, actionable, explain = score_edge_array(code, f["mom_01"], f["liq_01"], f["risk_01"])
+    return {"regime": code, "confidence": conf, "edge_score": score, "actionable": actionable, "explain": explain}
+
+def backfill(path: str, horizon: Optional[str] = None, decoder: str = "auto") -> Dict[str, np.ndarray]:
+    horizon_ms = None if horizon is None else DEFAULT_HORIZONS[horizon]
+    series, total = collect(path, decoder)
+    coins = sorted(series)
+    parts: List[Dict[str, np.ndarray]] = []
+    for ci, coin in enumerate(coins):
+        s = series[coin]
+        f = _coin_features(s, horizon_ms)
+        f.update(_score_rows(f, horizon))
+        f["coin"] = np.full(len(s.rows), ci, dtype=np.int32)
+        f["seq"] = np.asarray(s.rows, dtype=np.int64)
+        parts.append(f)
+    out: Dict[str, np.ndarray] = {}
+    if parts:
+        order = np.argsort(np.concatenate([p["seq"] for p in parts]), kind="stable")
+        for key in parts[0]:
+            out[key] = np.concatenate([p[key] for p in parts])[order]
+    out["coins"] = np.asarray(coins)
+    out["regime_labels"] = np.asarray(REGIME_LABELS)
+    out["explain_flags"] = np.asarray(EXPLAIN_FLAGS)
+    out["horizon"] = np.asarray(horizon or "")
+    return out
+
+def replay_live(path: str, horizon: Optional[str] = None) -> List[Tuple[str, int, Dict[str, float], Regime, Edge]]:
+    # Reference: every frame through HyperliquidWS.on_frame, features read after each update.
+    state = MarketState()
+    client = HyperliquidWS(state=state, cfg=HLConfig())
+    rows = []
+
+    def snap(cs: CoinState) -> None:
+        feat = summarize_features(cs, horizon)
+        regime = classify_regime(
+            ret_std=feat["ret_std"], spread_mean=feat["spread_mean"],
+            trade_imb_std=feat["trade_imb_std"], mom_raw=feat["mom_raw"], horizon=horizon,
+        )
+        edge = score_edge(regime, Signals(momentum=feat["mom_01"], liquidity=feat["liq_01"], risk=feat["risk_01"]))
+        rows.append((cs.coin, cs.version, feat, regime, edge))
+
+    state.add_listener(snap)
+    for raw in _iter_frames(path):
+        client.on_frame(raw)
+    return rows
+
+def _differ(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # rows where two float columns are not bit-identical (NaN matches NaN)
+    return (a != b) & ~(np.isnan(a) & np.isnan(b))
+
+def verify(out: Dict[str, np.ndarray], path: str) -> List[str]:
+    # every feature, label, confidence, score, actionable flag and explain bit must equal the live value exactly
+    ref = replay_live(path, out["horizon"].item() or None)
+    if len(ref) != len(out["seq"]):
+        return [f"row count: batch {len(out['seq'])} vs live {len(ref)}"]
+    coins = out["coins"].tolist()
+    live: Dict[str, np.ndarray] = {k: np.array([r[2][k] for r in ref]) for k in FEATURE_KEYS}
+    live["coin"] = np.array([coins.index(r[0]) if r[0] in coins else -1 for r in ref])
+    live["version"] = np.array([r[1] for r in ref])
+    live["regime"] = np.array([REGIME_LABELS.index(r[3].label) for r in ref])
+    live["confidence"] = np.array([r[3].confidence for r in ref])
+    live["edge_score"] = np.array([r[4].score for r in ref])
+    live["actionable"] = np.array([r[4].actionable for r in ref])
+    live["explain"] = np.array([sum(1 << EXPLAIN_FLAGS.index(f) for f in r[4].explain) for r in ref])
+    problems: List[str] = []
+    for k, col in live.items():
+        bad = _differ(out[k], col) if col.dtype.kind == "f" else out[k] != col
+        if bad.any():
+            i = int(np.flatnonzero(bad)[0])
+            problems.append(f"{k}: {int(bad.sum())} rows differ (first row {i}, {coins[out['coin'][i]]}: "
+                            f"{out[k][i]!r} vs live {col[i]!r})")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch replay of an NDJSON capture into a columnar feature/signal time series")
+    ap.add_argument("capture", help="NDJSON capture (raw WS frames, one per line)")
+    ap.add_argument("--out", default=None, help="Output .npz (default: <capture>.features.npz)")
+    ap.add_argument("--horizon", default=None, choices=list(DEFAULT_HORIZONS), help="Event-time horizon; default count-based windows")
+    ap.add_argument("--decoder", default="auto")
+    ap.add_argument("--verify", action="store_true", help="Also replay through the live per-message path and compare")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    out = backfill(args.capture, args.horizon, args.decoder)
+    dt = time.perf_counter() - t0
+    n = len(out.get("seq", ()))
+    dest = args.out or args.capture.rsplit(".", 1)[0] + ".features.npz"
+    np.savez(dest, **out)
+    print(f"{n} rows x {len(out['coins'])} coins in {dt:.2f}s ({n / dt if dt else 0:.0f} rows/s) -> {dest}")
+    if args.verify:
+        t0 = time.perf_counter()
+        problems = verify(out, args.capture)
+        print(f"live path: {time.perf_counter() - t0:.2f}s")
+        if problems:
+            print("verify FAILED:")
+            for p in problems:
+                print("  " + p)
+            raise SystemExit(1)
+        print("verify OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ingestion.decode import Frame, get_loads, peek_channel
+from ingestion.messages import L2Update, LevelArrays, Side, Trade, make_frame_decoders
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised when zstandard is absent
+    zstandard = None
+
+# Binary capture format (.hlcap): compressed chunks of pre-decoded records with a footer index.
+#
+#   header  16 bytes   b"HLCAP002", codec (0 none, 1 zlib, 2 zstd), 7 reserved
+#   chunks  each: a frame header (b"HLCK", compressed / decompressed length, n_events, n_entries,
+#           length of the coin JSON, crc32 of the compressed bytes, min / max ts), the coins first
+#           seen in this chunk (JSON), its index entries, then the chunk compressed independently;
+#           decompressed layout:
+#             int32[4]           n_events, n_floats, raw_len, reserved
+#             events[n_events]   ts, off, n, n_ask, coin, channel, flags (24 bytes)
+#             float64[n_floats]  trades: px, sz, side, time per trade;
+#                                l2Book: bid px[], bid sz[], bid n[], ask px[], ask sz[], ask n[]
+#             raw bytes          frames of other channels, verbatim
+#   footer  coins (JSON), chunk table, per-chunk index entries (coin, channel, min/max ts, count)
+#   trailer footer offset, footer length, b"HLCAPEND"
+#
+# The file is memory-mapped on read; the footer tables and, for uncompressed captures, chunk arrays
+# are NumPy views straight into the mapping. Replay consults the index to skip chunks that hold none
+# of the requested coins / channels / time range, and never parses JSON for trades or l2Book.
+# The footer is written by close(). A capture without one (its writer crashed, or is still writing)
+# is read by scanning the chunk frame headers instead, up to the last complete chunk; the frame
+# headers carry everything the footer would.
+
+_MAGIC = b"HLCAP002"
+_CHUNK_MAGIC = b"HLCK"
+_TRAILER_MAGIC = b"HLCAPEND"
+_HEADER = struct.Struct("<8sB7x")
+_TRAILER = struct.Struct("<QQ8s")
+_CHUNK_HEADER = struct.Struct("<iiii")
+_CHUNK_FRAME = struct.Struct("<4sIIIIII4xqq")
+CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+CHANNELS = ("trades", "l2Book", "allMids", "candle", "activeAssetCtx", "other")
+_CH = {name: i for i, name in enumerate(CHANNELS)}
+_TRADES, _L2, _OTHER = _CH["trades"], _CH["l2Book"], _CH["other"]
+NO_COIN = 0xFFFF
+_SIDE_CODES = {Side.BUY: 0.0, Side.SELL: 1.0, Side.UNKNOWN: 2.0}
+_SIDES = (Side.BUY, Side.SELL, Side.UNKNOWN)
+
+EVENT_DTYPE = np.dtype([
+    ("ts", "<i8"), ("off", "<u4"), ("n", "<u4"), ("n_ask", "<u4"), ("coin", "<u2"), ("channel", "u1"), ("flags", "u1"),
+])
+CHUNK_DTYPE = np.dtype([
+    ("offset", "<u8"), ("clen", "<u8"), ("ulen", "<u8"), ("n_events", "<u4"), ("first_entry", "<u4"),
+    ("n_entries", "<u4"), ("_pad", "<u4"), ("min_ts", "<i8"), ("max_ts", "<i8"),
+])
+ENTRY_DTYPE = np.dtype([("min_ts", "<i8"), ("max_ts", "<i8"), ("count", "<u4"), ("coin", "<u2"), ("channel", "u1"), ("_pad", "u1")])
+
+def resolve_codec(name: str = "auto") -> str:
+    if name == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec {name!r}; expected one of {('auto',) + tuple(CODECS)}")
+    if name == "zstd" and zstandard is None:
+        raise ValueError("codec 'zstd' needs the zstandard package")
+    return name
+
+class CaptureWriter:
+    # Appends frames (raw WS text/bytes) or already-decoded records; a chunk is compressed and
+    # written every `chunk_events` events. close() writes the footer index.
+    def __init__(self, path: str, codec: str = "auto", chunk_events: int = 4096, level: int = 3):
+        self.path = path
+        self.codec = resolve_codec(codec)
+        self.chunk_events = chunk_events
+        if self.codec == "zstd":
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+        elif self.codec == "zlib":
+            self._compress = lambda b: zlib.compress(b, min(level * 2, 9))
+        else:
+            self._compress = bytes
+        self._loads = get_loads("auto")
+        self._decoders = make_frame_decoders(self._loads, lambda: 0)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "wb")
+        self._f.write(_HEADER.pack(_MAGIC, CODECS[self.codec]))
+        self._f.flush()
+        self.coins: List[str] = []
+        self._coin_ids: Dict[str, int] = {}
+        self._chunks: List[tuple] = []
+        self._entries: List[tuple] = []
+        self._coins_flushed = 0
+        self._last_ts = 0
+        self.events = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ev: List[tuple] = []
+        self._fl = array("d")
+        self._raw = bytearray()
+        self._index: Dict[Tuple[int, int], List[int]] = {}
+
+    def _coin(self, coin: Optional[str]) -> int:
+        if not coin:
+            return NO_COIN
+        cid = self._coin_ids.get(coin)
+        if cid is None:
+            cid = self._coin_ids[coin] = len(self.coins)
+            self.coins.append(coin)
+        return cid
+
+    def _event(self, ts: int, off: int, n: int, n_ask: int, coin: int, channel: int) -> None:
+        self._ev.append((ts, off, n, n_ask, coin, channel, 0))
+        self._last_ts = ts
+        e = self._index.get((coin, channel))
+        if e is None:
+            self._index[(coin, channel)] = [ts, ts, 1]
+        else:
+            if ts < e[0]:
+                e[0] = ts
+            if ts > e[1]:
+                e[1] = ts
+            e[2] += 1
+        if len(self._ev) >= self.chunk_events:
+            self.flush()
+
+    def write_trades(self, trades: Sequence[Trade]) -> None:
+        if not trades:
+            return
+        fl = self._fl
+        off = len(fl)
+        codes = _SIDE_CODES
+        for t in trades:
+            fl.extend((t.px, t.sz, codes[t.side], t.time))
+        self._event(trades[0].time, off, len(trades), 0, self._coin(trades[0].coin), _TRADES)
+
+    def write_l2(self, u: L2Update) -> None:
+        fl = self._fl
+        off = len(fl)
+        bids, asks = u.bids, u.asks
+        for side in (bids, asks):
+            fl.extend([lv.px for lv in side])
+            fl.extend([lv.sz for lv in side])
+            fl.extend([lv.n for lv in side])
+        self._event(u.time, off, len(bids), len(asks), self._coin(u.coin), _L2)
+
+    def write_raw(self, raw: Frame, channel: Optional[str] = None) -> None:
+        # frames of channels without a record type are kept verbatim; coin / time are indexed when present
+        b = raw.encode() if isinstance(raw, str) else bytes(raw)
+        coin, ts = None, self._last_ts
+        try:
+            m = self._loads(b)
+            channel = channel or m.get("channel")
+            d = m.get("data")
+            if isinstance(d, dict):
+                coin = d.get("coin") or d.get("s")
+                ts = int(d.get("time") or d.get("t") or ts)
+        except Exception:
+            pass
+        off = len(self._raw)
+        self._raw += b
+        self._event(ts, off, len(b), 0, self._coin(coin if isinstance(coin, str) else None), _CH.get(channel, _OTHER))
+
+    def write_frame(self, raw: Frame) -> None:
+        ch = peek_channel(raw)
+        if ch == "trades" or ch == "l2Book":
+            records = self._decoders[ch](raw)
+            if records is not None:
+                if ch == "trades":
+                    self.write_trades(records)
+                elif records.coin:
+                    self.write_l2(records)
+                return
+        self.write_raw(raw, ch)
+
+    def flush(self) -> None:
+        if not self._ev:
+            return
+        ev = np.array(self._ev, dtype=EVENT_DTYPE)
+        payload = b"".join((
+            _CHUNK_HEADER.pack(len(ev), len(self._fl), len(self._raw), 0),
+            ev.tobytes(), self._fl.tobytes(), bytes(self._raw),
+        ))
+        blob = self._compress(payload)
+        entries = [(lo, hi, count, coin, channel, 0) for (coin, channel), (lo, hi, count) in self._index.items()]
+        new_coins = json.dumps(self.coins[self._coins_flushed:]).encode()
+        lo, hi = int(ev["ts"].min()), int(ev["ts"].max())
+        frame = _CHUNK_FRAME.pack(_CHUNK_MAGIC, len(blob), len(payload), len(ev), len(entries), len(new_coins),
+                                  zlib.crc32(blob), lo, hi)
+        self._f.write(b"".join((frame, new_coins, np.array(entries, dtype=ENTRY_DTYPE).tobytes())))
+        offset = self._f.tell()
+        self._f.write(blob)
+        self._f.flush()  # whole chunks reach the file as they are written, for readers of a live capture
+        self._chunks.append((offset, len(blob), len(payload), len(ev), len(self._entries), len(entries), 0, lo, hi))
+        self._entries.extend(entries)
+        self._coins_flushed = len(self.coins)
+        self.events += len(ev)
+        self._reset()
+
+    def tell(self) -> int:
+        # bytes written so far (flushed chunks only)
+        return self._f.tell()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        footer_offset = self._f.tell()
+        coins = json.dumps(self.coins).encode()
+        chunks = np.array(self._chunks, dtype=CHUNK_DTYPE)
+        entries = np.array(self._entries, dtype=ENTRY_DTYPE)
+        head = struct.pack("<III4x", len(coins), len(chunks), len(entries))
+        pad = b"\0" * (-(len(head) + len(coins)) % 8)
+        footer = b"".join((head, coins, pad, chunks.tobytes(), entries.tobytes()))
+        self._f.write(footer)
+        self._f.write(_TRAILER.pack(footer_offset, len(footer), _TRAILER_MAGIC))
+        self._f.close()
+
+    def __enter__(self) -> CaptureWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _darray(fb: memoryview, off: int, n: int) -> array:
+    # floats [off, off + n) of a chunk as a packed array (one memcpy, no per-element boxing)
+    a = array("d")
+    a.frombytes(fb[8 * off:8 * (off + n)])
+    return a
+
+class Chunk:
+    __slots__ = ("events", "floats", "float_bytes", "raw")
+
+    def __init__(self, payload) -> None:
+        n_events, n_floats, raw_len, _ = _CHUNK_HEADER.unpack_from(payload, 0)
+        off = _CHUNK_HEADER.size
+        self.events = np.frombuffer(payload, EVENT_DTYPE, n_events, off)
+        off += n_events * EVENT_DTYPE.itemsize
+        self.floats = np.frombuffer(payload, np.float64, n_floats, off)
+        self.float_bytes = memoryview(payload)[off:off + n_floats * 8]
+        off += n_floats * 8
+        self.raw = memoryview(payload)[off:off + raw_len]
+
+class CaptureReader:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, codec = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a .hlcap capture")
+        self.codec = {v: k for k, v in CODECS.items()}[codec]
+        if self.codec == "zstd":
+            if zstandard is None:
+                raise ValueError(f"{path} is zstd-compressed; install zstandard to read it")
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        elif self.codec == "zlib":
+            self._decompress = zlib.decompress
+        else:
+            self._decompress = None
+        size = len(self._mm)
+        tmagic = None
+        if size >= _HEADER.size + _TRAILER.size:
+            footer_offset, _, tmagic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+        self.recovered = tmagic != _TRAILER_MAGIC  # no footer: the index came from a scan of the chunks
+        if self.recovered:
+            self._scan()
+            return
+        n_coins, n_chunks, n_entries = struct.unpack_from("<III4x", self._mm, footer_offset)
+        off = footer_offset + 16
+        self.coins: List[str] = json.loads(bytes(self._mm[off:off + n_coins]))
+        off += n_coins + (-(16 + n_coins) % 8)
+        self.chunks = np.frombuffer(self._mm, CHUNK_DTYPE, n_chunks, off)
+        off += n_chunks * CHUNK_DTYPE.itemsize
+        self.entries = np.frombuffer(self._mm, ENTRY_DTYPE, n_entries, off)
+        self.coin_ids: Dict[str, int] = {c: i for i, c in enumerate(self.coins)}
+
+    def _scan(self) -> None:
+        # rebuilds the footer tables from the chunk frame headers, stopping at the first chunk that
+        # is cut short or fails its checksum (the tail a crashed writer left behind)
+        mm, size = self._mm, len(self._mm)
+        coins: List[str] = []
+        chunks: List[tuple] = []
+        entries: List[np.ndarray] = []
+        n_entries = 0
+        off = _HEADER.size
+        with memoryview(mm) as view:
+            while off + _CHUNK_FRAME.size <= size:
+                magic, clen, ulen, n_events, n_ent, coins_len, crc, lo, hi = _CHUNK_FRAME.unpack_from(mm, off)
+                body = off + _CHUNK_FRAME.size
+                start = body + coins_len + n_ent * ENTRY_DTYPE.itemsize
+                if magic != _CHUNK_MAGIC or start + clen > size or zlib.crc32(view[start:start + clen]) != crc:
+                    break
+                coins.extend(json.loads(bytes(mm[body:body + coins_len])))
+                entries.append(np.frombuffer(mm, ENTRY_DTYPE, n_ent, body + coins_len).copy())
+                chunks.append((start, clen, ulen, n_events, n_entries, n_ent, 0, lo, hi))
+                n_entries += n_ent
+                off = start + clen
+        self.coins = coins
+        self.chunks = np.array(chunks, dtype=CHUNK_DTYPE)
+        self.entries = np.concatenate(entries) if entries else np.zeros(0, dtype=ENTRY_DTYPE)
+        self.coin_ids = {c: i for i, c in enumerate(self.coins)}
+
+    @property
+    def n_events(self) -> int:
+        return int(self.chunks["n_events"].sum())
+
+    def time_range(self) -> Tuple[int, int]:
+        if not len(self.chunks):
+            return 0, 0
+        return int(self.chunks["min_ts"].min()), int(self.chunks["max_ts"].max())
+
+    def _filters(self, coins, channels):
+        coin_ids = None if coins is None else np.array([self.coin_ids[c] for c in coins if c in self.coin_ids], dtype=np.uint16)
+        ch_ids = None if channels is None else np.array([_CH[c] for c in channels], dtype=np.uint8)
+        return coin_ids, ch_ids
+
+    def select(
+        self,
+        coins: Optional[Sequence[str]] = None,
+        channels: Optional[Sequence[str]] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> List[int]:
+        # chunk numbers whose index has at least one (coin, channel) entry overlapping the request
+        coin_ids, ch_ids = self._filters(coins, channels)
+        e = self.entries
+        ok = np.ones(len(e), dtype=bool)
+        if coin_ids is not None:
+            ok &= np.isin(e["coin"], coin_ids)
+        if ch_ids is not None:
+            ok &= np.isin(e["channel"], ch_ids)
+        if start_ms is not None:
+            ok &= e["max_ts"] >= start_ms
+        if end_ms is not None:
+            ok &= e["min_ts"] <= end_ms
+        chunk_of = np.repeat(np.arange(len(self.chunks)), self.chunks["n_entries"].astype(np.int64))
+        return np.unique(chunk_of[ok]).tolist()
+
+    def chunk(self, i: int) -> Chunk:
+        c = self.chunks[i]
+        start, end = int(c["offset"]), int(c["offset"] + c["clen"])
+        if self._decompress is None:
+            return Chunk(memoryview(self._mm)[start:end])  # zero-copy view into the mapping
+        return Chunk(self._decompress(self._mm[start:end]))
+
+    def iter_records(
+        self,
+        coins: Optional[Sequence[str]] = None,
+        channels: Optional[Sequence[str]] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        chunks: Optional[Sequence[int]] = None,
+    ) -> Iterator[Tuple[str, object]]:
+        # (channel, payload) in capture order: List[Trade] for trades, L2Update for l2Book,
+        # raw frame bytes for every other channel. chunks: read exactly these chunks (instead of
+        # the ones select() finds)
+        coin_ids, ch_ids = self._filters(coins, channels)
+        names = self.coins
+        for i in self.select(coins, channels, start_ms, end_ms) if chunks is None else chunks:
+            ch = self.chunk(i)
+            ev = ch.events
+            ok = np.ones(len(ev), dtype=bool)
+            if coin_ids is not None:
+                ok &= np.isin(ev["coin"], coin_ids)
+            if ch_ids is not None:
+                ok &= np.isin(ev["channel"], ch_ids)
+            if start_ms is not None:
+                ok &= ev["ts"] >= start_ms
+            if end_ms is not None:
+                ok &= ev["ts"] <= end_ms
+            fl, fb, raw = ch.floats, ch.float_bytes, ch.raw
+            sel = ev[ok] if not ok.all() else ev
+            for ts, off, n, n_ask, coin, channel in zip(
+                sel["ts"].tolist(), sel["off"].tolist(), sel["n"].tolist(),
+                sel["n_ask"].tolist(), sel["coin"].tolist(), sel["channel"].tolist(),
+            ):
+                if channel == _L2:
+                    # each side's columns become packed arrays; the book engine consumes them without Level objects
+                    a = off + 3 * n
+                    yield "l2Book", L2Update(coin=names[coin], time=ts, levels=[
+                        LevelArrays(_darray(fb, off, n), _darray(fb, off + n, n), _darray(fb, off + 2 * n, n)),
+                        LevelArrays(_darray(fb, a, n_ask), _darray(fb, a + n_ask, n_ask), _darray(fb, a + 2 * n_ask, n_ask)),
+                    ])
+                elif channel == _TRADES:
+                    c = names[coin]
+                    t = fl[off:off + 4 * n].tolist()
+                    yield "trades", [
+                        Trade(px, sz, _SIDES[int(sd)], int(tm), c)
+                        for px, sz, sd, tm in zip(t[0::4], t[1::4], t[2::4], t[3::4])
+                    ]
+                else:
+                    yield CHANNELS[channel], bytes(raw[off:off + n])
+
+    def close(self) -> None:
+        # views into the mapping (footer tables, uncompressed chunks) must be gone before it can close
+        self.chunks = self.entries = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a zero-copy view; the mapping closes when it is released
+        self._file.close()
+
+    def __enter__(self) -> CaptureReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def is_capture(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+def convert_ndjson(src: str, dest: str, codec: str = "auto", chunk_events: int = 4096) -> CaptureWriter:
+    with CaptureWriter(dest, codec=codec, chunk_events=chunk_events) as w, open(src, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                w.write_frame(line)
+    return w
+
+def main():
+    ap = argparse.ArgumentParser(description="Binary capture (.hlcap) tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="NDJSON capture -> .hlcap")
+    c.add_argument("src")
+    c.add_argument("dest")
+    c.add_argument("--codec", default="auto", choices=("auto",) + tuple(CODECS))
+    c.add_argument("--chunk-events", type=int, default=4096)
+    i = sub.add_parser("info", help="Print a capture's index summary")
+    i.add_argument("path")
+    args = ap.parse_args()
+
+    if args.cmd == "convert":
+        w = convert_ndjson(args.src, args.dest, args.codec, args.chunk_events)
+        src_size, dest_size = os.path.getsize(args.src), os.path.getsize(args.dest)
+        print(f"{w.events} events, {len(w.coins)} coins, codec {w.codec}: "
+              f"{src_size / 1e6:.1f} MB -> {dest_size / 1e6:.1f} MB ({src_size / max(dest_size, 1):.1f}x)")
+    else:
+        with CaptureReader(args.path) as r:
+            lo, hi = r.time_range()
+            print(f"codec {r.codec}, {len(r.chunks)} chunks, {r.n_events} events, {len(r.coins)} coins, ts {lo}..{hi}"
+                  + (" (no footer: index recovered by scanning the chunks)" if r.recovered else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Optional, Set, Tuple
+
+from websockets.asyncio.server import ServerConnection, serve
+
+from tools.synth import iter_synthetic
+
+# Local stand-in for the Hyperliquid WS endpoint, for tests and benchmarks. Accepts the same
+# subscribe messages and streams synthetic frames (tools.synth) for the coins a connection subscribed
+# to, at `rate` messages/s per connection (0 = as fast as the connection drains). Disconnects can be
+# injected: every connection is aborted after `drop_after_sec` of streaming, or all at once with
+# drop_all(); with `reject` every connection is aborted right after its subscribe burst, before any data. Event time keeps moving forward across connections and restarts, as the real feed's does.
+
+_STREAM_CHANNELS = ("trades", "l2Book", "candle", "activeAssetCtx")
+
+class FakeHyperliquid:
+    def __init__(self, rate: float = 1000.0, seed: int = 0, levels: int = 20, drop_after_sec: float = 0.0,
+                 reject: bool = False):
+        self.rate = rate
+        self.seed = seed
+        self.levels = levels
+        self.drop_after_sec = drop_after_sec
+        self.reject = reject
+        self.connections = 0
+        self.subscribes = 0
+        self.drops = 0
+        self.sent = 0
+        self.clock_ms = 1_710_000_000_000  # >= every timestamp sent so far
+        self.active: Set[ServerConnection] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def drop_all(self) -> None:
+        # abort every open connection without a close handshake, like a network failure (thread-safe)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._abort_all)
+
+    def _abort_all(self) -> None:
+        for ws in list(self.active):
+            self.drops += 1
+            ws.transport.abort()
+
+    async def handler(self, ws: ServerConnection) -> None:
+        self.connections += 1
+        self.loop = asyncio.get_running_loop()
+        self.active.add(ws)
+        coins: Set[str] = set()
+        changed = asyncio.Event()
+
+        async def reader() -> None:
+            async for raw in ws:
+                m = json.loads(raw)
+                sub = m.get("subscription") or {}
+                if m.get("method") == "subscribe":
+                    self.subscribes += 1
+                    if sub.get("type") in _STREAM_CHANNELS and sub.get("coin"):
+                        coins.add(sub["coin"])
+                        changed.set()
+                    await ws.send(json.dumps({"channel": "subscriptionResponse", "data": m}))
+
+        read_task = asyncio.create_task(reader())
+        try:
+            await changed.wait()
+            await asyncio.sleep(0.05)  # let the rest of a pipelined subscribe burst land
+            if self.reject:
+                self.drops += 1
+                ws.transport.abort()
+                return
+            stream = self._stream(ws, coins, changed)
+            if self.drop_after_sec > 0:
+                try:
+                    await asyncio.wait_for(stream, self.drop_after_sec)
+                except asyncio.TimeoutError:
+                    self.drops += 1
+                    ws.transport.abort()
+            else:
+                await stream
+        except Exception:
+            pass
+        finally:
+            self.active.discard(ws)
+            read_task.cancel()
+
+    async def _stream(self, ws: ServerConnection, coins: Set[str], changed: asyncio.Event) -> None:
+        batch = max(1, int(self.rate / 100)) if self.rate > 0 else 64
+        pause = batch / self.rate if self.rate > 0 else 0.0
+        seed = self.seed
+        step_ms = 50
+        while True:
+            changed.clear()
+            start = max(self.clock_ms, int(time.time() * 1000))
+            it = iter_synthetic(sorted(coins), 1 << 62, seed=seed, start_ms=start, step_ms=step_ms, levels=self.levels)
+            seed += 1
+            n = 0
+            try:
+                while not changed.is_set():
+                    for _ in range(batch):
+                        await ws.send(json.dumps(next(it), separators=(",", ":")))
+                        n += 1
+                    self.sent += batch
+                    await asyncio.sleep(pause)
+            finally:
+                # iter_synthetic advances time by at most step_ms per message
+                self.clock_ms = max(self.clock_ms, start + n * step_ms)
+
+async def run_server(host: str, port: int, fake: FakeHyperliquid) -> None:
+    async with serve(fake.handler, host, port, ping_interval=None) as server:
+        await server.serve_forever()
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0, **kwargs) -> Tuple[str, FakeHyperliquid, Callable[[], None]]:
+    # Runs a server on its own event loop thread. Returns (ws_url, server state, stop()).
+    fake = FakeHyperliquid(**kwargs)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    bound: dict = {}
+    stopped: Optional[asyncio.Future] = None
+
+    async def main() -> None:
+        nonlocal stopped
+        stopped = loop.create_future()
+        async with serve(fake.handler, host, port, ping_interval=None) as server:
+            bound["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            await stopped
+
+    t = threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True, name="fake-hl-ws")
+    t.start()
+    ready.wait(10)
+
+    def stop() -> None:
+        loop.call_soon_threadsafe(stopped.set_result, None)
+        t.join(10)
+
+    return f"ws://{host}:{bound['port']}", fake, stop
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--rate", type=float, default=1000.0, help="Messages/s per connection (0 = unthrottled)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--drop-after", type=float, default=0.0, help="Abort each connection after N seconds of streaming (0 = never)")
+    ap.add_argument("--reject", action="store_true", help="Abort each connection right after it subscribes, before any data")
+    args = ap.parse_args()
+    print(f"fake Hyperliquid WS on ws://{args.host}:{args.port}")
+    fake = FakeHyperliquid(rate=args.rate, seed=args.seed, drop_after_sec=args.drop_after, reject=args.reject)
+    asyncio.run(run_server(args.host, args.port, fake))
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,219 @@
 from __future__ import annotations
-import argparse, asyncio, json, time, os
-from typing import List
-import websockets
+import argparse, asyncio, json, logging, time, os, threading
+from collections import deque
+from typing import List, Optional
+
+from ingestion.decode import Frame
 
 WS_URL = "wss://api.hyperliquid.xyz/ws"
 
-async def record(coins: List[str], out: str, seconds: int) -> None:
-    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+log = logging.getLogger(__name__)
+
+class FrameRecorder:
+    # Records raw WS frames without touching disk on the caller's thread: submit() appends to a
+    # bounded in-memory queue (a full queue drops the frame and counts it, it never blocks the
+    # socket read) and a writer thread drains it in batches, one buffered write per batch.
+    # Output is NDJSON, or the binary capture format for *.hlcap. With rotate_sec / rotate_mb the
+    # output is split into <stem>.<utc time>.<seq><ext> files. A failed write or rotation is logged
+    # and counted (the batch is lost) and the writer carries on.
+    def __init__(self, out: str, max_queue: int = 100_000, batch: int = 2048,
+                 rotate_sec: float = 0.0, rotate_mb: float = 0.0, codec: str = "auto"):
+        self.out = out
+        self.max_queue = max_queue
+        self.batch = batch
+        self.rotate_sec = rotate_sec
+        self.rotate_bytes = int(rotate_mb * 1e6)
+        self.codec = codec
+        self.binary = out.endswith(".hlcap")
+        self._q: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._f = None
+        self._opened = 0.0
+        self._seq = 0
+        self.files: List[str] = []
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.bytes = 0
+        self.max_depth = 0
+        self.errors = 0
+        self.lost = 0  # frames in batches that failed to write
+        self.last_error: Optional[str] = None
+        self._lat_ms: deque = deque(maxlen=1024)  # recent per-batch write times
+
+    def submit(self, frame: Frame) -> None:
+        q = self._q
+        n = len(q)
+        if n >= self.max_queue:
+            self.dropped += 1
+            return
+        q.append(frame)
+        self.submitted += 1
+        if n >= self.max_depth:
+            self.max_depth = n + 1
+        if n + 1 == self.batch:
+            self._wake.set()
+
+    def start(self) -> FrameRecorder:
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="frame-recorder")
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        # drains whatever is still queued, then closes the current file
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._close_file()
+
+    def __enter__(self) -> FrameRecorder:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _path(self) -> str:
+        if not (self.rotate_sec or self.rotate_bytes):
+            return self.out
+        stem, ext = os.path.splitext(self.out)
+        return f"{stem}.{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.{self._seq:04d}{ext}"
+
+    def _open(self) -> None:
+        path = self._path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if self.binary:
+            from tools.capture import CaptureWriter  # NumPy; only for the binary format
+            self._f = CaptureWriter(path, codec=self.codec)
+        else:
+            self._f = open(path, "wb", buffering=1 << 20)
+        self.files.append(path)
+        self._opened = time.monotonic()
+        self._seq += 1
+
+    def _close_file(self) -> None:
+        f, self._f = self._f, None
+        if f is not None:
+            f.close()
+
+    def _due(self) -> bool:
+        if self.rotate_bytes and self._f.tell() >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_sec) and time.monotonic() - self._opened >= self.rotate_sec
+
+    def _run(self) -> None:
+        q = self._q
+        rotating = bool(self.rotate_sec or self.rotate_bytes)
+        while True:
+            stopping = self._stop.is_set()
+            if len(q) < self.batch and not stopping:
+                self._wake.wait(0.05)  # woken early once a full batch is queued
+                self._wake.clear()
+            # rotation is checked before every batch: under sustained load the queue never drains
+            while q:
+                frames: list = []
+                try:
+                    if self._f is None:
+                        self._open()  # a failed rotation left no file open
+                    elif rotating and self._due():
+                        self._close_file()
+                        self._open()
+                    frames = [q.popleft() for _ in range(min(len(q), self.batch))]
+                    self._write(frames)
+                except Exception as e:
+                    self._failed(e, len(frames))
+                    break
+            if stopping:
+                return
+
+    def _failed(self, e: Exception, frames: int) -> None:
+        self.errors += 1
+        self.lost += frames
+        err = f"{type(e).__name__}: {e}"
+        if err != self.last_error:  # once per distinct error, not once per batch
+            log.error("frame recorder: writing %s failed, %d frame(s) lost: %s", self.files[-1] if self.files else self.out, frames, err)
+        self.last_error = err
+
+    def _write(self, frames: list) -> None:
+        t0 = time.perf_counter()
+        f = self._f
+        if self.binary:
+            for raw in frames:
+                f.write_frame(raw)
+            size = sum(map(len, frames))
+        else:
+            buf = b"".join([(m.encode() if isinstance(m, str) else bytes(m)).strip() + b"\n" for m in frames])
+            f.write(buf)
+            f.flush()
+            size = len(buf)
+        self._lat_ms.append((time.perf_counter() - t0) * 1e3)
+        self.written += len(frames)
+        self.batches += 1
+        self.bytes += size
+
+    def stats(self) -> dict:
+        lat = sorted(self._lat_ms)
+        return {
+            "file": self.files[-1] if self.files else None,
+            "files": len(self.files),
+            "queue_depth": len(self._q),
+            "max_queue_depth": self.max_depth,
+            "queue_limit": self.max_queue,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "lost": self.lost,
+            "last_error": self.last_error,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "write_ms_p50": lat[len(lat) // 2] if lat else None,
+            "write_ms_p99": lat[int(len(lat) * 0.99)] if lat else None,
+            "write_ms_max": lat[-1] if lat else None,
+        }
+
+async def record(coins: List[str], out: str, seconds: int, ws_url: str = WS_URL,
+                 rotate_sec: float = 0.0, rotate_mb: float = 0.0, max_queue: int = 100_000) -> dict:
+    import websockets
+
     end = time.time() + seconds
-    async with websockets.connect(WS_URL, ping_interval=None) as ws:
-        subs = [{"type":"trades","coin":c} for c in coins] + [{"type":"l2Book","coin":c} for c in coins]
-        for s in subs:
-            await ws.send(json.dumps({"method":"subscribe","subscription":s}))
-        with open(out, "w", encoding="utf-8") as f:
-            while time.time() < end:
-                msg = await ws.recv()
-                f.write(msg.strip() + "\n")
-    print(f"Wrote {out}")
+    with FrameRecorder(out, max_queue=max_queue, rotate_sec=rotate_sec, rotate_mb=rotate_mb) as rec:
+        async with websockets.connect(ws_url, ping_interval=None) as ws:
+            subs = [{"type":"trades","coin":c} for c in coins] + [{"type":"l2Book","coin":c} for c in coins]
+            for s in subs:
+                await ws.send(json.dumps({"method":"subscribe","subscription":s}))
+            while True:
+                left = end - time.time()
+                if left <= 0:
+                    break
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), left)
+                except asyncio.TimeoutError:
+                    break
+                rec.submit(msg)
+    stats = rec.stats()
+    print(f"Wrote {', '.join(rec.files)}")
+    return stats
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--coins", default="BTC", help="Comma-separated, e.g. BTC,ETH")
-    ap.add_argument("--out", default="data/capture.ndjson")
+    ap.add_argument("--out", default="data/capture.ndjson", help="*.hlcap writes the binary capture format")
     ap.add_argument("--seconds", type=int, default=60)
+    ap.add_argument("--ws-url", default=WS_URL)
+    ap.add_argument("--rotate-sec", type=float, default=0.0, help="Start a new file every N seconds (0 = never)")
+    ap.add_argument("--rotate-mb", type=float, default=0.0, help="Start a new file once it reaches N MB (0 = never)")
+    ap.add_argument("--max-queue", type=int, default=100_000, help="Frames buffered for the writer before dropping")
     args = ap.parse_args()
     coins = [c.strip() for c in args.coins.split(",") if c.strip()]
-    asyncio.run(record(coins, args.out, args.seconds))
+    stats = asyncio.run(record(coins, args.out, args.seconds, args.ws_url, args.rotate_sec, args.rotate_mb, args.max_queue))
+    print(json.dumps({k: stats[k] for k in ("written", "dropped", "max_queue_depth", "write_ms_p99")}))
 
 if __name__ == "__main__":
     main()
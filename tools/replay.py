@@ -1,6 +1,15 @@
 from __future__ import annotations
 import json
-from typing import Iterator, Dict, Any
+import time
+from typing import TYPE_CHECKING, Iterator, Dict, Any, Optional, Sequence, Tuple
+
+from config import HLConfig
+
+if TYPE_CHECKING:
+    from ingestion.market_state import MarketState
+
+# iter_ndjson needs only the stdlib; the capture reader, decoders and client (NumPy, msgspec,
+# websockets) are imported by the functions that use them.
 
 def iter_ndjson(path: str) -> Iterator[Dict[str, Any]]:
     with open(path, "r", encoding="utf-8") as f:
@@ -9,3 +18,69 @@ def iter_ndjson(path: str) -> Iterator[Dict[str, Any]]:
             if not line:
                 continue
             yield json.loads(line)
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+def iter_records(path: str, start_ms: Optional[int] = None) -> Iterator[Tuple[str, object]]:
+    # (channel, decoded records) from an NDJSON or .hlcap capture, for the channels HyperliquidWS
+    # handles. start_ms lets a .hlcap skip the chunks before the first one holding anything that
+    # recent; from there on every record is read (a candle's time is its open time, which can be older).
+    # Captures left behind by a crashed recorder read up to the last complete record (or chunk).
+    from ingestion.decode import get_loads, peek_channel
+    from ingestion.messages import make_frame_decoders, make_payload_parsers
+    from tools.capture import CaptureReader, is_capture
+
+    loads = get_loads("auto")
+    decoders = make_frame_decoders(loads, _now_ms)
+    parsers = make_payload_parsers(_now_ms)
+    if is_capture(path):
+        with CaptureReader(path) as reader:
+            n = len(reader.chunks)
+            first = reader.select(start_ms=start_ms) if start_ms is not None else [0]
+            for ch, payload in reader.iter_records(chunks=range(first[0] if first else n, n)):
+                if isinstance(payload, bytes):
+                    decode = decoders.get(ch)
+                    payload = decode(payload) if decode is not None else None
+                if payload is not None:
+                    yield ch, payload
+        return
+    with open(path, "rb") as f:
+        for raw in f:
+            # only the last line can lack its newline: the record a crashed (or still running) recorder
+            # was in the middle of writing, which is skipped if it does not decode
+            torn = not raw.endswith(b"\n")
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                ch = peek_channel(raw)
+                if ch is None:
+                    m = loads(raw)
+                    ch = m.get("channel")
+                    parse = parsers.get(ch)
+                    records = parse(m.get("data")) if parse is not None else None
+                else:
+                    decode = decoders.get(ch)
+                    records = decode(raw) if decode is not None else None
+            except Exception:
+                if torn:
+                    return
+                raise
+            if records is not None:
+                yield ch, records
+
+def catch_up(state: MarketState, paths: Sequence[str], cfg: Optional[HLConfig] = None) -> dict:
+    # Replays what the captures (in order) hold past a state restored from a checkpoint, through the
+    # normal handlers; see GapFilter for what counts as past it.
+    from ingestion.checkpoint import GapFilter
+    from ingestion.hyperliquid_ws import HyperliquidWS
+
+    client = HyperliquidWS(state, cfg or HLConfig())
+    gap = GapFilter(state)
+    for path in paths:
+        for ch, records in iter_records(path, gap.start_ms):
+            records = gap.admit(ch, records)
+            if records is not None:
+                client.on_records(ch, records)
+    return {"files": len(paths), "applied": gap.admitted, "skipped": gap.skipped}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import argparse, json, os, random
+from typing import Any, Dict, Iterator, List
+
+# Deterministic synthetic Hyperliquid WS frames (same shapes as the live feed) for benchmarks and tests.
+
+def iter_synthetic(
+    coins: List[str],
+    n_msgs: int,
+    seed: int = 0,
+    start_ms: int = 1_710_000_000_000,
+    step_ms: int = 50,
+    levels: int = 20,
+) -> Iterator[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    mids = {c: 100.0 * (1 + i) for i, c in enumerate(coins)}
+    ts = start_ms
+    tid = 0
+    for i in range(n_msgs):
+        ts += rnd.randint(0, step_ms)
+        coin = coins[rnd.randrange(len(coins))]
+        u = rnd.random()
+        if u < 0.5:
+            mid = mids[coin] = mids[coin] * (1.0 + rnd.gauss(0.0, 4e-4))
+            tick = mid * 1e-5
+            half = tick * rnd.randint(1, 8)
+            bids = [{"px": f"{mid - half - k * tick:.6f}", "sz": f"{rnd.uniform(0.05, 10.0):.4f}", "n": rnd.randint(1, 9)} for k in range(levels)]
+            asks = [{"px": f"{mid + half + k * tick:.6f}", "sz": f"{rnd.uniform(0.05, 10.0):.4f}", "n": rnd.randint(1, 9)} for k in range(levels)]
+            yield {"channel": "l2Book", "data": {"coin": coin, "time": ts, "levels": [bids, asks]}}
+        elif u < 0.85:
+            trades = []
+            for _ in range(rnd.randint(1, 4)):
+                tid += 1
+                trades.append({
+                    "coin": coin,
+                    "side": "B" if rnd.random() < 0.5 else "A",
+                    "px": f"{mids[coin]:.6f}",
+                    "sz": f"{rnd.uniform(0.01, 3.0):.4f}",
+                    "time": ts,
+                    "hash": f"0x{tid:064x}",
+                    "tid": tid,
+                })
+            yield {"channel": "trades", "data": trades}
+        elif u < 0.92:
+            yield {"channel": "allMids", "data": {"mids": {c: f"{m:.6f}" for c, m in mids.items()}}}
+        elif u < 0.97:
+            m = mids[coin]
+            t0 = ts - ts % 60_000
+            yield {"channel": "candle", "data": {
+                "t": t0, "T": t0 + 59_999, "s": coin, "i": "1m",
+                "o": f"{m:.6f}", "c": f"{m:.6f}", "h": f"{m * 1.001:.6f}", "l": f"{m * 0.999:.6f}",
+                "v": f"{rnd.uniform(1, 500):.4f}", "n": rnd.randint(1, 200),
+            }}
+        else:
+            m = mids[coin]
+            yield {"channel": "activeAssetCtx", "data": {"coin": coin, "ctx": {
+                "funding": f"{rnd.gauss(1e-5, 2e-5):.8f}",
+                "openInterest": f"{rnd.uniform(1e4, 1e6):.2f}",
+                "oraclePx": f"{m:.6f}",
+                "markPx": f"{m * (1 + rnd.gauss(0, 1e-4)):.6f}",
+                "premium": f"{rnd.gauss(0, 3e-4):.8f}",
+                "dayNtlVlm": f"{rnd.uniform(1e6, 1e9):.2f}",
+                "prevDayPx": f"{m:.6f}",
+                "midPx": f"{m:.6f}",
+            }}}
+
+def write_ndjson(path: str, coins: List[str], n_msgs: int, seed: int = 0) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for m in iter_synthetic(coins, n_msgs, seed=seed):
+            f.write(json.dumps(m, separators=(",", ":")) + "\n")
+    return path
+
+def synth_coins(n: int) -> List[str]:
+    base = ["BTC", "ETH", "SOL"]
+    return (base + [f"C{i:03d}" for i in range(max(0, n - len(base)))])[:n]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--coins", default="BTC,ETH,SOL", help="Comma-separated symbols, or an integer N for N coins")
+    ap.add_argument("--messages", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="data/synthetic.ndjson")
+    args = ap.parse_args()
+    coins = synth_coins(int(args.coins)) if args.coins.isdigit() else [c.strip() for c in args.coins.split(",") if c.strip()]
+    write_ndjson(args.out, coins, args.messages, seed=args.seed)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()